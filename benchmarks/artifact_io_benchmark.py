@@ -0,0 +1,63 @@
+"""
+Write time / read time / file size of the raw and interim artifact formats.
+
+The sample corpus (notebooks /data.csv) is repeated --scale times.
+usage : python benchmarks/artifact_io_benchmark.py --scale 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+from src.data.artifact_io import FORMATS, artifact_path, open_writer, read_frame, iter_frames
+
+SAMPLE_PATH = os.path.join("notebooks ", "data.csv")
+
+
+def bench_format(df: pd.DataFrame, directory: str, fmt: str, chunksize: int) -> dict:
+    path = artifact_path(directory, "bench", fmt)
+
+    start = time.perf_counter()
+    with open_writer(path) as writer:
+        for begin in range(0, len(df), chunksize):
+            writer.write(df.iloc[begin:begin + chunksize])
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    full = read_frame(path)
+    read_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = sum(len(chunk) for chunk in iter_frames(path, chunksize))
+    chunked_read_time = time.perf_counter() - start
+
+    if len(full) != len(df) or rows != len(df):
+        raise SystemExit(f"{fmt}: read back {len(full)} / {rows} rows, wrote {len(df)}")
+    return {
+        "format": fmt,
+        "write_s": round(write_time, 4),
+        "read_s": round(read_time, 4),
+        "chunked_read_s": round(chunked_read_time, 4),
+        "size_mb": round(os.path.getsize(path) / 2 ** 20, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", default=SAMPLE_PATH)
+    parser.add_argument("--scale", type=int, default=200, help="repeat the sample corpus N times")
+    parser.add_argument("--chunksize", type=int, default=100000)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    df = pd.concat([df] * args.scale, ignore_index=True)
+    print(f"rows : {len(df)}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = [bench_format(df, directory, fmt, args.chunksize) for fmt in FORMATS]
+    print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
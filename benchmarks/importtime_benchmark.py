@@ -0,0 +1,85 @@
+"""
+Startup cost of the pipeline entry points, from `python -X importtime`.
+
+Each module is imported in a fresh interpreter (best of --repeat). Reported :
+the cumulative import time of the module, the wall time of the whole
+process (interpreter start included) and the packages that cost the most,
+by top level package (self time summed over its submodules).
+usage : python benchmarks/importtime_benchmark.py --repeat 3 --top 5
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = {
+    "data_ingestion": "src.data.data_ingestion",
+    "data_preprocessing": "src.data.data_preprocessing",
+    "feature_engineering": "src.features.feature_engineering",
+    "model_building": "src.model.model_building",
+    "model_evaluation": "src.model.model_evaluation",
+    "model_registry": "src.model.model_registry",
+    "predict": "src.model.predict",
+    "serving": "src.serving.predictor",
+}
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_profile(module: str) -> dict:
+    """one fresh interpreter importing module : wall time, cumulative import time, self time per package"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                             cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()
+        raise RuntimeError(error[-1] if error else f"exit status {process.returncode}")
+
+    cumulative, packages = None, defaultdict(int)
+    for match in LINE.finditer(process.stderr):
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        packages[name.split(".")[0]] += self_us
+        if name == module and not indent:
+            cumulative = cumulative_us
+    return {"wall_ms": wall * 1000, "import_ms": (cumulative or 0) / 1000,
+            "packages_ms": {name: us / 1000 for name, us in packages.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entry-points", nargs="+", default=list(ENTRY_POINTS), choices=list(ENTRY_POINTS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5, help="heaviest packages shown per entry point")
+    parser.add_argument("--out", default=None, help="also write the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.entry_points:
+        module = ENTRY_POINTS[name]
+        try:
+            runs = [import_profile(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name:<20} import failed : {e}")
+            results[name] = {"error": str(e)}
+            continue
+        best = min(runs, key=lambda run: run["import_ms"])
+        results[name] = best
+        heaviest = sorted(best["packages_ms"].items(), key=lambda item: item[1], reverse=True)[:args.top]
+        print(f"{name:<20} import {best['import_ms']:>8.1f} ms | process {best['wall_ms']:>8.1f} ms | "
+              + ", ".join(f"{package} {ms:.0f}" for package, ms in heaviest))
+
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Load test for the micro-batching scheduler : throughput vs latency.
+
+N client threads send single-review predictions, first straight to the
+Predictor (one transform + predict_proba per review), then through a
+MicroBatcher for each max_batch_size:max_wait_ms setting.
+
+A small model is trained on the sample corpus so the harness does not
+depend on pipeline outputs.
+usage : python benchmarks/microbatch_load_test.py --clients 32 --configs 8:1 32:2 64:5
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.linear_model import LogisticRegression
+from src.serving.batching import MicroBatcher
+from src.serving.predictor import Predictor
+
+SAMPLE_PATH = os.path.join("notebooks ", "data.csv")
+
+
+def build_predictor(texts: list, labels: np.ndarray, directory: str, max_features: int) -> Predictor:
+    vectorizer = CountVectorizer(max_features=max_features)
+    clf = LogisticRegression(C=1, solver='liblinear', penalty='l1').fit(vectorizer.fit_transform(texts), labels)
+    paths = {}
+    for name, obj in (('model', clf), ('vectorizer', vectorizer)):
+        paths[name] = os.path.join(directory, f'{name}.pkl')
+        with open(paths[name], 'wb') as file:
+            pickle.dump(obj, file)
+    return Predictor(paths['model'], paths['vectorizer'])
+
+
+def run_load(call, texts: list, clients: int, requests: int) -> dict:
+    latencies = [[] for _ in range(clients)]
+
+    def client(index: int):
+        rng = np.random.default_rng(index)
+        for i in rng.integers(0, len(texts), requests):
+            start = time.perf_counter()
+            call(texts[i])
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    samples = np.concatenate([np.asarray(client_latencies) for client_latencies in latencies]) * 1000
+    return {
+        'throughput_rps': round(len(samples) / elapsed, 1),
+        'p50_ms': round(float(np.percentile(samples, 50)), 3),
+        'p99_ms': round(float(np.percentile(samples, 99)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", default=SAMPLE_PATH)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--max-features", type=int, default=5000)
+    parser.add_argument("--configs", nargs="+", default=["1:0", "8:1", "32:2", "64:5"],
+                        help="max_batch_size:max_wait_ms pairs")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    df = df[df['sentiment'].isin(['positive', 'negative'])]
+    texts = df['review'].astype(str).tolist()
+    labels = (df['sentiment'] == 'positive').astype(int).values
+
+    with tempfile.TemporaryDirectory() as directory:
+        predictor = build_predictor(texts, labels, directory, args.max_features)
+
+    rows = [dict(mode='direct', **run_load(lambda text: predictor.predict([text]), texts, args.clients, args.requests))]
+    for config in args.configs:
+        max_batch_size, max_wait_ms = config.split(':')
+        batcher = MicroBatcher(predictor.predict, int(max_batch_size), float(max_wait_ms))
+        result = run_load(batcher.predict, texts, args.clients, args.requests)
+        stats = batcher.stats()
+        batcher.close()
+        rows.append(dict(mode=f'batch {config}', mean_batch=round(stats['mean_batch_size'], 1), **result))
+
+    print(f"clients : {args.clients} x {args.requests} requests")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
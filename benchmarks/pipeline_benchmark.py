@@ -0,0 +1,262 @@
+"""
+End-to-end pipeline benchmark on synthetic corpora, with a regression gate.
+
+run : for each corpus size, generate (once, cached in --corpus-dir) a
+synthetic corpus with synthetic_corpus.py, then run the pipeline on it in a
+scratch directory : ingestion, preprocessing, feature engineering and
+training as separate processes (like dvc repro, import time included), then
+evaluation, single review scoring (Predictor) and batch scoring
+(predict_file). Caches are disabled so every run does the full work. Wall
+time, CPU time, peak RSS and rows/s of each stage (best of --repeat) are
+stored in one JSON file, with the per-section profile of each stage.
+
+compare : rows/s of a candidate results file against a baseline, exits
+with status 1 when a stage got slower than --threshold.
+
+usage : python benchmarks/pipeline_benchmark.py run --sizes 10k 100k 1M --out benchmarks/results/main.json
+        python benchmarks/pipeline_benchmark.py compare benchmarks/results/main.json benchmarks/results/branch.json
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic_corpus import SAMPLE_PATH, corpus_path, generate_corpus, parse_size  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# benchmark name, script, stage and section of reports/profile.json holding the rows processed
+STAGES = [
+    ("ingestion", "src/data/data_ingestion.py", "data_ingestion", "ingest_chunks"),
+    ("preprocessing", "src/data/data_preprocessing.py", "data_preprocessing", "preprocess_file"),
+    ("feature_engineering", "src/features/feature_engineering.py", "feature_engineering", "apply_bow"),
+    ("training", "src/model/model_building.py", "model_building", "train_model"),
+]
+
+
+def bench_params(corpus: str, workers: int) -> dict:
+    """the repo params.yaml pointed at the corpus, with every cache off"""
+    with open(os.path.join(REPO_ROOT, "params.yaml")) as file:
+        params = yaml.safe_load(file)
+    params["data_ingestion"].update(source="local", data_url=os.path.abspath(corpus), cache_dir=None)
+    params["data_preprocessing"].update(lemma_cache_path=None, row_cache_path=None, workers=workers)
+    params["feature_engineering"].update(row_cache_path=None)
+    for section in ("serving", "predict"):
+        params[section].update(lemma_cache_path=None)
+    params["predict"].update(workers=workers)
+    return params
+
+
+def run_process(args: list, cwd: str, log_path: str) -> dict:
+    """run a child process (output to log_path), returns its wall time, cpu time and peak RSS"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    with open(log_path, "w") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable] + args, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        if hasattr(os, "wait4"):
+            # wait4 gives the rusage of this child alone
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            cpu, peak_rss = usage.ru_utime + usage.ru_stime, usage.ru_maxrss / 1024
+        else:
+            process.wait()
+            cpu, peak_rss = None, None
+        wall = time.perf_counter() - start
+    if process.returncode != 0:
+        with open(log_path, errors="replace") as log:
+            raise RuntimeError(f"{' '.join(args)} failed with status {process.returncode}:\n{log.read()[-3000:]}")
+    return {"seconds": wall, "cpu_s": cpu, "peak_rss_mb": peak_rss}
+
+
+def score(args) -> None:
+    """evaluation + scoring, run in the scratch directory as a child process"""
+    from src.features.sparse_io import load_sparse
+    from src.model.model_evaluation import evaluate_model
+    from src.model.predict import predict_file
+    from src.serving.predictor import Predictor
+
+    with open("params.yaml") as file:
+        params = yaml.safe_load(file)
+    results = {}
+
+    with open(os.path.join("models", "model.pkl"), "rb") as file:
+        clf = pickle.load(file)
+    X_test, y_test = load_sparse(os.path.join("data", "processed", "test_bow.npz"))
+    start = time.perf_counter()
+    evaluate_model(clf, X_test, y_test)
+    results["evaluation"] = {"seconds": time.perf_counter() - start, "rows": X_test.shape[0]}
+
+    serving = params["serving"]
+    predictor = Predictor(serving["model_path"], serving["vectorizer_path"],
+                          lean_model_dir=serving.get("lean_model_dir"), sparse_scorer=serving.get("sparse_scorer", False))
+    texts = pd.read_csv(args.corpus, nrows=args.requests)["review"].tolist()
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        predictor.predict([text])
+        latencies.append(time.perf_counter() - start)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    results["scoring_single"] = {"seconds": float(sum(latencies)), "rows": len(texts),
+                                 "p50_ms": round(float(p50), 4), "p99_ms": round(float(p99), 4)}
+
+    predict = params["predict"]
+    start = time.perf_counter()
+    rows = predict_file(args.corpus, os.path.join("data", "predictions.csv"),
+                        model_path=predict["model_path"], vectorizer_path=predict["vectorizer_path"],
+                        chunksize=predict.get("chunksize", 100000), workers=predict.get("workers", 1),
+                        lean_model_dir=predict.get("lean_model_dir"), sparse_scorer=predict.get("sparse_scorer", False))
+    results["scoring_batch"] = {"seconds": time.perf_counter() - start, "rows": rows}
+
+    with open(args.out, "w") as file:
+        json.dump(results, file)
+
+
+def run_pipeline(corpus: str, rows: int, workdir: str, workers: int, requests: int) -> dict:
+    workdir = os.path.abspath(workdir)
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir)
+    with open(os.path.join(workdir, "params.yaml"), "w") as file:
+        yaml.safe_dump(bench_params(corpus, workers), file)
+
+    results = {}
+    for name, script, _, _ in STAGES:
+        results[name] = run_process([os.path.join(REPO_ROOT, script)], workdir, os.path.join(workdir, f"{name}.log"))
+    # rows processed by each stage, from the profile report the stages write
+    with open(os.path.join(workdir, "reports", "profile.json")) as file:
+        profile = json.load(file)["stages"]
+    for name, _, stage, section in STAGES:
+        sections = profile.get(stage, {}).get("sections", {})
+        results[name]["rows"] = sections.get(section, {}).get("rows") or rows
+        results[name]["sections"] = sections
+
+    score_path = os.path.join(workdir, "score.json")
+    usage = run_process([os.path.abspath(__file__), "score", "--corpus", os.path.abspath(corpus),
+                         "--requests", str(requests), "--out", score_path], workdir, os.path.join(workdir, "score.log"))
+    with open(score_path) as file:
+        for name, result in json.load(file).items():
+            # one process for the three, its peak RSS is the max of them
+            results[name] = dict(result, peak_rss_mb=usage["peak_rss_mb"])
+
+    for result in results.values():
+        result["rows_per_s"] = result["rows"] / result["seconds"] if result["seconds"] else None
+    return results
+
+
+def best_run(runs: list) -> dict:
+    """per stage, the fastest of the repeated runs"""
+    return {name: min((run[name] for run in runs), key=lambda result: result["seconds"]) for name in runs[0]}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> None:
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "run_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "workers": args.workers,
+            "repeat": args.repeat,
+        },
+        "sizes": {},
+    }
+    for rows in args.sizes:
+        corpus = corpus_path(args.corpus_dir, rows, args.seed)
+        if not os.path.exists(corpus):
+            print(f"generating {corpus} ...", flush=True)
+            os.makedirs(args.corpus_dir, exist_ok=True)
+            generate_corpus(corpus, rows, args.data, args.seed)
+        runs = [run_pipeline(corpus, rows, os.path.join(args.workdir, str(rows)), args.workers, args.requests)
+                for _ in range(args.repeat)]
+        report["sizes"][str(rows)] = results = best_run(runs)
+        for name, result in results.items():
+            print(f"{rows:>9} rows | {name:<20} {result['seconds']:>9.2f}s {result['rows_per_s']:>12,.0f} rows/s"
+                  f" | peak RSS {result['peak_rss_mb'] or 0:>8.0f} MB", flush=True)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"results written to {args.out}")
+
+
+def compare(args) -> None:
+    with open(args.baseline) as file:
+        baseline = json.load(file)["sizes"]
+    with open(args.candidate) as file:
+        candidate = json.load(file)["sizes"]
+
+    regressions = []
+    for size in sorted(set(baseline) & set(candidate), key=int):
+        for name in baseline[size]:
+            if name not in candidate[size]:
+                continue
+            before, after = baseline[size][name]["rows_per_s"], candidate[size][name]["rows_per_s"]
+            if not before or not after:
+                continue
+            change = after / before - 1
+            flag = "REGRESSION" if change < -args.threshold else ""
+            if flag:
+                regressions.append((size, name, change))
+            print(f"{int(size):>9} rows | {name:<20} {before:>12,.0f} -> {after:>12,.0f} rows/s {change:>+8.1%} {flag}")
+
+    if regressions:
+        raise SystemExit(f"{len(regressions)} stage(s) slower than the baseline by more than {args.threshold:.0%}")
+    print(f"no regression beyond {args.threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="benchmark the pipeline on synthetic corpora")
+    run_parser.add_argument("--sizes", type=parse_size, nargs="+", default=[10000, 100000],
+                            help="corpus sizes, e.g. 10k 100k 1M 10M")
+    run_parser.add_argument("--data", default=SAMPLE_PATH, help="sample corpus the generator is fitted on")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--corpus-dir", default=os.path.join("data", "bench"))
+    run_parser.add_argument("--workdir", default=os.path.join("data", "bench", "runs"))
+    run_parser.add_argument("--workers", type=int, default=1, help="preprocessing / batch scoring workers")
+    run_parser.add_argument("--requests", type=int, default=1000, help="single review scoring requests")
+    run_parser.add_argument("--repeat", type=int, default=1)
+    run_parser.add_argument("--out", default=os.path.join("benchmarks", "results",
+                                                          f"{datetime.now():%Y%m%d-%H%M%S}.json"))
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="flag throughput regressions between two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="tolerated rows/s drop (0.10 = 10%%)")
+    compare_parser.set_defaults(func=compare)
+
+    # internal : evaluation and scoring, run by `run` inside the scratch directory
+    score_parser = commands.add_parser("score")
+    score_parser.add_argument("--corpus", required=True)
+    score_parser.add_argument("--requests", type=int, default=1000)
+    score_parser.add_argument("--out", required=True)
+    score_parser.set_defaults(func=score)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
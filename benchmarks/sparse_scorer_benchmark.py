@@ -0,0 +1,70 @@
+"""
+Microbenchmark : vectorizer.transform + clf.predict_proba vs SparseScorer.
+
+Both score the same texts with the same L1 logistic model (the train_model
+settings), the scorer must agree with predict_proba to within 1e-9.
+Batch size 1 is the online /predict case, the large batch the offline one.
+usage : python benchmarks/sparse_scorer_benchmark.py --scale 10 --max-features 5000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.linear_model import LogisticRegression
+from src.model.sparse_scorer import SparseScorer
+
+SAMPLE_PATH = os.path.join("notebooks ", "data.csv")
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def score_batches(score, texts: list, batch_size: int):
+    return [score(texts[start:start + batch_size]) for start in range(0, len(texts), batch_size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", default=SAMPLE_PATH)
+    parser.add_argument("--scale", type=int, default=10, help="repeat the sample corpus N times")
+    parser.add_argument("--max-features", type=int, default=5000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    df = df[df["sentiment"].isin(["positive", "negative"])]
+    texts = pd.concat([df["review"]] * args.scale, ignore_index=True).tolist()
+    y = np.tile((df["sentiment"] == "positive").astype(int).values, args.scale)
+
+    vectorizer = CountVectorizer(max_features=args.max_features)
+    clf = LogisticRegression(C=1, solver="liblinear", penalty="l1").fit(vectorizer.fit_transform(texts), y)
+    scorer = SparseScorer.from_sklearn(clf, vectorizer)
+
+    expected = clf.predict_proba(vectorizer.transform(texts))
+    diff = np.abs(scorer.predict_proba(texts) - expected).max()
+    if diff > 1e-9:
+        raise SystemExit(f"parity check failed : max |diff| = {diff}")
+
+    print(f"rows                : {len(texts)}")
+    print(f"vocabulary          : {len(vectorizer.vocabulary_)} tokens, {len(scorer.weights)} non-zero weights")
+    print(f"max |diff|          : {diff:.3g}")
+    for batch_size in args.batch_sizes:
+        baseline = best_of(lambda: score_batches(lambda batch: clf.predict_proba(vectorizer.transform(batch)),
+                                                 texts, batch_size), args.repeat)
+        sparse = best_of(lambda: score_batches(scorer.predict_proba, texts, batch_size), args.repeat)
+        print(f"batch {batch_size:>6} : transform + predict_proba {len(texts) / baseline:>10.0f} rows/s | "
+              f"sparse scorer {len(texts) / sparse:>10.0f} rows/s | speedup {baseline / sparse:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Synthetic review corpus generator for the benchmarks.
+
+The sample corpus (notebooks /data.csv) is too small to measure anything, and
+repeating it keeps the vocabulary at its 500 reviews. Generated reviews
+follow the sample instead of copying it :
+
+- lengths (whitespace tokens) from a log-normal fitted on the sample lengths
+- tokens drawn from the per-sentiment token frequencies of the sample, so
+  the labels stay learnable
+- a share of tokens replaced by made-up words from a Zipf distribution,
+  so the vocabulary keeps growing with the corpus size like real text
+
+Generation is seeded and streamed chunk by chunk, the same arguments always
+give the same file whatever its size.
+usage : python benchmarks/synthetic_corpus.py --rows 1000000 --out data/bench/corpus_1000000.csv
+"""
+import argparse
+import os
+import string
+import time
+
+import numpy as np
+import pandas as pd
+from src.data.artifact_io import open_writer
+
+SAMPLE_PATH = os.path.join("notebooks ", "data.csv")
+LABELS = ("negative", "positive")
+
+
+def fit_corpus_model(sample: pd.DataFrame) -> dict:
+    """length distribution, per-label token frequencies and label share of the sample"""
+    sample = sample[sample["sentiment"].isin(LABELS)]
+    tokens = sample["review"].astype(str).str.split()
+    lengths = np.log(tokens.str.len().clip(lower=1))
+    model = {
+        "length_mu": float(lengths.mean()),
+        "length_sigma": float(lengths.std()),
+        "max_length": int(tokens.str.len().max() * 3),
+        "positive_share": float((sample["sentiment"] == "positive").mean()),
+    }
+    for label in LABELS:
+        # every token occurrence : a uniform draw from it follows the token frequencies
+        model[label] = np.array([token for review in tokens[sample["sentiment"] == label] for token in review], dtype=object)
+    return model
+
+
+def _novel_word(word_id: int) -> str:
+    # base 26 spelling, at least 4 letters so it survives the normalizer filters
+    word_id += 26 ** 3
+    letters = []
+    while word_id:
+        word_id, rest = divmod(word_id, 26)
+        letters.append(string.ascii_lowercase[rest])
+    return "".join(reversed(letters))
+
+
+def generate_chunk(model: dict, rows: int, rng: np.random.Generator, novel_rate: float = 0.02,
+                   zipf_a: float = 1.3) -> pd.DataFrame:
+    positive = rng.random(rows) < model["positive_share"]
+    lengths = np.clip(np.rint(rng.lognormal(model["length_mu"], model["length_sigma"], rows)),
+                      1, model["max_length"]).astype(np.int64)
+    reviews = np.empty(rows, dtype=object)
+    for label, mask in (("negative", ~positive), ("positive", positive)):
+        rows_of_label = np.flatnonzero(mask)
+        if not len(rows_of_label):
+            continue
+        occurrences = model[label]
+        label_lengths = lengths[rows_of_label]
+        tokens = occurrences[rng.integers(0, len(occurrences), int(label_lengths.sum()))]
+        novel = np.flatnonzero(rng.random(len(tokens)) < novel_rate)
+        if len(novel):
+            ids = rng.zipf(zipf_a, len(novel))
+            words = {word_id: _novel_word(int(word_id)) for word_id in np.unique(ids)}
+            tokens[novel] = [words[word_id] for word_id in ids]
+        tokens = tokens.tolist()
+        ends = np.cumsum(label_lengths).tolist()
+        starts = [0] + ends[:-1]
+        reviews[rows_of_label] = [" ".join(tokens[start:end]) for start, end in zip(starts, ends)]
+    return pd.DataFrame({"review": reviews, "sentiment": np.where(positive, "positive", "negative")})
+
+
+def generate_corpus(out_path: str, rows: int, sample_path: str = SAMPLE_PATH, seed: int = 0,
+                    chunksize: int = 100000, novel_rate: float = 0.02) -> str:
+    """write `rows` synthetic reviews to out_path (csv / parquet / arrow from the extension)"""
+    model = fit_corpus_model(pd.read_csv(sample_path))
+    rng = np.random.default_rng(seed)
+    tmp_path = out_path + ".tmp" + os.path.splitext(out_path)[1]
+    with open_writer(tmp_path) as writer:
+        for start in range(0, rows, chunksize):
+            writer.write(generate_chunk(model, min(chunksize, rows - start), rng, novel_rate))
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def corpus_path(directory: str, rows: int, seed: int = 0, fmt: str = "csv") -> str:
+    return os.path.join(directory, f"corpus_{rows}_seed{seed}.{fmt}")
+
+
+def parse_size(value: str) -> int:
+    """10000, 10k, 1M ..."""
+    multipliers = {"k": 10 ** 3, "m": 10 ** 6}
+    value = value.strip().lower()
+    if value[-1:] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=parse_size, required=True, help="e.g. 10k, 1M")
+    parser.add_argument("--out", default=None, help="default data/bench/corpus_<rows>_seed<seed>.csv")
+    parser.add_argument("--data", default=SAMPLE_PATH, help="sample corpus the distributions are fitted on")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--novel-rate", type=float, default=0.02, help="share of made-up long tail words")
+    args = parser.parse_args()
+
+    out_path = args.out or corpus_path(os.path.join("data", "bench"), args.rows, args.seed)
+    start = time.perf_counter()
+    generate_corpus(out_path, args.rows, args.data, args.seed, novel_rate=args.novel_rate)
+    elapsed = time.perf_counter() - start
+    print(f"{args.rows} reviews written to {out_path} in {elapsed:.1f}s ({os.path.getsize(out_path) / 1024 ** 2:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Throughput benchmark : per-row preprocess_text vs bulk TextNormalizer.
+
+usage : python benchmarks/text_normalizer_benchmark.py --scale 20
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+from src.data.data_preprocessing import preprocess_text
+from src.data.nltk_resources import stopwords_set, wordnet_lemmatizer
+from src.data.text_normalizer import TextNormalizer
+
+SAMPLE_PATH = os.path.join("notebooks ", "data.csv")
+
+
+def run_per_row(texts: pd.Series) -> pd.Series:
+    """the old path: lemmatizer and stopwords built once, then preprocess_text applied row by row"""
+    lemmatizer = wordnet_lemmatizer()
+    stop_words = set(stopwords_set("english"))
+    return texts.apply(lambda text: preprocess_text(text, stop_words, lemmatizer))
+
+
+def run_bulk(texts: pd.Series) -> pd.Series:
+    return TextNormalizer().normalize_series(texts)
+
+
+def timed(func, texts: pd.Series, repeat: int):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(texts)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", default=SAMPLE_PATH)
+    parser.add_argument("--scale", type=int, default=20, help="repeat the sample corpus N times")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.data)["review"].astype(str)
+    texts = pd.concat([texts] * args.scale, ignore_index=True)
+
+    row_time, row_out = timed(run_per_row, texts, args.repeat)
+    bulk_time, bulk_out = timed(run_bulk, texts, args.repeat)
+
+    mismatches = int((row_out != bulk_out).sum())
+    print(f"rows            : {len(texts)}")
+    print(f"per-row apply   : {row_time:.3f}s  ({len(texts) / row_time:,.0f} rows/s)")
+    print(f"TextNormalizer  : {bulk_time:.3f}s  ({len(texts) / bulk_time:,.0f} rows/s)")
+    print(f"speedup         : {row_time / bulk_time:.2f}x")
+    print(f"mismatched rows : {mismatches}")
+    if mismatches:
+        raise SystemExit("TextNormalizer output differs from the per-row path")
+
+
+if __name__ == "__main__":
+    main()
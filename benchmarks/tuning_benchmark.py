@@ -0,0 +1,67 @@
+"""
+Wall-clock benchmark : notebook grid search loop vs successive halving tuner.
+
+baseline : GridSearchCV over the grid, then every grid point refit serially
+           on the full training set just to compute its metrics
+           (notebooks /bow_hp.py::train_and_log_model without MLflow)
+tuner    : src/model/hyperparameter_tuning.py (features built once, successive
+           halving, CV results reused, only the best model refit)
+usage : python benchmarks/tuning_benchmark.py --scale 10
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV, train_test_split
+from src.model.hyperparameter_tuning import build_features, run_search, holdout_metrics, cv_runs
+
+SAMPLE_PATH = os.path.join("notebooks ", "data.csv")
+PARAM_GRID = {"C": [0.1, 1, 10], "penalty": ["l1", "l2"], "solver": ["liblinear"]}
+
+
+def notebook_loop(X_train, X_test, y_train, y_test, workers: int) -> float:
+    grid_search = GridSearchCV(LogisticRegression(), PARAM_GRID, cv=5, scoring="f1", n_jobs=workers)
+    grid_search.fit(X_train, y_train)
+    # the notebook refits every grid point only to log its holdout metrics
+    for params in grid_search.cv_results_["params"]:
+        model = LogisticRegression(**params).fit(X_train, y_train)
+        holdout_metrics(model, X_test, y_test)
+    return grid_search.best_score_
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", default=SAMPLE_PATH)
+    parser.add_argument("--scale", type=int, default=10, help="repeat the sample corpus N times")
+    parser.add_argument("--workers", type=int, default=-1)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    df = df[df["sentiment"].isin(["positive", "negative"])]
+    df = pd.concat([df] * args.scale, ignore_index=True)
+    y = (df["sentiment"] == "positive").astype(int).values
+    train_texts, test_texts, y_train, y_test = train_test_split(df["review"].to_numpy(), y, test_size=0.2, random_state=42)
+
+    start = time.perf_counter()
+    X_train, X_test, _ = build_features(train_texts, test_texts, "tfidf")
+    baseline_score = notebook_loop(X_train, X_test, y_train, y_test, args.workers)
+    baseline_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    X_train, X_test, _ = build_features(train_texts, test_texts, "tfidf")
+    search = run_search(X_train, y_train, PARAM_GRID, workers=args.workers)
+    holdout_metrics(search.best_estimator_, X_test, y_test)
+    cv_runs(search)
+    tuner_time = time.perf_counter() - start
+
+    print(f"rows                : {len(df)}")
+    print(f"notebook loop       : {baseline_time:.2f}s (best cv f1 {baseline_score:.4f})")
+    print(f"successive halving  : {tuner_time:.2f}s (best cv f1 {search.best_score_:.4f}, "
+          f"{search.n_iterations_} rounds)")
+    print(f"speedup             : {baseline_time / tuner_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# online inference service : python flask_app/app.py
+import os
+import time
+
+import yaml
+from flask import Flask, jsonify, request
+from src.logger import logging
+from src.serving.predictor import Predictor, LatencyTracker
+from src.serving.batching import MicroBatcher
+
+
+def load_params(params_path : str) -> dict:
+    """load parameters from the yaml file """
+    try:
+        with open(params_path , 'r') as file:
+            params = yaml.safe_load(file)
+        logging.debug('Parameters retrieved from %s' ,params_path)
+        return params
+    except FileNotFoundError:
+        logging.error('file not found: %s',params_path)
+        raise 
+    except yaml.YAMLError as e:
+        logging.error("YAML ERROR : %s",e)
+        raise 
+
+
+def create_app(params_path : str = 'params.yaml') -> Flask:
+    """build the app, loading the model and vectorizer once at startup"""
+    params = load_params(params_path).get('serving', {})
+    window = params.get('latency_window', 10000)
+    predictor = Predictor(
+        model_path = params.get('model_path', 'models/model.pkl'),
+        vectorizer_path = params.get('vectorizer_path', 'models/vectorizer.pkl'),
+        lemma_cache_path = params.get('lemma_cache_path'),
+        lemma_cache_size = params.get('lemma_cache_size', 50000),
+        latency_window = window,
+        lean_model_dir = params.get('lean_model_dir'),
+        sparse_scorer = params.get('sparse_scorer', False)
+    )
+    request_latency = {'predict': LatencyTracker(window), 'predict_batch': LatencyTracker(window)}
+    max_batch = params.get('max_request_batch', 1000)
+
+    # single-review requests are coalesced into one transform + predict_proba
+    batcher = None
+    if params.get('micro_batching', True):
+        batcher = MicroBatcher(predictor.predict,
+                               max_batch_size = params.get('max_batch_size', 64),
+                               max_wait_ms = params.get('max_wait_ms', 2.0))
+
+    app = Flask(__name__)
+
+    @app.route('/health', methods = ['GET'])
+    def health():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/predict', methods = ['POST'])
+    def predict():
+        start = time.perf_counter()
+        payload = request.get_json(silent = True)
+        # a json list, string or number is as malformed as a missing key
+        review = payload.get('review') if isinstance(payload , dict) else None
+        if not isinstance(review , str):
+            return jsonify({'error': "expected a json body like {\"review\": \"...\"}"}), 400
+        result = batcher.predict(review) if batcher else predictor.predict([review])[0]
+        request_latency['predict'].record(time.perf_counter() - start)
+        return jsonify(result)
+
+    @app.route('/predict/batch', methods = ['POST'])
+    def predict_batch():
+        start = time.perf_counter()
+        payload = request.get_json(silent = True)
+        # a json list, string or number is as malformed as a missing key
+        reviews = payload.get('reviews') if isinstance(payload , dict) else None
+        if not isinstance(reviews , list) or not all(isinstance(review , str) for review in reviews):
+            return jsonify({'error': "expected a json body like {\"reviews\": [\"...\", ...]}"}), 400
+        if len(reviews) > max_batch:
+            return jsonify({'error': f'at most {max_batch} reviews per request'}), 413
+        results = predictor.predict(reviews) if reviews else []
+        request_latency['predict_batch'].record(time.perf_counter() - start)
+        return jsonify({'predictions': results})
+
+    @app.route('/metrics', methods = ['GET'])
+    def metrics():
+        summary = {f'request_{name}': tracker.summary() for name , tracker in request_latency.items()}
+        summary.update(predictor.metrics())
+        if batcher:
+            summary['micro_batching'] = batcher.stats()
+        return jsonify(summary)
+
+    return app
+
+
+if __name__ == '__main__':
+    app = create_app()
+    app.run(host = os.getenv('HOST', '0.0.0.0'), port = int(os.getenv('PORT', 5000)))
@@ -12,6 +12,7 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
+from src.data.lemma_cache import LemmaCache
 
 import warnings
 warnings.simplefilter("ignore", UserWarning)
@@ -26,16 +27,19 @@ mlflow.set_experiment(CONFIG["experiment_name"])
 # ==========================
 # Text Preprocessing Functions
 # ==========================
-def preprocess_text(text):
+# built once and shared by every preprocess_text call
+STOP_WORDS = set(stopwords.words("english"))
+LEMMA_CACHE = LemmaCache(WordNetLemmatizer(), max_size=50000)
+
+
+def preprocess_text(text, stop_words=STOP_WORDS, lemma_cache=LEMMA_CACHE):
     """Applies multiple text preprocessing steps."""
-    lemmatizer = WordNetLemmatizer()
-    stop_words = set(stopwords.words("english"))
 
     text = text.lower()  # Convert to lowercase
     text = re.sub(r'\d+', '', text)  # Remove numbers
     text = re.sub(f"[{re.escape(string.punctuation)}]", " ", text)  # Remove punctuation
     text = re.sub(r'https?://\S+|www\.\S+', '', text)  # Remove URLs
-    text = " ".join([lemmatizer.lemmatize(word) for word in text.split() if word not in stop_words])  # Lemmatization & stopwords removal
+    text = " ".join([lemma_cache.lemmatize(word) for word in text.split() if word not in stop_words])  # Lemmatization & stopwords removal
     
     return text.strip()
 
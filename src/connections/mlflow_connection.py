@@ -0,0 +1,335 @@
+import json
+import os
+import queue
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import requests
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.tracking import MlflowClient
+from src.logger import logging
+
+
+# log_batch request limits of the tracking server
+MAX_PARAMS = 100
+MAX_TAGS = 100
+MAX_ENTRIES = 1000
+# longest param value the tracking server accepts
+MAX_PARAM_LENGTH = 6000
+
+_STOP = object()
+
+
+def _client(tracking_uri : str = None) -> MlflowClient:
+    if tracking_uri and tracking_uri.startswith('file:'):
+        # recent MLflow versions refuse the file store unless it is opted in explicitly
+        os.environ.setdefault('MLFLOW_ALLOW_FILE_STORE' , 'true')
+    return MlflowClient(tracking_uri)
+
+
+def _is_connection_error(error : Exception) -> bool:
+    """True when the server was not reached at all (MLflow wraps the requests error it got)"""
+    while error is not None:
+        if isinstance(error , (requests.exceptions.ConnectionError , requests.exceptions.Timeout ,
+                               ConnectionError , TimeoutError)):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class AsyncMlflowLogger:
+    """
+    Non-blocking MLflow client for the pipeline stages.
+
+    Params, metrics and tags are queued and a background thread sends them
+    with log_batch (one request for up to 1000 values instead of one per
+    value). Artifacts and end_run go through the same ordered queue. Failed
+    requests are retried with exponential backoff; what still fails is
+    written to a JSON lines spool file that replay_spool can resend.
+
+    Creating the run (and its experiment) is the only blocking call, since the
+    caller needs the run id. When the tracking server cannot be reached
+    there, the logger switches to the local fallback_uri store so the
+    pipeline also runs offline. Before the first blocking call an http(s)
+    server is probed with a plain GET (connect_retries / connect_timeout,
+    the MLflow client retries for minutes), so the switch is quick. Only
+    connection errors and timeouts switch, an error answered by the server
+    (bad request, permissions ...) is raised.
+
+    Usage :
+        with AsyncMlflowLogger() as tracker:
+            run_id = tracker.start_run('my experiment')
+            tracker.log_params(run_id , clf.get_params())
+            tracker.log_metrics(run_id , metrics)
+            tracker.end_run(run_id)
+        tracker.timing()
+    """
+
+    def __init__(self , tracking_uri : str = None , fallback_uri : str = 'file:./mlruns' ,
+                 spool_dir : str = 'reports/mlflow_spool' , max_attempts : int = 5 , backoff_base : float = 0.5 ,
+                 connect_retries : int = 1 , connect_timeout : float = 5):
+        self.client = _client(tracking_uri)
+        self.fallback_uri = fallback_uri
+        self.connect_retries = connect_retries
+        self.connect_timeout = connect_timeout
+        self._connected = False
+        self.spool_dir = spool_dir
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.offline = False
+        self._experiments = {}
+        self.batches = 0
+        self.failed = 0
+        self.blocking_time = 0.0
+        self.background_time = 0.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target = self._run , name = 'mlflow-logger' , daemon = True)
+        self._thread.start()
+
+    # --- blocking calls (need an answer from the server) ---
+
+    def _with_retries(self , fn , *args , **kwargs):
+        for attempt in range(1 , self.max_attempts + 1):
+            try:
+                return fn(*args , **kwargs)
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    raise
+                delay = random.uniform(0 , self.backoff_base * 2 ** (attempt - 1))
+                logging.warning('MLflow request failed (%s), retry %d/%d in %.2fs', e, attempt, self.max_attempts - 1, delay)
+                time.sleep(delay)
+
+    def _probe(self) -> None:
+        """raise a connection error when the tracking server does not answer"""
+        uri = str(self.client.tracking_uri)
+        if not uri.startswith(('http://' , 'https://')):
+            return
+        for attempt in range(self.connect_retries + 1):
+            try:
+                # any answer, even an error status, means the server is reachable
+                requests.get(uri.rstrip('/') + '/health' , timeout = self.connect_timeout)
+                return
+            except (requests.exceptions.ConnectionError , requests.exceptions.Timeout):
+                if attempt == self.connect_retries:
+                    raise
+
+    def _go_offline(self , error : Exception) -> None:
+        logging.warning('MLflow tracking server unreachable (%s), logging to %s instead', error, self.fallback_uri)
+        self.offline = True
+        self.client = _client(self.fallback_uri)
+        self._experiments.clear()
+
+    def _blocking(self , fn , *args):
+        # no extra retries here, failing over quickly matters more
+        start = time.perf_counter()
+        try:
+            can_fail_over = not self.offline and bool(self.fallback_uri)
+            if can_fail_over and not self._connected:
+                try:
+                    self._probe()
+                except Exception as e:
+                    self._go_offline(e)
+                    return fn(*args)
+            try:
+                result = fn(*args)
+            except Exception as e:
+                if not (can_fail_over and _is_connection_error(e)):
+                    raise
+                self._go_offline(e)
+                return fn(*args)
+            self._connected = True
+            return result
+        finally:
+            self.blocking_time += time.perf_counter() - start
+
+    def _create_run(self , experiment_name : str , run_name : str , parent_run_id : str , tags : dict) -> str:
+        if experiment_name not in self._experiments:
+            experiment = self.client.get_experiment_by_name(experiment_name)
+            self._experiments[experiment_name] = (experiment.experiment_id if experiment
+                                                  else self.client.create_experiment(experiment_name))
+        tags = dict(tags or {})
+        if parent_run_id:
+            tags['mlflow.parentRunId'] = parent_run_id
+        return self.client.create_run(self._experiments[experiment_name] , tags = tags , run_name = run_name).info.run_id
+
+    def start_run(self , experiment_name : str , run_name : str = None , parent_run_id : str = None , tags : dict = None) -> str:
+        """create a run in experiment_name (created if needed), nested under parent_run_id if given, and return its id"""
+        return self._blocking(self._create_run , experiment_name , run_name , parent_run_id , tags)
+
+    # --- queued calls ---
+
+    def _put(self , item) -> None:
+        start = time.perf_counter()
+        self._queue.put(item)
+        self.blocking_time += time.perf_counter() - start
+
+    def log_params(self , run_id : str , params : dict) -> None:
+        self._put(('batch' , run_id , [] , [Param(key , str(value)[:MAX_PARAM_LENGTH]) for key , value in params.items()] , []))
+
+    def log_metrics(self , run_id : str , metrics : dict , step : int = 0) -> None:
+        timestamp = int(time.time() * 1000)
+        self._put(('batch' , run_id , [Metric(key , float(value) , timestamp , step) for key , value in metrics.items()] , [] , []))
+
+    def set_tags(self , run_id : str , tags : dict) -> None:
+        self._put(('batch' , run_id , [] , [] , [RunTag(key , str(value)) for key , value in tags.items()]))
+
+    def log_artifact(self , run_id : str , local_path : str , artifact_path : str = None) -> None:
+        self._put(('call' , run_id , 'log_artifact' , (run_id , local_path , artifact_path)))
+
+    def log_artifacts(self , run_id : str , local_dir : str , artifact_path : str = None) -> None:
+        self._put(('call' , run_id , 'log_artifacts' , (run_id , local_dir , artifact_path)))
+
+    def log_sklearn_model(self , run_id : str , model , artifact_path : str = 'model') -> None:
+        """
+        save the model in the MLflow format and upload it, both in the background
+        (the model must not be modified afterwards). It is then loadable as
+        runs:/<run_id>/<artifact_path>
+        """
+        self._put(('model' , run_id , model , artifact_path))
+
+    def end_run(self , run_id : str , status : str = 'FINISHED') -> None:
+        """terminate the run once everything queued before is sent"""
+        self._put(('call' , run_id , 'set_terminated' , (run_id , status)))
+
+    # --- background thread ---
+
+    def _send_batch(self , run_id : str , metrics : list , params : list , tags : list) -> None:
+        while metrics or params or tags:
+            batch_params , params = params[:MAX_PARAMS] , params[MAX_PARAMS:]
+            batch_tags , tags = tags[:MAX_TAGS] , tags[MAX_TAGS:]
+            room = MAX_ENTRIES - len(batch_params) - len(batch_tags)
+            batch_metrics , metrics = metrics[:room] , metrics[room:]
+            try:
+                self._with_retries(self.client.log_batch , run_id , metrics = batch_metrics ,
+                                   params = batch_params , tags = batch_tags)
+                self.batches += 1
+            except Exception as e:
+                self._spool(run_id , {'metrics': [dict(key = m.key , value = m.value , timestamp = m.timestamp , step = m.step) for m in batch_metrics],
+                                      'params': {p.key: p.value for p in batch_params},
+                                      'tags': {t.key: t.value for t in batch_tags}} , e)
+
+    def _call(self , run_id : str , method : str , args : tuple) -> bool:
+        try:
+            self._with_retries(getattr(self.client , method) , *args)
+            return True
+        except Exception as e:
+            self._spool(run_id , {'call': method , 'args': list(args)} , e)
+            return False
+
+    def _log_model(self , run_id : str , model , artifact_path : str) -> None:
+        import mlflow.sklearn
+        temp_root = tempfile.mkdtemp(prefix = 'mlflow-model-')
+        local_dir = os.path.join(temp_root , artifact_path)
+        try:
+            # cloudpickle is mlflow.sklearn's own default format (made explicit)
+            mlflow.sklearn.save_model(model , local_dir , serialization_format = 'cloudpickle')
+        except Exception as e:
+            logging.error('Could not save the model for run %s: %s', run_id, e)
+            self.failed += 1
+            shutil.rmtree(temp_root , ignore_errors = True)
+            return
+        # only the temporary directory created here is removed, and only once uploaded
+        # (otherwise the files are kept so the spool entry can be replayed)
+        if self._call(run_id , 'log_artifacts' , (run_id , local_dir , artifact_path)):
+            shutil.rmtree(temp_root , ignore_errors = True)
+
+    def _spool(self , run_id : str , record : dict , error : Exception) -> None:
+        self.failed += 1
+        os.makedirs(self.spool_dir , exist_ok = True)
+        path = os.path.join(self.spool_dir , f'{run_id}.jsonl')
+        with open(path , 'a') as file:
+            file.write(json.dumps(record) + '\n')
+        logging.error('MLflow logging failed for run %s (%s), spooled to %s', run_id, error, path)
+
+    def _flush_pending(self , pending : dict) -> None:
+        for run_id , (metrics , params , tags) in pending.items():
+            self._send_batch(run_id , metrics , params , tags)
+        pending.clear()
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            # everything queued meanwhile goes out with this round
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            start = time.perf_counter()
+            pending = {}
+            stop = False
+            for item in items:
+                if item is _STOP:
+                    stop = True
+                elif item[0] == 'batch':
+                    _ , run_id , metrics , params , tags = item
+                    buffered = pending.setdefault(run_id , ([] , [] , []))
+                    buffered[0].extend(metrics)
+                    buffered[1].extend(params)
+                    buffered[2].extend(tags)
+                else:
+                    # keep the order : values queued before an artifact / end_run are sent first
+                    self._flush_pending(pending)
+                    if item[0] == 'model':
+                        self._log_model(*item[1:])
+                    else:
+                        self._call(*item[1:])
+            self._flush_pending(pending)
+            self.background_time += time.perf_counter() - start
+            for _ in items:
+                self._queue.task_done()
+            if stop:
+                return
+
+    # --- lifecycle ---
+
+    def flush(self) -> None:
+        """wait until everything queued so far is sent (or spooled)"""
+        start = time.perf_counter()
+        self._queue.join()
+        self.blocking_time += time.perf_counter() - start
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            start = time.perf_counter()
+            self._queue.put(_STOP)
+            self._thread.join()
+            self.blocking_time += time.perf_counter() - start
+
+    def timing(self) -> dict:
+        return {
+            'blocking_s': round(self.blocking_time , 4),
+            'background_s': round(self.background_time , 4),
+            'batches': self.batches,
+            'failed': self.failed,
+            'offline': self.offline
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self , exc_type , exc_value , traceback):
+        self.close()
+
+
+def replay_spool(spool_path : str , tracking_uri : str = None) -> int:
+    """resend the requests of a spool file written by AsyncMlflowLogger, returns the number replayed"""
+    client = _client(tracking_uri)
+    run_id = os.path.splitext(os.path.basename(spool_path))[0]
+    replayed = 0
+    with open(spool_path) as file:
+        for line in file:
+            record = json.loads(line)
+            if 'call' in record:
+                getattr(client , record['call'])(*record['args'])
+            else:
+                client.log_batch(run_id ,
+                                 metrics = [Metric(**metric) for metric in record['metrics']],
+                                 params = [Param(key , value) for key , value in record['params'].items()],
+                                 tags = [RunTag(key , value) for key , value in record['tags'].items()])
+            replayed += 1
+    logging.info('Replayed %d spooled MLflow requests from %s', replayed, spool_path)
+    return replayed
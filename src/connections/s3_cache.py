@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+from src.logger import logging
+from src.data.artifact_io import iter_csv_chunks, iter_frames, FORMATS
+from src.profiler import profiled
+
+
+class S3ReadThroughCache:
+    """
+    On-disk read-through cache in front of an s3_operations client.
+
+    Objects are stored under cache_dir keyed by bucket/key and remembered
+    with their ETag. A cached object is revalidated with a conditional GET
+    (If-None-Match) : an unchanged object answers 304 and nothing is
+    transferred, a changed one is streamed to disk and replaces the entry.
+    Total size is capped by max_bytes, least recently used entries are
+    evicted first.
+    """
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, s3, cache_dir : str = 'data/cache/s3', max_bytes : int = 10 * 1024 ** 3):
+        self.s3 = s3
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.bytes_downloaded = 0
+        self._lock = threading.Lock()
+        self._pinned = set()
+        os.makedirs(cache_dir , exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self) -> dict:
+        path = os.path.join(self.cache_dir , self.INDEX_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path , 'r') as file:
+                index = json.load(file)
+        except (OSError , ValueError) as e:
+            logging.warning('s3 cache index %s is unreadable, starting empty : %s', path, e)
+            return {}
+        # drop entries whose file was removed behind our back
+        return {name: entry for name , entry in index.items() if os.path.exists(os.path.join(self.cache_dir , name))}
+
+    def save(self) -> None:
+        """write the index atomically"""
+        path = os.path.join(self.cache_dir , self.INDEX_FILE)
+        with self._lock:
+            snapshot = dict(self._index)
+        with open(path + '.tmp' , 'w') as file:
+            json.dump(snapshot , file)
+        os.replace(path + '.tmp' , path)
+
+    def _entry_name(self, file_key : str) -> str:
+        digest = hashlib.sha256(f'{self.s3.bucket_name}/{file_key}'.encode()).hexdigest()[:32]
+        # keep the extension so the readers can infer the format
+        extension = os.path.splitext(file_key)[1]
+        return digest + (extension if extension.lstrip('.') in FORMATS + ('gz',) else '')
+
+    def _download(self, file_key : str , name : str , etag : str = None):
+        """conditional GET, returns the new ETag or None when the cached copy is still valid"""
+        kwargs = {'Bucket': self.s3.bucket_name , 'Key': file_key}
+        if etag is not None:
+            kwargs['IfNoneMatch'] = etag
+        path = os.path.join(self.cache_dir , name)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            obj = self.s3.s3_client.get_object(**kwargs)
+        except ClientError as e:
+            if etag is not None and e.response.get('Error', {}).get('Code') in ('304' , 'NotModified'):
+                return None
+            raise
+        # stream the body to disk, the object is never held in memory
+        try:
+            with open(tmp_path , 'wb') as file:
+                for block in obj['Body'].iter_chunks(1024 ** 2):
+                    file.write(block)
+            os.replace(tmp_path , path)
+        except BaseException:
+            # a broken transfer must not leave a partial file behind
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return obj['ETag']
+
+    def _fetch(self, file_key : str) -> str:
+        name = self._entry_name(file_key)
+        with self._lock:
+            entry = self._index.get(name)
+        etag = self.s3._with_retries(self._download , file_key , name , entry['etag'] if entry else None)
+        with self._lock:
+            if etag is None:
+                self.hits += 1
+                self.bytes_saved += entry['size']
+                logging.info(f'S3 cache hit for {file_key} ({entry["size"]} bytes not downloaded)')
+            else:
+                size = os.path.getsize(os.path.join(self.cache_dir , name))
+                self.misses += 1
+                self.bytes_downloaded += size
+                logging.info(f'S3 cache miss for {file_key}, downloaded {size} bytes')
+                entry = {'bucket': self.s3.bucket_name , 'key': file_key , 'etag': etag , 'size': size}
+            entry['last_access'] = time.time()
+            self._index[name] = entry
+        return os.path.join(self.cache_dir , name)
+
+    def evict(self) -> None:
+        """remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            total = sum(entry['size'] for entry in self._index.values())
+            for name , entry in sorted(self._index.items() , key=lambda item: item[1]['last_access']):
+                if total <= self.max_bytes:
+                    break
+                if name in self._pinned:
+                    continue
+                try:
+                    os.remove(os.path.join(self.cache_dir , name))
+                except FileNotFoundError:
+                    pass
+                total -= entry['size']
+                del self._index[name]
+                logging.info(f'S3 cache evicted {entry["key"]} ({entry["size"]} bytes)')
+
+    @profiled('s3_cache_fetch')
+    def fetch(self, file_key : str) -> str:
+        """
+        local path of an up to date copy of file_key
+        params file_key : S3 file path
+        returns : path inside cache_dir"""
+        try:
+            name = self._entry_name(file_key)
+            with self._lock:
+                self._pinned.add(name)
+            try:
+                path = self._fetch(file_key)
+                self.evict()
+            finally:
+                with self._lock:
+                    self._pinned.discard(name)
+            self.save()
+            return path
+        except Exception as e:
+            logging.error('could not fetch %s through the s3 cache : %s', file_key, e)
+            raise
+
+    @staticmethod
+    def _iter_local(path : str , chunksize : int):
+        if path.endswith('.gz'):
+            yield from iter_csv_chunks(path , chunksize , compression = 'gzip')
+        elif os.path.splitext(path)[1].lstrip('.') in ('parquet' , 'arrow'):
+            # parquet / arrow files are memory-mapped by the artifact readers
+            yield from iter_frames(path , chunksize)
+        else:
+            yield from iter_csv_chunks(path , chunksize , memory_map = True)
+
+    def iter_file_chunks(self, file_key : str , chunksize : int):
+        """same as s3_operations.iter_file_chunks, read from the local copy"""
+        yield from self._iter_local(self.fetch(file_key) , chunksize)
+
+    def iter_prefix_chunks(self, prefix : str , chunksize : int , suffix : str = '.csv' , workers : int = 8):
+        """
+        same as s3_operations.iter_prefix_chunks : shards are revalidated /
+        downloaded into the cache at most `workers` ahead of the one being
+        parsed, then parsed from disk in key order. A shard stays pinned from
+        its download until it is parsed, so max_bytes is enforced during the run
+        """
+        objects = self.s3.list_objects(prefix , suffix)
+        if not objects:
+            raise FileNotFoundError(f'no objects matching s3://{self.s3.bucket_name}/{prefix}*{suffix}')
+        pinned = set()
+        try:
+            with ThreadPoolExecutor(max_workers = workers , thread_name_prefix = 's3-cache') as executor:
+                pending = deque()
+                remaining = iter(objects)
+
+                def schedule():
+                    obj = next(remaining , None)
+                    if obj is not None:
+                        file_key , _ = obj
+                        name = self._entry_name(file_key)
+                        with self._lock:
+                            self._pinned.add(name)
+                        pinned.add(name)
+                        pending.append((file_key , name , executor.submit(self._fetch , file_key)))
+
+                for _ in range(workers):
+                    schedule()
+                while pending:
+                    file_key , name , future = pending.popleft()
+                    try:
+                        path = future.result()
+                    except Exception as e:
+                        logging.error('could not fetch %s through the s3 cache : %s', file_key, e)
+                        for _ , _ , other in pending:
+                            other.cancel()
+                        raise
+                    # the shards parsed so far are unpinned, make room for this one
+                    self.evict()
+                    schedule()
+                    yield from self._iter_local(path , chunksize)
+                    with self._lock:
+                        self._pinned.discard(name)
+                    pinned.discard(name)
+        finally:
+            with self._lock:
+                self._pinned.difference_update(pinned)
+            self.evict()
+            self.save()
+            logging.info('S3 cache stats : %s', self.stats())
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes_saved': self.bytes_saved,
+            'bytes_downloaded': self.bytes_downloaded
+        }
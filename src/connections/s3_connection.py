@@ -1,22 +1,118 @@
+import io
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import boto3 
 import pandas as pd 
 import logging 
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
 from src.logger import logging 
-from io import StringIO
+from src.data.artifact_io import iter_csv_chunks
+from src.profiler import profiled, profile_section
+
+
+# S3 error codes worth retrying (throttling and server side failures)
+RETRYABLE_CODES = {'SlowDown', 'Throttling', 'ThrottlingException', 'RequestTimeout', 'RequestTimeTooSkewed',
+                   'InternalError', 'ServiceUnavailable', '500', '502', '503', '504'}
+
+
+def _is_retryable(error : Exception) -> bool:
+    if isinstance(error , ClientError):
+        return error.response.get('Error', {}).get('Code') in RETRYABLE_CODES
+    # connection resets, read timeouts, truncated bodies ...
+    return isinstance(error , BotoCoreError)
+
+
+class RangedObjectStream(io.RawIOBase):
+    """
+    read-only file object over one S3 object, downloaded in part_size byte
+    ranges on executor. The ranges are handed out in order and at most
+    `window` of them are in flight or buffered, so memory stays bounded by
+    window x part_size whatever the object size.
+    """
+
+    def __init__(self, s3, file_key, size, part_size, executor, window):
+        super().__init__()
+        self._s3 = s3
+        self._file_key = file_key
+        self._executor = executor
+        self._window = max(window , 1)
+        self._ranges = iter([(start , min(start + part_size , size) - 1) for start in range(0 , size , part_size)])
+        self._parts = deque()
+        self._buffer = memoryview(b'')
+        self.bytes_read = 0
+        self._schedule()
+
+    def _schedule(self):
+        while len(self._parts) < self._window:
+            byte_range = next(self._ranges , None)
+            if byte_range is None:
+                return
+            self._parts.append(self._executor.submit(self._s3._with_retries , self._s3._get_range ,
+                                                     self._file_key , *byte_range))
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._buffer:
+            if not self._parts:
+                return 0
+            self._buffer = memoryview(self._parts.popleft().result())
+            self._schedule()
+        size = min(len(buffer) , len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        self.bytes_read += size
+        return size
+
+    def close(self):
+        for part in self._parts:
+            part.cancel()
+        self._parts.clear()
+        self._buffer = memoryview(b'')
+        super().close()
+
 
 class s3_operations:
-    def __init__(self,bucket_name ,aws_secret_key ,aws_access_key  , region_name = 'us-east-1'):
-        """initialize the s3 operations class with the AWS credentials and s3 bucket details"""
+    def __init__(self,bucket_name ,aws_secret_key ,aws_access_key  , region_name = 'us-east-1' ,
+                 endpoint_url = None , max_pool_connections = 50 , max_attempts = 5 , backoff_base = 0.2):
+        """initialize the s3 operations class with the AWS credentials and s3 bucket details
+        params endpoint_url : custom S3 endpoint (minio, moto server ...), None for AWS
+        params max_pool_connections : size of the shared HTTP connection pool
+        params max_attempts : attempts per request, retried with exponential backoff"""
 
         self.bucket_name = bucket_name
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
         self.s3_client= boto3.client(
             's3',
-            aws_access_key = aws_access_key ,
-            aws_secret_key =aws_secret_key,
-            region_name = region_name
+            aws_access_key_id = aws_access_key ,
+            aws_secret_access_key = aws_secret_key,
+            region_name = region_name,
+            endpoint_url = endpoint_url,
+            # one pooled client is shared by all download threads (boto3 clients are thread safe).
+            # retries are done by _with_retries so a body that fails mid-read is retried too
+            config = Config(max_pool_connections = max_pool_connections , retries = {'total_max_attempts': 1})
         )
         logging.info('s3 client created ')
 
+    def _with_retries(self, fn, *args):
+        """call fn(*args), retrying transient errors with exponential backoff and full jitter"""
+        for attempt in range(1 , self.max_attempts + 1):
+            try:
+                return fn(*args)
+            except Exception as e:
+                if attempt == self.max_attempts or not _is_retryable(e):
+                    raise
+                delay = random.uniform(0 , self.backoff_base * 2 ** (attempt - 1))
+                logging.warning('s3 request failed (%s), retry %d/%d in %.2fs', e, attempt, self.max_attempts - 1, delay)
+                time.sleep(delay)
+
+    @profiled('s3_fetch_file')
     def fetch_file_from_s3(self,file_key):
         """
         fetches a CSV file from s3 bucket and return it in form a Pandas Dataframe
@@ -24,14 +120,172 @@ class s3_operations:
         returns : pandas Dataframe"""
         try:
             logging.info(f'Fetching the {file_key} from s3 bucket : {self.bucket_name}')
-            obj = self.s3_client.get_object(Bucket = self.bucket_name , key = file_key)
-            df = pd.read_csv(StringIO(obj['Body'].read().decode('utf-8')))
+            # the client does not retry (see __init__) : the request and the parse of the
+            # body go through _with_retries, so a body that fails mid-read is retried as well
+            df = self._with_retries(self._read_csv , file_key)
             logging.info(f'Fetched the file {file_key} from the s3 bucket {len(df)}record')
             return df
         except Exception as e:
             logging.error('could not fetch the file from s3 : %s',e)
             return None
 
+    def _read_csv(self, file_key):
+        obj = self.s3_client.get_object(Bucket = self.bucket_name , Key = file_key)
+        # parse straight from the streaming body, no bytes / str copies
+        return pd.read_csv(obj['Body'])
+
+    def iter_file_chunks(self, file_key, chunksize):
+        """
+        Stream a CSV file from the s3 bucket as DataFrame chunks.
+        Only one chunk (plus the read buffer) is held in memory at a time.
+        params file_key : S3 file path 
+        params chunksize : rows per chunk
+        returns : iterator of pandas Dataframe"""
+        try:
+            logging.info(f'Streaming the {file_key} from s3 bucket : {self.bucket_name}')
+            # only opening the object is retried, a body that fails mid-stream cannot be resumed
+            obj = self._with_retries(lambda: self.s3_client.get_object(Bucket = self.bucket_name , Key = file_key))
+        except Exception as e:
+            logging.error('could not open the file on s3 : %s',e)
+            raise
+        body = obj['Body']
+        try:
+            yield from iter_csv_chunks(body , chunksize)
+        finally:
+            body.close()
+
+    def list_objects(self, prefix, suffix = ''):
+        """
+        list the objects under a prefix (all pages)
+        params prefix : key prefix, e.g. 'reviews/2024-01-'
+        params suffix : only keep keys ending with it, e.g. '.csv'
+        returns : list of (key, size) sorted by key"""
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        objects = []
+        for page in paginator.paginate(Bucket = self.bucket_name , Prefix = prefix):
+            objects.extend((obj['Key'] , obj['Size']) for obj in page.get('Contents', [])
+                           if obj['Key'].endswith(suffix))
+        logging.info(f'Listed {len(objects)} objects under s3://{self.bucket_name}/{prefix}')
+        return sorted(objects)
+
+    def _get_range(self, file_key, start, end):
+        # the read is inside the retried call, a connection dropped mid-body is retried as well
+        kwargs = {'Bucket': self.bucket_name , 'Key': file_key}
+        if start is not None:
+            kwargs['Range'] = f'bytes={start}-{end}'
+        return self.s3_client.get_object(**kwargs)['Body'].read()
+
+    def open_object_stream(self, file_key, size, executor, part_size = 8 * 1024 ** 2, window = 8):
+        """
+        file object streaming one object in ordered ranged reads (RangedObjectStream)
+        params size : object size, None to look it up with a head_object
+        params executor : pool the ranged reads run on
+        params window : ranges in flight / buffered at a time
+        returns : io.BufferedReader"""
+        if size is None:
+            size = self._with_retries(lambda: self.s3_client.head_object(Bucket = self.bucket_name , Key = file_key)['ContentLength'])
+        return io.BufferedReader(RangedObjectStream(self , file_key , size , part_size , executor , window) ,
+                                 buffer_size = 1024 ** 2)
+
+    def fetch_object_bytes(self, file_key, size = None, part_size = 8 * 1024 ** 2,
+                           range_threshold = 64 * 1024 ** 2, executor = None, window = 8):
+        """
+        download one object into memory
+        objects larger than range_threshold are split in part_size byte ranges
+        fetched concurrently on executor (at most `window` at a time), each one
+        copied into place as it arrives
+        params size : object size if already known (saves a head_object)
+        returns : bytes (a bytearray for ranged reads)"""
+        with profile_section('s3_fetch_object') as record:
+            if executor is not None and size is None:
+                size = self._with_retries(lambda: self.s3_client.head_object(Bucket = self.bucket_name , Key = file_key)['ContentLength'])
+            if executor is None or size <= range_threshold:
+                data = self._with_retries(self._get_range , file_key , None , None)
+            else:
+                logging.debug(f'Fetching {file_key} in {-(-size // part_size)} ranged reads')
+                data = bytearray(size)
+                with self.open_object_stream(file_key , size , executor , part_size , window) as stream:
+                    view , done = memoryview(data) , 0
+                    while done < size:
+                        read = stream.readinto(view[done:])
+                        if not read:
+                            raise EOFError(f'{file_key} ended after {done} of {size} bytes')
+                        done += read
+            # downloads run concurrently, the process wide io counters would mix them up
+            record['bytes_read'] = len(data)
+            return data
+
+    def iter_prefix_chunks(self, prefix, chunksize, suffix = '.csv', workers = 8,
+                           part_size = 8 * 1024 ** 2, range_threshold = 64 * 1024 ** 2,
+                           max_prefetch_bytes = 256 * 1024 ** 2):
+        """
+        Stream every CSV shard under a prefix as DataFrame chunks.
+        Shards up to range_threshold are downloaded whole and concurrently, ahead
+        of the one being parsed while they fit in max_prefetch_bytes (the shard
+        being parsed included). Larger shards are never held whole : their
+        ranges are fetched in order, `workers` at a time, straight into the
+        parser. Memory is bounded by max_prefetch_bytes + workers x part_size
+        whatever the number and size of the files. Chunks come out in key
+        order, so the ingestion split does not depend on which download
+        finished first.
+        params prefix : key prefix of the shards
+        params chunksize : rows per chunk
+        returns : iterator of pandas Dataframe"""
+        objects = self.list_objects(prefix , suffix)
+        if not objects:
+            raise FileNotFoundError(f'no objects matching s3://{self.bucket_name}/{prefix}*{suffix}')
+        # separate pools : object downloads wait on their ranged parts, which must not queue behind them
+        with ThreadPoolExecutor(max_workers = workers , thread_name_prefix = 's3-object') as object_pool , \
+                ThreadPoolExecutor(max_workers = workers , thread_name_prefix = 's3-range') as range_pool:
+            # (key, size, future) in key order, future is None for the shards streamed in ranges
+            pending = deque()
+            # bytes of the downloaded shards not parsed yet, index of the next shard to schedule
+            held , scheduled = 0 , 0
+
+            def schedule():
+                nonlocal held , scheduled
+                while scheduled < len(objects):
+                    file_key , size = objects[scheduled]
+                    if size > range_threshold:
+                        # streamed when it is reached, nothing is prefetched past it until then
+                        if pending and pending[-1][2] is None:
+                            return
+                        pending.append((file_key , size , None))
+                    else:
+                        # one shard is always allowed, even above the budget
+                        if held and held + size > max_prefetch_bytes:
+                            return
+                        held += size
+                        pending.append((file_key , size , object_pool.submit(self.fetch_object_bytes , file_key , size)))
+                    scheduled += 1
+
+            def compression(file_key):
+                return 'gzip' if file_key.endswith('.gz') else None
+
+            schedule()
+            while pending:
+                file_key , size , future = pending.popleft()
+                if future is None:
+                    schedule()
+                    logging.debug(f'Streaming {file_key} ({size} bytes) in ranged reads')
+                    with self.open_object_stream(file_key , size , range_pool , part_size , workers) as stream:
+                        yield from iter_csv_chunks(stream , chunksize , compression = compression(file_key))
+                    continue
+                try:
+                    data = future.result()
+                except Exception as e:
+                    logging.error('could not fetch %s from s3 : %s', file_key, e)
+                    for _ , _ , other in pending:
+                        if other is not None:
+                            other.cancel()
+                    raise
+                schedule()
+                logging.debug(f'Parsing {file_key} ({len(data)} bytes)')
+                yield from iter_csv_chunks(io.BytesIO(data) , chunksize , compression = compression(file_key))
+                del data
+                held -= size
+                schedule()
+
 # expmple usage 
 if __name__ == "__main__":
     BUCKET_NAME = "bucket_name" 
@@ -39,9 +293,9 @@ if __name__ == "__main__":
     AWS_SECRET_KEY = "aws_secret_key"
     FILE_KEY = "data.csv"
 
-    data_ingestion = s3_operations(BUCKET_NAME , AWS_ACCESSS_KEY,AWS_SECRET_KEY , FILE_KEY)
+    data_ingestion = s3_operations(BUCKET_NAME , AWS_SECRET_KEY , AWS_ACCESSS_KEY)
     df = data_ingestion.fetch_file_from_s3(FILE_KEY)
 
-    if df not in None:
+    if df is not None:
         print(f'Fetched the file form the s3 {len(df)}')
 
@@ -1 +1,178 @@
-# fro getting the data from the sequal server managment studio
\ No newline at end of file
+# fro getting the data from the sequal server managment studio
+import queue
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+from src.logger import logging
+
+
+def _pyodbc_connect(connection_string):
+    # pyodbc is only needed when the data really comes from SQL Server
+    import pyodbc
+    return pyodbc.connect(connection_string , autocommit = False)
+
+
+def _to_python(value):
+    # numpy scalars -> python scalars
+    return value.item() if hasattr(value , 'item') else value
+
+
+def _quote(name):
+    """[bracket] quoting, understood by SQL Server and SQLite"""
+    return '[' + name.replace(']' , ']]') + ']'
+
+
+class ssms_operations:
+    def __init__(self, connection_string = None, pool_size = 4, connect = None):
+        """initialize the SQL Server operations class
+        params connection_string : ODBC connection string, passed to connect
+        params pool_size : connections kept open and reused between queries
+        params connect : DB-API connect callable, defaults to pyodbc.connect
+                         (e.g. lambda _: sqlite3.connect(path) for local runs)"""
+
+        self.connection_string = connection_string
+        self.pool_size = pool_size
+        self._connect = connect or _pyodbc_connect
+        self._pool = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        logging.info('ssms operations created (pool size %d)', pool_size)
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = self._opened < self.pool_size
+            if can_open:
+                self._opened += 1
+        if not can_open:
+            # every pooled connection is busy, wait for one to come back
+            return self._pool.get()
+        try:
+            return self._connect(self.connection_string)
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def _discard(self, conn):
+        with self._lock:
+            self._opened -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _release(self, conn):
+        # with autocommit off even a read leaves a transaction open (and its locks held),
+        # end it before the connection is reused. Work to keep must be committed by the caller
+        try:
+            conn.rollback()
+        except Exception as e:
+            logging.warning('could not reset the connection, discarding it : %s', e)
+            self._discard(conn)
+            return
+        self._pool.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        borrow a pooled connection, a connection that raised is closed instead of reused.
+        Uncommitted work is rolled back when the connection is given back.
+        """
+        conn = self._acquire()
+        healthy = False
+        try:
+            yield conn
+            healthy = True
+        finally:
+            # also covers a reader abandoned mid-result (GeneratorExit)
+            if healthy:
+                self._release(conn)
+            else:
+                self._discard(conn)
+
+    def iter_query_chunks(self, query, chunksize, params = None):
+        """
+        Stream the result of a query as DataFrame chunks.
+        Rows are pulled with fetchmany, so only one chunk is held in memory
+        (pyodbc's default forward-only cursor streams rows from the server).
+        params query : SQL query
+        params chunksize : rows per chunk
+        returns : iterator of pandas Dataframe"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.arraysize = chunksize
+                cursor.execute(query , params or ())
+                columns = [column[0] for column in cursor.description]
+                logging.info(f'Streaming query results ({len(columns)} columns) in chunks of {chunksize} rows')
+                total = 0
+                while True:
+                    rows = cursor.fetchmany(chunksize)
+                    if not rows:
+                        break
+                    total += len(rows)
+                    yield pd.DataFrame.from_records([tuple(row) for row in rows] , columns = columns)
+                logging.info(f'Fetched {total} rows from the database')
+            except Exception as e:
+                logging.error('could not read the query results : %s', e)
+                raise
+            finally:
+                cursor.close()
+
+    def fetch_query(self, query, params = None, chunksize = 100000):
+        """whole result of a query as one DataFrame"""
+        chunks = list(self.iter_query_chunks(query , chunksize , params))
+        return pd.concat(chunks , ignore_index = True) if chunks else pd.DataFrame()
+
+    def bulk_insert(self, table, df, batch_size = 10000):
+        """
+        Insert a DataFrame into an existing table in executemany batches,
+        committed once at the end (rolled back on failure).
+        With pyodbc, fast_executemany sends each batch as one parameter array
+        instead of one round trip per row.
+        params table : target table name
+        params df : rows to insert, columns must match the table columns
+        returns : number of inserted rows"""
+        columns = ', '.join(_quote(column) for column in df.columns)
+        placeholders = ', '.join('?' * len(df.columns))
+        sql = f'INSERT INTO {_quote(table)} ({columns}) VALUES ({placeholders})'
+        # DB-API drivers want plain python values, NaN becomes NULL
+        values = df.astype(object).where(df.notna() , None)
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            if hasattr(cursor , 'fast_executemany'):
+                cursor.fast_executemany = True
+            try:
+                for start in range(0 , len(values) , batch_size):
+                    batch = values.iloc[start:start + batch_size]
+                    cursor.executemany(sql , [tuple(_to_python(value) for value in row)
+                                              for row in batch.itertuples(index = False , name = None)])
+                conn.commit()
+                logging.info(f'Inserted {len(values)} rows into {table}')
+                return len(values)
+            except Exception as e:
+                conn.rollback()
+                logging.error('could not insert into %s : %s', table, e)
+                raise
+            finally:
+                cursor.close()
+
+    def close(self):
+        """close every pooled connection"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,189 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.logger import logging
+
+
+# artifact formats for the raw / interim stages, the extension is the format name
+FORMATS = ('csv', 'parquet', 'arrow')
+
+
+def artifact_path(directory : str , name : str , fmt : str = 'csv') -> str:
+    """data/raw + train + parquet -> data/raw/train.parquet"""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown artifact format {fmt!r}, expected one of {FORMATS}")
+    return os.path.join(directory , f"{name}.{fmt}")
+
+
+def _infer_format(file_path , fmt : str = None) -> str:
+    if fmt is not None:
+        return fmt
+    if isinstance(file_path , str):
+        ext = os.path.splitext(file_path)[1].lstrip('.').lower()
+        if ext in FORMATS:
+            return ext
+    # URLs, file objects and unknown extensions are read as CSV
+    return 'csv'
+
+
+def read_frame(file_path : str , fmt : str = None , memory_map : bool = True) -> pd.DataFrame:
+    """
+    Read a whole artifact into a DataFrame.
+    Parquet and Arrow IPC files are memory-mapped instead of read into a buffer.
+    """
+    fmt = _infer_format(file_path , fmt)
+    try:
+        if fmt == 'parquet':
+            df = pq.read_table(file_path , memory_map = memory_map).to_pandas()
+        elif fmt == 'arrow':
+            source = pa.memory_map(file_path) if memory_map else pa.OSFile(file_path)
+            with source:
+                df = pa.ipc.open_file(source).read_all().to_pandas()
+        else:
+            df = pd.read_csv(file_path , memory_map = memory_map and isinstance(file_path , str))
+        logging.debug('Loaded %s (%s, %d rows)', file_path, fmt, len(df))
+        return df
+    except pd.errors.ParserError as e:
+        logging.error('Failed to parse the CSV file: %s', e)
+        raise
+
+
+def iter_csv_chunks(file_path : str , chunksize : int , **read_kwargs):
+    """
+    Read a CSV (local path, URL or file object) as an iterator of DataFrames
+    so memory stays bounded by chunksize rows.
+    """
+    try:
+        reader = pd.read_csv(file_path , chunksize = chunksize , **read_kwargs)
+        logging.debug('Streaming %s in chunks of %d rows', file_path, chunksize)
+        with reader:
+            yield from reader
+    except pd.errors.ParserError as e:
+        logging.error('Failed to parse the CSV file: %s', e)
+        raise
+
+
+def iter_frames(file_path : str , chunksize : int , fmt : str = None):
+    """Iterate over any artifact format as DataFrames of at most chunksize rows"""
+    fmt = _infer_format(file_path , fmt)
+    if fmt == 'csv':
+        yield from iter_csv_chunks(file_path , chunksize)
+    elif fmt == 'parquet':
+        parquet_file = pq.ParquetFile(file_path , memory_map = True)
+        for batch in parquet_file.iter_batches(batch_size = chunksize):
+            yield batch.to_pandas()
+    else:
+        with pa.memory_map(file_path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                # record batches keep the writer's size, re-slice them to chunksize
+                for start in range(0 , batch.num_rows , chunksize):
+                    yield batch.slice(start , chunksize).to_pandas()
+
+
+class CsvChunkWriter:
+    """
+    Append DataFrame chunks to one CSV file, writing the header only once.
+    When nothing is written the file holds the header of `columns` (if given).
+
+    Usage :
+        with CsvChunkWriter('data/raw/train.csv') as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    """
+
+    def __init__(self, file_path : str , columns : list = None):
+        self.file_path = file_path
+        self.columns = columns
+        self.rows = 0
+        self._file = None
+        self._header = True
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+        self._file = open(self.file_path, 'w', newline='', encoding='utf-8')
+        return self
+
+    def write(self, df : pd.DataFrame) -> None:
+        df.to_csv(self._file, header=self._header, index=False)
+        self._header = False
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._file is not None:
+            if self._header and self.columns is not None:
+                pd.DataFrame(columns = self.columns).to_csv(self._file, index=False)
+            self._file.close()
+            self._file = None
+            logging.debug('Wrote %d rows to %s', self.rows, self.file_path)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ArrowChunkWriter:
+    """
+    Same interface as CsvChunkWriter for Parquet (fmt='parquet') and Arrow
+    IPC (fmt='arrow') files. The schema is fixed by the first non-empty
+    chunk, later chunks are cast to it. Without any data the file is still
+    written, with the schema of the empty chunks (or of `columns`).
+    """
+
+    def __init__(self, file_path : str , fmt : str = 'parquet' , columns : list = None):
+        self.file_path = file_path
+        self.fmt = fmt
+        self.columns = columns
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+        self._empty = None
+        self._closed = False
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+        return self
+
+    def _open(self, schema : pa.Schema) -> None:
+        self._schema = schema
+        if self.fmt == 'parquet':
+            self._writer = pq.ParquetWriter(self.file_path , schema)
+        else:
+            self._writer = pa.ipc.new_file(self.file_path , schema)
+
+    def write(self, df : pd.DataFrame) -> None:
+        if len(df) == 0 and self._writer is None:
+            # an empty first chunk would fix null column types, wait for data
+            self._empty = df
+            return
+        table = pa.Table.from_pandas(df , schema = self._schema , preserve_index = False)
+        if self._writer is None:
+            self._open(table.schema)
+        self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is None:
+            # no rows at all : an empty file the readers accept, like CsvChunkWriter leaves
+            empty = self._empty if self._empty is not None else pd.DataFrame(columns = self.columns or [])
+            self._open(pa.Table.from_pandas(empty , preserve_index = False).schema)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            logging.debug('Wrote %d rows to %s', self.rows, self.file_path)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_writer(file_path : str , fmt : str = None , columns : list = None):
+    """chunk writer for the format of file_path (columns : header / schema of a file left without chunks)"""
+    fmt = _infer_format(file_path , fmt)
+    if fmt == 'csv':
+        return CsvChunkWriter(file_path , columns)
+    return ArrowChunkWriter(file_path , fmt , columns)
@@ -1,11 +1,11 @@
 import numpy as np 
 import pandas as pd
 import os 
-from sklearn.model_selection import train_test_split 
 import yaml 
 import logging 
 from src.logger import logging
-from src.connections import s3_connection 
+from src.data.artifact_io import iter_csv_chunks, open_writer, artifact_path
+from src.profiler import profiled, profile_section, write_report
 
 
 # read the params from the yaml file 
@@ -17,22 +17,28 @@ def load_params(params_path : str) -> dict:
         logging.debug('Parameters retireved from %s' ,params_path)
         return params
     except FileNotFoundError:
-        logging.error('file not found: %s',params)
+        logging.error('file not found: %s',params_path)
         raise 
     except yaml.YAMLError as e:
         logging.error("YAML ERROR : %s",e)
+        raise 
     except Exception as e:
         logging.error('Unexpected Error : %s',e)
         raise 
 
 
-def load_data(data_url : str) -> pd.DataFrame:
-    """load the data from the csv file"""
+def load_data(data_url : str , chunksize : int = None):
+    """load the data from the csv file (an iterator of DataFrame chunks when chunksize is set)"""
     try:
-        df = pd.read_csv(data_url)
+        if chunksize:
+            # the chunks are read lazily, the reading is timed by the consumer (ingest_chunks)
+            return iter_csv_chunks(data_url , chunksize)
+        with profile_section('load_data') as record:
+            df = pd.read_csv(data_url)
+            record['rows'] = len(df)
         logging.debug("loaded the csv data %s" , data_url)
         return df
-    except pd.error.ParseError as e:
+    except pd.errors.ParserError as e:
         logging.error('parse error L %s' , e)
         raise 
     except Exception as e:
@@ -42,10 +48,10 @@ def load_data(data_url : str) -> pd.DataFrame:
 def preprocess_data(df : pd.DataFrame) -> pd.DataFrame:
     """ preprocess the data"""
     try:
-        logging.info("pre-processing")
-        final_df = df[df['sentiment'].isin(['positive','negative'])]
-        final_df['sentiment'] = final_df['sentiment'].replace({'positive': 1, 'negative': 0})
-        logging.info('Data preprocesssing completed')
+        logging.debug("pre-processing")
+        final_df = df[df['sentiment'].isin(['positive','negative'])].copy()
+        final_df['sentiment'] = final_df['sentiment'].map({'positive': 1, 'negative': 0})
+        logging.debug('Data preprocesssing completed')
         return final_df
     except KeyError as e:
         logging.info('Missing data in dataframe:%s',e)
@@ -56,35 +62,84 @@ def preprocess_data(df : pd.DataFrame) -> pd.DataFrame:
         raise 
 
 
-def save_data(train_data : pd.DataFrame , test_data : pd.DataFrame , data_path : str) -> None:
+def split_chunks(chunks , test_size : float , random_state : int = 42):
+    """
+    Filter and split the data one chunk at a time, yields (train, test) parts.
+
+    Every row is assigned to the test split with probability test_size from a
+    seeded generator, so the split is reproducible and independent of the
+    chunk size. Unlike train_test_split the test share is only test_size on
+    average (binomial), not an exact row count.
+    """
+    rng = np.random.default_rng(random_state)
+    for chunk in chunks:
+        chunk = preprocess_data(chunk)
+        is_test = rng.random(len(chunk)) < test_size
+        yield chunk[~is_test] , chunk[is_test]
+
+
+@profiled(rows = lambda result , *args , **kwargs: sum(result))
+def ingest_chunks(chunks , test_size : float , data_path : str , random_state : int = 42 , fmt : str = 'csv') -> tuple:
+    """
+    Filter, split (split_chunks) and write the raw train / test data one chunk
+    at a time, so peak memory is one chunk whatever the input size.
+    fmt selects the raw artifact format (csv, parquet or arrow).
+    """
     try:
         raw_data_path = os.path.join(data_path , 'raw')
-        os.makedirs(raw_data_path , exist_ok=True)
-        train_data.to_csv(os.path.join(raw_data_path , 'train.csv'),index = False)
-        test_data.to_csv(os.path.join(raw_data_path , 'train.csv'),index = False)
-        logging.debug("data saved %s" , raw_data_path)
+        with open_writer(artifact_path(raw_data_path , 'train' , fmt)) as train_writer, \
+             open_writer(artifact_path(raw_data_path , 'test' , fmt)) as test_writer:
+            for train_part , test_part in split_chunks(chunks , test_size , random_state):
+                train_writer.write(train_part)
+                test_writer.write(test_part)
+        logging.info('Streamed %d train / %d test rows to %s' , train_writer.rows , test_writer.rows , raw_data_path)
+        return train_writer.rows , test_writer.rows
     except Exception as e:
-        logging.error("unexpected error while saving the data %s" , e)
+        logging.error("unexpected error while streaming the data %s" , e)
         raise 
 
+
+def source_chunks(params : dict):
+    """iterator of raw DataFrame chunks from the configured source (s3, ssms or a local / http csv)"""
+    chunksize = params.get('chunksize', 100000)
+    # the connectors (boto3 ...) are only imported for the source in use
+    if params.get('source', 's3') == 's3':
+        from src.connections import s3_connection
+        from src.connections.s3_cache import S3ReadThroughCache
+        s3 = s3_connection.s3_operations(params['bucket_name'] ,
+                                         os.getenv('AWS_SECRET_ACCESS_KEY') ,
+                                         os.getenv('AWS_ACCESS_KEY_ID') ,
+                                         endpoint_url = params.get('endpoint_url'))
+        if params.get('cache_dir'):
+            # unchanged objects are served from the local copy (ETag revalidation)
+            s3 = S3ReadThroughCache(s3 , params['cache_dir'] , params.get('cache_max_bytes', 10 * 1024 ** 3))
+        if params.get('prefix'):
+            # many shard files under one prefix, downloaded concurrently
+            return s3.iter_prefix_chunks(params['prefix'] , chunksize ,
+                                         suffix = params.get('suffix', '.csv') ,
+                                         workers = params.get('workers', 8))
+        return s3.iter_file_chunks(params.get('file_key', 'data.csv') , chunksize)
+    if params.get('source') == 'ssms':
+        from src.connections import ssms_connection
+        # connection string from the environment, it carries the credentials
+        ssms = ssms_connection.ssms_operations(os.getenv('SSMS_CONNECTION_STRING') ,
+                                               pool_size = params.get('pool_size', 4))
+        return ssms.iter_query_chunks(params['query'] , chunksize)
+    return load_data(params['data_url'] , chunksize)
+
+
 def main():
     try:
         # it will take all the data from tha params part 
-        params = load_params('params.yaml')
-        test_size = params['data_ingestion']['test_size']
-        #test_size = 0.2
+        all_params = load_params('params.yaml')
+        params = all_params['data_ingestion']
+        fmt = all_params.get('artifacts', {}).get('format', 'csv')
 
-        #df = load_data(data_url = )
-        s3 = s3_connection.s3_operations(final_df, test_size = test_size , random_state = 42)
-        df = s3.fetch_files_from_s3("data.csv")
-
-        final_df = preprocess_data()
-        train_data , test_data = train_test_split(final_df , test_size = test_size , random_state =42)
-        save_data(train_data , test_data , data_path= './data')
+        ingest_chunks(source_chunks(params) , params['test_size'] , data_path = './data' , random_state = 42 , fmt = fmt)
+        write_report('data_ingestion')
     except Exception as e:
         logging.error('failed to completed the data ingestion %s' , e)
         raise 
 
 if __name__ == '__main__':
     main()
-
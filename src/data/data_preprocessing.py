@@ -1,54 +1,81 @@
-import nltk 
+import argparse 
+from contextlib import contextmanager, nullcontext
 import pandas as pd 
-import numpy as np 
 import os 
 import re 
 import string 
-from nltk.corpus import stopwords 
-from nltk.stem import WordNetLemmatizer 
+import yaml 
 from src.logger import logging 
-nltk.download('wordnet')
-nltk.download('stopwords')
+from src.data.text_normalizer import TextNormalizer, ParallelNormalizer
+from src.data.lemma_cache import LemmaCache
+from src.data.artifact_io import iter_frames, open_writer, artifact_path
+from src.data.stage_cache import RowCache, CachedNormalizer
+from src.data.nltk_resources import ensure_nltk_data
+from src.profiler import profiled, write_report
 
 
-def preprocess_dataframe(df , col = "text") -> pd.DataFrame:
+def load_params(params_path : str) -> dict:
+    """load parameters from the yaml file """
+    try:
+        with open(params_path , 'r') as file:
+            params = yaml.safe_load(file)
+        logging.debug('Parameters retrieved from %s' ,params_path)
+        return params
+    except FileNotFoundError:
+        logging.error('file not found: %s',params_path)
+        raise 
+    except yaml.YAMLError as e:
+        logging.error("YAML ERROR : %s",e)
+        raise 
+    except Exception as e:
+        logging.error('Unexpected Error : %s',e)
+        raise 
+
+
+def preprocess_text(text : str , stop_words : set , lemmatizer) -> str:
+    """
+    Per-row reference implementation of the text normalization.
+    Kept for comparison, the pipeline uses TextNormalizer.normalize_series
+    which produces the same output in bulk.
+    """
+    # remove the urls 
+    text = re.sub(r'https?://\S+|www\.\S+', '', text)
+
+    # remove the numbers 
+    text = ''.join([char for char in text if not char.isdigit()])
+
+    #convert to lower case 
+    text = text.lower()
+    # Remove punctuations
+    text = re.sub('[%s]' % re.escape(string.punctuation), ' ', text)
+    text = text.replace('؛', "")
+    text = re.sub(r'\s+', ' ', text).strip()
+    #remove the stopwords 
+    text = ' '.join([word for word in text.split() if word not in stop_words])
+
+    # lemmatize the text 
+    text = ' '.join([lemmatizer.lemmatize(word) for word in text.split()])
+    return text
+
+
+@profiled()
+def preprocess_dataframe(df , col = "text" , normalizer : TextNormalizer = None) -> pd.DataFrame:
     """
     Preprocess the dataframe by preprocessing some text 
 
     Args :
         df : pandas DataFrame
         col : str : column name of the text data 
+        normalizer : TextNormalizer or ParallelNormalizer : reuse an existing normalizer (built once if None)
 
     Returns:
         df : pandas DataFrame 
     """
-    ### initialuize the lemmatizer and stopwords 
-    lemmatizer = WordNetLemmatizer()
-    stop_words = set(stopwords.set("english"))
-
-    def preprocess_text(text):
-        """helper function to prepare the text data """
-        # remove the urls 
-        text = re.sub(r'https?://\S+|www\.\S+', '', text)
-
-        # remove the numbers 
-        text = ''.join([char for char in text if not chat.isdigit()])
-
-        #convert to lower case 
-        text = text.lower()
-        # Remove punctuations
-        text = re.sub('[%s]' % re.escape(string.punctuation), ' ', text)
-        text = text.replace('؛', "")
-        text = re.sub('\s+', ' ', text).strip()
-        #remove the stopwords 
-        text = ''.join([word for word in text.split() if word not in stop_words])
-
-        # lemmatize the text 
-        text = ''.join([lemmatizer.lemmatize(word) for word in text.split()])
-        return text
-    
+    if normalizer is None:
+        normalizer = TextNormalizer()
+
     # apply the preprocess to the specific column 
-    df['col'] = df[col].apply(preprocess_text)
+    df[col] = normalizer.normalize_series(df[col])
 
     # remove small sentences (less than 3 words)
     # df[col] = df[col].apply(lamdba x : np.nan if len(str(x).split()) < 3 else x)
@@ -62,25 +89,88 @@ def preprocess_dataframe(df , col = "text") -> pd.DataFrame:
 
     
 
-def main():
+@profiled()
+def preprocess_file(in_path : str , out_path : str , normalizer , col : str = "review" , chunksize : int = 100000) -> int:
+    """
+    Stream a raw artifact through preprocess_dataframe and append the result
+    to out_path chunk by chunk, so memory does not grow with the file size.
+    The formats (csv / parquet / arrow) follow the file extensions.
+
+    Returns:
+        number of rows written
+    """
     try:
-        train_data = pd.read_csv("data/train.csv")
-        test_data = pd.read_csv("data/test.csv")
-        logging.info('Data loaded')
+        with open_writer(out_path) as writer:
+            for chunk in iter_frames(in_path , chunksize):
+                writer.write(preprocess_dataframe(chunk , col , normalizer))
+        logging.info('Preprocessed %s -> %s (%d rows)', in_path, out_path, writer.rows)
+        return writer.rows
+    except Exception as e:
+        logging.error('Failed to preprocess %s: %s', in_path, e)
+        raise 
 
-        # transform the data 
-        train_processed_data = preprocess_dataframe(train_data , "review")
-        test_processed_data = preprocess_dataframe(test_data , "review")
 
-        # store the data preprocessed 
-        data_path = os.path.join("./data","interm")
-        os.makedirs(data_path , exist_ok=True)
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description = "clean the raw train / test reviews")
+    parser.add_argument("--workers", type = int, default = None,
+                        help = "worker processes (overrides data_preprocessing.workers, -1 = all cores)")
+    return parser.parse_args()
 
 
-        train_processed_data.to_csv(os.path.join(data_path, "train_processed.csv"), index=False)
-        test_processed_data.to_csv(os.path.join(data_path, "test_processed.csv"), index=False)
-            
+@contextmanager
+def open_normalizer(params : dict , workers : int = None):
+    """
+    The normalizer of the data_preprocessing settings, shared by both splits :
+    lemma cache warmed from the previous run (saved back on exit), row cache,
+    and a worker pool when workers > 1.
+    """
+    cache_path = params.get('lemma_cache_path')
+    if workers is None:
+        workers = params.get('workers', 1)
+    # fail fast (before the worker processes start) when a corpus is missing in offline mode
+    ensure_nltk_data()
+
+    # one lemma cache for both splits, warmed from the previous run
+    lemma_cache = LemmaCache(max_size = params.get('lemma_cache_size', 50000))
+    if cache_path:
+        lemma_cache.load(cache_path)
+
+    # rows normalized by a previous run (same text + normalizer version) are not recomputed
+    row_cache = RowCache(params['row_cache_path']) if params.get('row_cache_path') else None
+    try:
+        if workers == 1:
+            pool = nullcontext(TextNormalizer(lemma_cache = lemma_cache))
+        else:
+            pool = ParallelNormalizer(workers , params.get('chunk_size') , lemma_cache)
+        with pool as normalizer:
+            yield CachedNormalizer(normalizer , row_cache) if row_cache is not None else normalizer
+        logging.info('Lemma cache stats: %s', lemma_cache.stats())
+        if row_cache is not None:
+            logging.info('Row cache stats (distinct texts): %s', row_cache.stats())
+        if cache_path:
+            lemma_cache.save(cache_path)
+    finally:
+        if row_cache is not None:
+            row_cache.close()
+
+
+def main(workers : int = None):
+    try:
+        all_params = load_params('params.yaml')
+        params = all_params.get('data_preprocessing', {})
+        fmt = all_params.get('artifacts', {}).get('format', 'csv')
+        read_chunksize = params.get('read_chunksize', 100000)
+        data_path = os.path.join("./data","interim")
+
+        with open_normalizer(params , workers) as normalizer:
+            # transform the data one chunk at a time
+            for split in ("train", "test"):
+                preprocess_file(artifact_path(os.path.join("data", "raw"), split, fmt),
+                                artifact_path(data_path, f"{split}_processed", fmt),
+                                normalizer, "review", read_chunksize)
+
         logging.info('Processed data saved to %s', data_path)
+        write_report('data_preprocessing')
 
     except Exception as e:
         logging.error('Unexpected error : %s',e)
@@ -88,12 +178,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
-
-
-
-
-
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(parse_args().workers)
@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from src.logger import logging
+from src.data.nltk_resources import wordnet_lemmatizer
+
+
+class LemmaCache:
+    """
+    Bounded token -> lemma cache with LRU eviction.
+
+    Review vocabularies are Zipfian, so a few tens of thousands of entries
+    cover almost every token occurrence. One instance is meant to be shared
+    by every preprocessing call of a run (and snapshotted between runs).
+    The cache can be shared between threads (the serving Predictor shares
+    one between the request threads and the micro-batcher) : inserts and
+    evictions hold a lock, hits do not, so the single threaded hot path
+    pays nothing. Under concurrency the hit counter is approximate.
+    """
+
+    def __init__(self, lemmatizer=None, max_size : int = 50_000, record_misses : bool = False):
+        if max_size <= 0:
+            raise ValueError(f"max_size must be positive, got {max_size}")
+        self.lemmatizer = lemmatizer if lemmatizer is not None else wordnet_lemmatizer()
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        # guards every insert / eviction. get -> move_to_end on a hit is not
+        # atomic either, lemmatize tolerates a word evicted in between
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # worker processes record their misses so the parent can merge them
+        self._recorded = {} if record_misses else None
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def lemmatize(self, word : str) -> str:
+        """return the lemma of word, computing it only on a cache miss"""
+        cache = self._cache
+        lemma = cache.get(word)
+        if lemma is not None:
+            try:
+                cache.move_to_end(word)
+            except KeyError:
+                # evicted by another thread since the get, the lemma is still right
+                pass
+            self.hits += 1
+            return lemma
+
+        # outside the lock : two threads missing the same word both compute it, with the same result
+        lemma = self.lemmatizer.lemmatize(word)
+        with self._lock:
+            self.misses += 1
+            cache[word] = lemma
+            if self._recorded is not None:
+                self._recorded[word] = lemma
+            if len(cache) > self.max_size:
+                cache.popitem(last=False)
+                self.evictions += 1
+        return lemma
+
+    def entries(self) -> dict:
+        """copy of the cached entries, least recently used first"""
+        with self._lock:
+            return dict(self._cache)
+
+    def update(self, entries : dict) -> None:
+        """merge entries computed elsewhere (e.g. by worker processes)"""
+        cache = self._cache
+        with self._lock:
+            for word, lemma in entries.items():
+                cache[word] = lemma
+                cache.move_to_end(word)
+            while len(cache) > self.max_size:
+                cache.popitem(last=False)
+                self.evictions += 1
+
+    def pop_recorded(self) -> dict:
+        """return and reset the entries recorded since the last call"""
+        with self._lock:
+            recorded, self._recorded = self._recorded, {}
+        return recorded or {}
+
+    def merge_stats(self, hits : int, misses : int) -> None:
+        """add the counters of a worker cache to this one"""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def stats(self) -> dict:
+        """hit / miss counters of this cache"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._cache),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def save(self, file_path : str) -> None:
+        """Snapshot the cache entries (least recently used first) to a json file"""
+        try:
+            os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+            tmp_path = file_path + '.tmp'
+            items = list(self.entries().items())
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(items, file, ensure_ascii=False)
+            os.replace(tmp_path, file_path)
+            logging.info('Lemma cache saved to %s (%d entries)', file_path, len(items))
+        except Exception as e:
+            logging.error('Could not save the lemma cache: %s', e)
+            raise
+
+    def load(self, file_path : str) -> None:
+        """Warm the cache from a snapshot written by save(), missing file is not an error"""
+        if not os.path.exists(file_path):
+            logging.info('No lemma cache snapshot at %s, starting cold', file_path)
+            return
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                entries = json.load(file)
+            # keep the most recently used entries if the cap shrank
+            with self._lock:
+                for word, lemma in entries[-self.max_size:]:
+                    self._cache[word] = lemma
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+            logging.info('Lemma cache loaded from %s (%d entries)', file_path, len(self._cache))
+        except (ValueError, TypeError) as e:
+            logging.warning('Ignoring unreadable lemma cache snapshot %s: %s', file_path, e)
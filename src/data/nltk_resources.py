@@ -0,0 +1,104 @@
+"""
+NLTK corpora used by the text normalization, loaded on first use.
+
+The corpora are looked up in the local cache directory (data/nltk_data, or
+$NLTK_DATA_DIR) before the usual NLTK locations, and downloaded there only
+when missing. With NLTK_OFFLINE=1 nothing is downloaded and a missing corpus
+raises LookupError. To fill the cache ahead of time (docker build, CI,
+offline machines) :
+
+    python -m src.data.nltk_resources            # download what is missing
+    python -m src.data.nltk_resources --check    # offline check only
+"""
+import argparse
+import os
+from functools import lru_cache
+
+from src.logger import logging
+
+
+# name passed to nltk.download -> path checked with nltk.data.find
+NLTK_RESOURCES = {
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+}
+
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+NLTK_DATA_DIR = os.path.join(root_dir , 'data' , 'nltk_data')
+
+_checked = set()
+
+
+def _data_dir() -> str:
+    return os.getenv('NLTK_DATA_DIR' , NLTK_DATA_DIR)
+
+
+def _offline() -> bool:
+    return os.getenv('NLTK_OFFLINE' , '').lower() in ('1' , 'true' , 'yes')
+
+
+def missing_resources(names = tuple(NLTK_RESOURCES)) -> list:
+    """the resources NLTK cannot find locally (no network access)"""
+    import nltk
+    data_dir = _data_dir()
+    if data_dir not in nltk.data.path:
+        nltk.data.path.insert(0 , data_dir)
+    missing = []
+    for name in names:
+        try:
+            nltk.data.find(NLTK_RESOURCES[name])
+        except LookupError:
+            missing.append(name)
+    return missing
+
+
+def ensure_nltk_data(names = tuple(NLTK_RESOURCES) , offline : bool = None) -> None:
+    """make sure the corpora are available, downloading the missing ones into the local cache"""
+    names = [name for name in names if name not in _checked]
+    if not names:
+        return
+    import nltk
+    offline = _offline() if offline is None else offline
+    missing = missing_resources(names)
+    if missing and offline:
+        raise LookupError(f'NLTK resources {missing} not found in {_data_dir()} or {nltk.data.path[1:]} '
+                          f'(offline mode), run `python -m src.data.nltk_resources` on a machine with network access')
+    for name in missing:
+        logging.info('Downloading the NLTK resource %s to %s', name, _data_dir())
+        try:
+            nltk.download(name , download_dir = _data_dir() , quiet = True , raise_on_error = True)
+        except ValueError as e:
+            raise LookupError(f'could not download the NLTK resource {name} : {e}') from e
+    _checked.update(names)
+
+
+@lru_cache(maxsize = None)
+def stopwords_set(language : str = 'english') -> frozenset:
+    ensure_nltk_data(['stopwords'])
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words(language))
+
+
+def wordnet_lemmatizer():
+    """a WordNetLemmatizer, the WordNet corpus itself is read on its first lemmatize call"""
+    ensure_nltk_data(['wordnet'])
+    from nltk.stem import WordNetLemmatizer
+    return WordNetLemmatizer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'download (or check) the NLTK corpora of the pipeline')
+    parser.add_argument('--check' , action = 'store_true' , help = 'only report the missing resources, no download')
+    args = parser.parse_args()
+    if args.check:
+        missing = missing_resources()
+        if missing:
+            raise SystemExit(f'missing NLTK resources : {missing} (looked in {_data_dir()} first)')
+        print('all NLTK resources available')
+    else:
+        ensure_nltk_data(offline = False)
+        print(f'NLTK resources available in {_data_dir()} or the default NLTK locations')
+
+
+if __name__ == '__main__':
+    main()
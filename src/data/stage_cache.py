@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from src.logger import logging
+from src.data.text_normalizer import NORMALIZER_VERSION
+
+
+class RowCache:
+    """
+    Content-addressed row cache shared by the pipeline stages.
+
+    Values are stored in a sqlite file under (namespace, hash(text)). The
+    namespace carries whatever else the value depends on (normalizer version,
+    vectorizer fingerprint), so a changed config simply misses instead of
+    returning stale rows. On a repeat run only new or changed rows are
+    recomputed.
+    """
+
+    # sqlite limits the number of bound parameters per statement
+    BATCH = 500
+
+    def __init__(self, db_path : str):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS rows ('
+                           'namespace TEXT NOT NULL, key BLOB NOT NULL, value BLOB NOT NULL, '
+                           'PRIMARY KEY (namespace, key)) WITHOUT ROWID')
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text : str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8') , digest_size = 16).digest()
+
+    def get_many(self , namespace : str , keys) -> dict:
+        """cached values for keys (missing keys are absent from the result)"""
+        keys = list(keys)
+        found = {}
+        for start in range(0 , len(keys) , self.BATCH):
+            batch = keys[start:start + self.BATCH]
+            placeholders = ','.join('?' * len(batch))
+            found.update(self._conn.execute(
+                f'SELECT key, value FROM rows WHERE namespace = ? AND key IN ({placeholders})',
+                [namespace , *batch]).fetchall())
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self , namespace : str , items : dict) -> None:
+        with self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO rows (namespace, key, value) VALUES (?, ?, ?)',
+                                   ((namespace , key , value) for key , value in items.items()))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {'hits': self.hits , 'misses': self.misses , 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self , exc_type , exc_value , traceback):
+        self.close()
+
+
+class CachedNormalizer:
+    """
+    Wraps a TextNormalizer / ParallelNormalizer with the row cache. Same
+    normalize_series interface, so preprocess_dataframe takes either.
+    """
+
+    def __init__(self , normalizer , cache : RowCache):
+        self.normalizer = normalizer
+        self.cache = cache
+        self.namespace = f'normalizer-v{NORMALIZER_VERSION}'
+
+    def normalize_series(self , texts : pd.Series) -> pd.Series:
+        result = pd.Series(np.nan , index = texts.index , dtype = object)
+        # like TextNormalizer, NaN and non-str cells (int / float reviews) come out as NaN
+        present = np.fromiter((isinstance(text , str) for text in texts) , dtype = bool , count = len(texts))
+        values = texts[present].astype(object)
+        keys = [self.cache.key(text) for text in values]
+        unique_keys = dict.fromkeys(keys)
+
+        found = self.cache.get_many(self.namespace , unique_keys)
+        missing = np.fromiter((key not in found for key in keys) , dtype = bool , count = len(keys))
+        if missing.any():
+            # duplicates of a missing text are normalized only once
+            todo = {}
+            for key , text in zip(np.asarray(keys , dtype = object)[missing] , values[missing]):
+                todo.setdefault(key , text)
+            computed = self.normalizer.normalize_series(pd.Series(list(todo.values()) , dtype = object))
+            new = {key: value.encode('utf-8') for key , value in zip(todo , computed)}
+            self.cache.put_many(self.namespace , new)
+            found.update(new)
+
+        result[present] = [found[key].decode('utf-8') for key in keys]
+        return result
+
+
+def vectorizer_fingerprint(vectorizer) -> str:
+    """
+    hash of the vectorizer config plus its fitted vocabulary (if any).
+
+    Limitation : a fitted CountVectorizer (bow) is keyed on its whole
+    vocabulary_, and the vocabulary is refit on the full training split every
+    run. Any change in the top max_features tokens (new rows are often enough)
+    gives a new namespace where every row misses, and the fit itself still
+    reads the whole corpus. The feature row cache only pays off for bow when
+    the vocabulary is unchanged. Stateless vectorizers (hashing) have no
+    vocabulary, so their cached rows stay valid as the data grows.
+    """
+    digest = hashlib.sha256()
+    digest.update(type(vectorizer).__name__.encode())
+    digest.update(json.dumps(vectorizer.get_params() , sort_keys = True , default = str).encode())
+    vocabulary = getattr(vectorizer , 'vocabulary_' , None)
+    if vocabulary is not None:
+        digest.update(json.dumps(sorted(vocabulary.items()) , default = int).encode())
+    return digest.hexdigest()[:32]
+
+
+def _encode_row(indices : np.ndarray , data : np.ndarray) -> bytes:
+    return np.int32(len(indices)).tobytes() + indices.astype(np.int32).tobytes() + data.astype(np.float64).tobytes()
+
+
+def _decode_row(value : bytes) -> tuple:
+    n = int(np.frombuffer(value , dtype = np.int32 , count = 1)[0])
+    indices = np.frombuffer(value , dtype = np.int32 , count = n , offset = 4)
+    data = np.frombuffer(value , dtype = np.float64 , count = n , offset = 4 + 4 * n)
+    return indices , data
+
+
+def transform_cached(transform , vectorizer , texts , cache : RowCache , dtype = np.float64):
+    """
+    Per-row cached vectorizer.transform.
+
+    Args :
+        transform : callable(list of texts) -> CSR matrix, e.g. vectorizer.transform
+        vectorizer : the fitted vectorizer (its fingerprint is the namespace)
+        texts : normalized texts
+
+    Returns:
+        CSR matrix of the same shape as transform(texts)
+    """
+    namespace = f'features-{vectorizer_fingerprint(vectorizer)}'
+    texts = [str(text) for text in texts]
+    keys = [cache.key(text) for text in texts]
+    found = cache.get_many(namespace , dict.fromkeys(keys))
+
+    todo = {}
+    for key , text in zip(keys , texts):
+        if key not in found:
+            todo.setdefault(key , text)
+    if todo:
+        computed = sp.csr_matrix(transform(list(todo.values())))
+        new = {}
+        for row , key in enumerate(todo):
+            lo , hi = computed.indptr[row] , computed.indptr[row + 1]
+            new[key] = _encode_row(computed.indices[lo:hi] , computed.data[lo:hi])
+        cache.put_many(namespace , new)
+        found.update(new)
+        n_features = computed.shape[1]
+    else:
+        n_features = getattr(vectorizer , 'n_features' , None) or len(vectorizer.vocabulary_)
+
+    rows = [_decode_row(found[key]) for key in keys]
+    indptr = np.zeros(len(rows) + 1 , dtype = np.int64)
+    indptr[1:] = np.cumsum([len(indices) for indices , _ in rows])
+    indices = np.concatenate([indices for indices , _ in rows]) if rows else np.zeros(0 , dtype = np.int32)
+    data = np.concatenate([data for _ , data in rows]) if rows else np.zeros(0)
+    logging.debug('Row cache transform : %d rows, %d computed', len(keys), len(todo))
+    return sp.csr_matrix((data.astype(dtype) , indices , indptr) , shape = (len(rows) , n_features))
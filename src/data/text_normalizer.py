@@ -0,0 +1,170 @@
+import math
+import os
+import re
+import string
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import pandas as pd
+from src.logger import logging
+from src.data.lemma_cache import LemmaCache
+from src.data.nltk_resources import stopwords_set
+
+
+# bump this whenever the normalization output changes
+NORMALIZER_VERSION = 1
+
+URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+
+
+@lru_cache(maxsize=None)
+def _translation_table() -> dict:
+    """
+    Build the translation table once per process:
+    unicode digits are dropped, punctuation becomes a space and the arabic
+    semicolon is dropped (same rules as the per-row preprocess_text)
+    """
+    table = {cp: None for cp in range(sys.maxunicode + 1) if chr(cp).isdigit()}
+    table.update({ord(char): ' ' for char in string.punctuation})
+    table[ord('؛')] = None
+    return table
+
+
+class TextNormalizer:
+    """
+    Compile-once text normalizer.
+
+    The regex / translate / whitespace passes run as bulk pandas `.str`
+    operations on the whole column, only the stopword + lemmatization pass
+    works token by token, through a LemmaCache that can be shared between
+    normalizers and runs.
+    """
+
+    def __init__(self, lemmatizer=None, stop_words=None, lemma_cache : LemmaCache = None):
+        self.lemma_cache = lemma_cache if lemma_cache is not None else LemmaCache(lemmatizer)
+        self.stop_words = frozenset(stop_words if stop_words is not None else stopwords_set("english"))
+        self.url_pattern = URL_PATTERN
+        self.table = _translation_table()
+
+    def normalize_series(self, texts: pd.Series) -> pd.Series:
+        """
+        Normalize a column of raw text.
+
+        Args :
+            texts : pandas Series of str (NaN values are kept as NaN)
+
+        Returns:
+            pandas Series with the same index
+        """
+        try:
+            # object dtype keeps the python str semantics of the per-row path
+            # (arrow-backed string columns lower-case / match differently)
+            texts = texts.astype(object)
+            texts = texts.str.replace(self.url_pattern, '', regex=True)
+            # lower() never produces digits or punctuation, so the digit and
+            # punctuation rules can share a single translate pass
+            texts = texts.str.lower().str.translate(self.table)
+            # split() on whitespace also collapses and strips it
+            tokens = texts.str.split()
+            return pd.Series(self._map_tokens(tokens), index=texts.index, dtype=object)
+        except Exception as e:
+            logging.error('Failed to normalize the text column: %s', e)
+            raise
+
+    def normalize_text(self, text: str) -> str:
+        """
+        Normalize a single text with plain str operations (same rules as
+        normalize_series, without the pandas overhead that dominates one-row calls)
+        """
+        text = self.url_pattern.sub('', text).lower().translate(self.table)
+        stop_words = self.stop_words
+        lemmatize = self.lemma_cache.lemmatize
+        return ' '.join([lemmatize(word) for word in text.split() if word not in stop_words])
+
+    def _map_tokens(self, token_lists) -> list:
+        """remove stopwords and lemmatize through the lemma cache"""
+        stop_words = self.stop_words
+        lemmatize = self.lemma_cache.lemmatize
+        result = []
+        for words in token_lists:
+            if not isinstance(words, list):
+                # NaN rows stay NaN so dropna still removes them
+                result.append(words)
+                continue
+            result.append(' '.join([lemmatize(word) for word in words if word not in stop_words]))
+        return result
+
+
+# per worker process state, set up once by _init_worker
+_worker_normalizer = None
+
+
+def _init_worker(cache_entries : dict, cache_size : int) -> None:
+    """load the NLTK corpora and stopwords once per worker, not per chunk"""
+    global _worker_normalizer
+    lemma_cache = LemmaCache(max_size=cache_size, record_misses=True)
+    lemma_cache.update(cache_entries)
+    _worker_normalizer = TextNormalizer(lemma_cache=lemma_cache)
+    # wordnet is a lazy corpus, touch it here so the first chunk does not pay for it
+    lemma_cache.lemmatizer.lemmatize('review')
+
+
+def _normalize_chunk(texts : pd.Series) -> tuple:
+    """normalize one chunk in a worker, returning the new lemma entries and counters too"""
+    lemma_cache = _worker_normalizer.lemma_cache
+    hits, misses = lemma_cache.hits, lemma_cache.misses
+    result = _worker_normalizer.normalize_series(texts)
+    return result, lemma_cache.pop_recorded(), lemma_cache.hits - hits, lemma_cache.misses - misses
+
+
+class ParallelNormalizer:
+    """
+    Chunked, multiprocess version of TextNormalizer.
+
+    Exposes the same normalize_series method, so it can be handed to
+    preprocess_dataframe. Chunks are mapped in order, so the output rows are
+    identical to the serial path. Use it as a context manager so the pool is
+    created once and shared by every column normalized in a run.
+    """
+
+    def __init__(self, workers : int, chunk_size : int = None, lemma_cache : LemmaCache = None):
+        self.workers = workers if workers > 0 else os.cpu_count()
+        self.chunk_size = chunk_size
+        self.lemma_cache = lemma_cache if lemma_cache is not None else LemmaCache()
+        self._executor = None
+
+    def __enter__(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers = self.workers,
+            initializer = _init_worker,
+            initargs = (self.lemma_cache.entries(), self.lemma_cache.max_size)
+        )
+        logging.info('Started %d normalizer workers', self.workers)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._executor.shutdown()
+        self._executor = None
+
+    def _chunks(self, texts : pd.Series) -> list:
+        # a few chunks per worker keeps them all busy until the end
+        chunk_size = self.chunk_size or max(1, math.ceil(len(texts) / (self.workers * 4)))
+        return [texts.iloc[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+
+    def normalize_series(self, texts : pd.Series) -> pd.Series:
+        """Normalize a column across the worker pool, keeping the row order"""
+        if self._executor is None:
+            raise RuntimeError('ParallelNormalizer must be used inside a `with` block')
+        if len(texts) == 0:
+            return texts.astype(object)
+        try:
+            results = []
+            for result, entries, hits, misses in self._executor.map(_normalize_chunk, self._chunks(texts)):
+                results.append(result)
+                self.lemma_cache.update(entries)
+                self.lemma_cache.merge_stats(hits, misses)
+            return pd.concat(results)
+        except Exception as e:
+            logging.error('Failed to normalize the text column in parallel: %s', e)
+            raise
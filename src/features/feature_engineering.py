@@ -5,12 +5,39 @@ import os
 import yaml 
 from src.logger import logging 
 import pickle
-from sklearn.feature_extraction.text import CountVectorizer
+import scipy.sparse as sp
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from src.features.sparse_io import save_sparse
+from src.data.artifact_io import read_frame, artifact_path
+from src.data.stage_cache import RowCache, transform_cached
+from src.profiler import profiled, profile_section, write_report
+
+
+def load_params(params_path : str) -> dict:
+    """load parameters from the yaml file """
+    try:
+        with open(params_path , 'r') as file:
+            params = yaml.safe_load(file)
+        logging.debug('Parameters retrieved from %s' ,params_path)
+        return params
+    except FileNotFoundError:
+        logging.error('file not found: %s',params_path)
+        raise 
+    except yaml.YAMLError as e:
+        logging.error("YAML ERROR : %s",e)
+        raise 
+    except Exception as e:
+        logging.error('Unexpected Error : %s',e)
+        raise 
 
+
+@profiled()
 def load_data(file_path : str)-> pd.DataFrame:
-    """Load the data form the csv file """
+    """Load the data form the interim artifact (csv, parquet or arrow) """
     try:
-        df = pd.read_csv(file_path)
+        df = read_frame(file_path)
         df.fillna('',inplace = True)
         return df 
     except pd.errors.ParserError as e:
@@ -21,9 +48,30 @@ def load_data(file_path : str)-> pd.DataFrame:
         raise 
 
 
-def apply_bow(train_df : pd.DataFrame , test_df : pd.DataFrame , max_features : int)-> tuple:
+def save_vectorizer(vectorizer , file_path : str) -> None:
+    """pickle the fitted vectorizer"""
+    os.makedirs(os.path.dirname(file_path) or '.' , exist_ok = True)
+    with open(file_path , 'wb') as file:
+        pickle.dump(vectorizer , file)
+
+
+def _vectorized_rows(result , *args , **kwargs) -> int:
+    (X_train , _) , (X_test , _) = result
+    return X_train.shape[0] + X_test.shape[0]
+
+
+@profiled(rows = _vectorized_rows)
+def apply_bow(train_data : pd.DataFrame , test_data : pd.DataFrame , max_features : int , row_cache : RowCache = None)-> tuple:
     """
     Apply Count vectorizer to the data 
+    With a row cache, rows already vectorized with the same vocabulary are reused.
+    The vocabulary is refit on every run, so when it changes (e.g. appended
+    rows shift the top max_features tokens) every row is recomputed, see
+    vectorizer_fingerprint. Use method hashing for incremental runs.
+
+    Returns:
+        (X_train, y_train), (X_test, y_test) with X as scipy CSR matrices,
+        the matrices are never densified
     """
     try:
         logging.info("Applying Bow")
@@ -35,55 +83,120 @@ def apply_bow(train_df : pd.DataFrame , test_df : pd.DataFrame , max_features :
         X_test = test_data['review'].values 
         y_test = test_data['sentiment'].values 
 
-        X_train_bow = vectorizer.fit_transform(X_train)
-        X_test_bow = vectorizer.transform(X_test)
-
-        train_df = pd.DataFrame(X_train_bow.toarray())
-        train_df['label'] = y_train
+        if row_cache is None:
+            X_train_bow = vectorizer.fit_transform(X_train)
+            X_test_bow = vectorizer.transform(X_test)
+        else:
+            vectorizer.fit(X_train)
+            X_train_bow = transform_cached(vectorizer.transform , vectorizer , X_train , row_cache , np.int64)
+            X_test_bow = transform_cached(vectorizer.transform , vectorizer , X_test , row_cache , np.int64)
 
-        test_df = pd.DataFrame(X_test_bow.toarray())
-        test_df['label'] = y_test
-
-        pickle.dump(vectorizer , open('models/vectorizer.pkl','wb'))
+        save_vectorizer(vectorizer , 'models/vectorizer.pkl')
         logging.info('Bow applied and saved ')
-        return train_df , test_df
+        return (X_train_bow , y_train) , (X_test_bow , y_test)
     
     except Exception as e:
         logging.error('could not apply bow : %s',e)
         raise 
 
 
-def save_data(df: pd.DataFrame, file_path: str) -> None:
-    """Save the dataframe to a CSV file."""
-    try:
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        df.to_csv(file_path, index=False)
-        logging.info('Data saved to %s', file_path)
-    except Exception as e:
-        logging.error('Unexpected error occurred while saving the data: %s', e)
-        raise
+def hashing_transform(vectorizer : HashingVectorizer , texts : np.ndarray , executor : ProcessPoolExecutor = None ,
+                      chunk_size : int = 100000):
+    """
+    Transform texts with a stateless HashingVectorizer. Chunks do not depend on
+    each other, so with an executor they are transformed in its process pool
+    and stacked in order. Texts that fit in one chunk stay in this process.
+    """
+    chunks = [texts[start:start + chunk_size] for start in range(0 , len(texts) , chunk_size)]
+    if executor is None or len(chunks) <= 1:
+        matrices = [vectorizer.transform(chunk) for chunk in chunks]
+    else:
+        matrices = list(executor.map(vectorizer.transform , chunks))
+    if not matrices:
+        return sp.csr_matrix((0 , vectorizer.n_features))
+    return sp.vstack(matrices , format = 'csr')
+
+
+@profiled(rows = _vectorized_rows)
+def apply_hashing(train_data : pd.DataFrame , test_data : pd.DataFrame , n_features : int ,
+                  workers : int = 1 , chunk_size : int = 100000 , row_cache : RowCache = None) -> tuple:
+    """
+    Apply a hashing vectorizer to the data : fixed-width term counts (same
+    tokenization as CountVectorizer), no vocabulary to fit, and a pickled
+    vectorizer whose size does not grow with the corpus.
 
-def main():
+    Returns:
+        (X_train, y_train), (X_test, y_test) like apply_bow
+    """
     try:
-        train_data = load_data("data/interim/train_processed.csv")
-        test_data = load_data("data/interim/test_processed.csv")
-        max_features = 20
+        logging.info("Applying hashing vectorizer (%d features)", n_features)
+
+        # raw counts like CountVectorizer : no sign flipping, no normalization
+        vectorizer = HashingVectorizer(n_features = n_features , alternate_sign = False , norm = None)
+
+        # one pool for both splits, and none when every split fits in a single chunk
+        if workers != 1 and max(len(train_data) , len(test_data)) > chunk_size:
+            pool = ProcessPoolExecutor(max_workers = workers if workers > 0 else None)
+        else:
+            pool = nullcontext()
+        with pool as executor:
 
-        train_df, test_df = apply_bow(train_data, test_data, max_features)
+            def transform(texts):
+                return hashing_transform(vectorizer , texts , executor , chunk_size)
 
-        save_data (train_df ,  os.path.join("./data", "processed", "train_bow.csv"))
-        save_data(test_df, os.path.join("./data", "processed", "test_bow.csv"))
+            if row_cache is not None:
+                # only rows missing from the cache go through the (parallel) transform
+                X_train_hash = transform_cached(transform , vectorizer , train_data['review'].values , row_cache)
+                X_test_hash = transform_cached(transform , vectorizer , test_data['review'].values , row_cache)
+            else:
+                X_train_hash = transform(train_data['review'].values)
+                X_test_hash = transform(test_data['review'].values)
+
+        save_vectorizer(vectorizer , 'models/vectorizer.pkl')
+        logging.info('Hashing applied and saved ')
+        return (X_train_hash , train_data['sentiment'].values) , (X_test_hash , test_data['sentiment'].values)
 
     except Exception as e:
-        logging.erro('failed to complete the preprocessing : %s',e)
+        logging.error('could not apply hashing : %s',e)
         raise 
 
 
-if __name__ == "__main__":
-    main()
+def build_features(fe_params : dict , train_data : pd.DataFrame , test_data : pd.DataFrame) -> tuple:
+    """vectorize both splits with the configured method (bow or hashing), returns ((X_train, y_train), (X_test, y_test))"""
+    row_cache = RowCache(fe_params['row_cache_path']) if fe_params.get('row_cache_path') else None
+    try:
+        if fe_params.get('method', 'bow') == 'hashing':
+            return apply_hashing(train_data, test_data, fe_params['n_features'],
+                                 fe_params.get('workers', 1),
+                                 fe_params.get('chunk_size', 100000),
+                                 row_cache)
+        return apply_bow(train_data, test_data, fe_params['max_features'], row_cache)
+    finally:
+        if row_cache is not None:
+            logging.info('Row cache stats (distinct texts): %s', row_cache.stats())
+            row_cache.close()
 
 
+def main():
+    try:
+        params = load_params('params.yaml')
+        fe_params = params['feature_engineering']
+        fmt = params.get('artifacts', {}).get('format', 'csv')
+
+        train_data = load_data(artifact_path("data/interim", "train_processed", fmt))
+        test_data = load_data(artifact_path("data/interim", "test_processed", fmt))
+
+        (X_train , y_train) , (X_test , y_test) = build_features(fe_params , train_data , test_data)
 
+        with profile_section('save_sparse' , rows = X_train.shape[0] + X_test.shape[0]):
+            save_sparse(X_train , y_train , os.path.join("./data", "processed", "train_bow.npz"))
+            save_sparse(X_test , y_test , os.path.join("./data", "processed", "test_bow.npz"))
+        write_report('feature_engineering')
 
+    except Exception as e:
+        logging.error('failed to complete the feature engineering : %s',e)
+        raise 
 
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import struct
+import zipfile
+
+import numpy as np
+import scipy.sparse as sp
+from src.logger import logging
+
+
+def save_sparse(X , y : np.ndarray , file_path : str , compressed : bool = False) -> None:
+    """
+    Save a sparse feature matrix and its labels to one .npz file.
+
+    Only the CSR arrays (data / indices / indptr) are written, so the size
+    grows with the number of non-zeros, not rows x features.
+    """
+    try:
+        X = sp.csr_matrix(X)
+        if X.shape[0] != len(y):
+            raise ValueError(f"{X.shape[0]} feature rows but {len(y)} labels")
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        savez = np.savez_compressed if compressed else np.savez
+        savez(file_path , data = X.data , indices = X.indices , indptr = X.indptr ,
+              shape = np.array(X.shape) , label = np.asarray(y))
+        logging.info('Sparse data saved to %s (%d x %d, %d non-zeros)', file_path, X.shape[0], X.shape[1], X.nnz)
+    except Exception as e:
+        logging.error('Unexpected error occurred while saving the sparse data: %s', e)
+        raise
+
+
+def load_sparse(file_path : str) -> tuple:
+    """
+    Load a file written by save_sparse.
+
+    Returns:
+        X : scipy.sparse.csr_matrix
+        y : np.ndarray
+    """
+    try:
+        with np.load(file_path) as arrays:
+            X = sp.csr_matrix((arrays['data'] , arrays['indices'] , arrays['indptr']) ,
+                              shape = tuple(arrays['shape']))
+            y = arrays['label']
+        logging.info('Sparse data loaded from %s (%d x %d)', file_path, X.shape[0], X.shape[1])
+        return X , y
+    except FileNotFoundError:
+        logging.error('File not found: %s', file_path)
+        raise
+    except Exception as e:
+        logging.error('Unexpected error occurred while loading the sparse data: %s', e)
+        raise
+
+
+def _open_npz_member(file_path : str , name : str):
+    """
+    Memory-map one array of an uncompressed .npz (as written by save_sparse).
+    Returns None when the member is compressed and cannot be mapped.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        info = archive.getinfo(name + '.npy')
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with open(file_path , 'rb') as file:
+        # the zip local header is 30 bytes + file name + extra field
+        file.seek(info.header_offset + 26)
+        name_len , extra_len = struct.unpack('<HH' , file.read(4))
+        file.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(file)
+        if version == (1 , 0):
+            shape , fortran_order , dtype = np.lib.format.read_array_header_1_0(file)
+        else:
+            shape , fortran_order , dtype = np.lib.format.read_array_header_2_0(file)
+        offset = file.tell()
+    if shape == () or 0 in shape:
+        # np.memmap cannot map empty arrays
+        return np.zeros(shape , dtype = dtype)
+    return np.memmap(file_path , dtype = dtype , mode = 'r' , shape = shape , offset = offset ,
+                     order = 'F' if fortran_order else 'C')
+
+
+def _open_sparse_arrays(file_path : str) -> dict:
+    names = ('data' , 'indices' , 'indptr' , 'shape' , 'label')
+    arrays = {name: _open_npz_member(file_path , name) for name in names}
+    if any(array is None for array in arrays.values()):
+        # compressed file : fall back to reading the arrays into memory
+        logging.warning('%s is compressed, it cannot be memory-mapped', file_path)
+        with np.load(file_path) as npz:
+            arrays = {name: npz[name] for name in names}
+    return arrays
+
+
+def load_labels(file_path : str) -> np.ndarray:
+    """only the label array of a save_sparse file (memory-mapped)"""
+    return np.asarray(_open_sparse_arrays(file_path)['label'])
+
+
+def iter_sparse_chunks(file_path : str , chunk_rows : int , order = None):
+    """
+    Stream a save_sparse file as (X_chunk, y_chunk) row blocks.
+
+    The CSR arrays are memory-mapped, so only one block of non-zeros is read
+    into memory at a time and the full matrix never has to fit in RAM.
+
+    Args :
+        order : optional sequence of block numbers to visit (e.g. shuffled),
+                defaults to all blocks in file order
+    """
+    try:
+        arrays = _open_sparse_arrays(file_path)
+        n_rows , n_cols = (int(value) for value in arrays['shape'])
+        data , indices , indptr , label = arrays['data'] , arrays['indices'] , arrays['indptr'] , arrays['label']
+        n_blocks = (n_rows + chunk_rows - 1) // chunk_rows
+        for block in (range(n_blocks) if order is None else order):
+            start = block * chunk_rows
+            stop = min(start + chunk_rows , n_rows)
+            lo , hi = int(indptr[start]) , int(indptr[stop])
+            X = sp.csr_matrix((np.array(data[lo:hi]) , np.array(indices[lo:hi]) , np.array(indptr[start:stop + 1]) - lo) ,
+                              shape = (stop - start , n_cols))
+            yield X , np.array(label[start:stop])
+    except FileNotFoundError:
+        logging.error('File not found: %s', file_path)
+        raise
+
+
+def sparse_shape(file_path : str) -> tuple:
+    """(rows, columns) of a save_sparse file, without loading the matrix"""
+    return tuple(int(value) for value in _open_sparse_arrays(file_path)['shape'])
+
+
+def sparse_nnz(file_path : str) -> int:
+    """number of stored non-zeros of a save_sparse file, without loading the matrix"""
+    return int(_open_sparse_arrays(file_path)['indptr'][-1])
+
+
+def count_sparse_blocks(file_path : str , chunk_rows : int) -> int:
+    """number of blocks iter_sparse_chunks yields for chunk_rows"""
+    n_rows = sparse_shape(file_path)[0]
+    return (n_rows + chunk_rows - 1) // chunk_rows
@@ -1,49 +1,212 @@
-import logging 
-import os 
-from logging.handlers import RotatingFileHandler
-from datetime import datetime 
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
 import sys
+from datetime import datetime
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 
-# constants for the log configuration 
+# constants for the log configuration
 LOG_DIR = 'logs'
 LOG_FILE = f'log_{datetime.now().strftime("%Y%m%d%H%M%S")}.log'
 MAX_LOG_SIZE = 5 * 1024 * 1024
 BACKUP_COUNT = 3
+FORMAT = "[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s"
 
 
-# construct log file path 
+# construct log file path (the directory is only created by the first write)
 root_dir = os.path.dirname(os.path.abspath(os.path.join(os.path.dirname(__file__),'../')))
 log_dir_path = os.path.join(root_dir,LOG_DIR)
-os.maekdirs(log_dir_path, exist_ok =True)
 log_file_path = os.path.join(log_dir_path , LOG_FILE)
 
+# the handler / listener installed by configure_logger
+_queue_handler = None
+_listener = None
 
-def configure_logger():
+
+class LazyRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that creates its directory and file on the first record"""
+
+    def __init__(self, file_path : str , **kwargs):
+        super().__init__(file_path , delay = True , **kwargs)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename) , exist_ok = True)
+        return super()._open()
+
+
+class JsonFormatter(logging.Formatter):
+    """one JSON object per line : time, level, logger, module, message (+ exception)"""
+
+    def format(self, record : logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': _module_name(record.pathname),
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry , default = str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    # the queue stays inside the process, so the record does not have to be made
+    # picklable here : only msg % args is merged now (mutable or lazily rendered
+    # args log their value at the call site), the formatting (time, exception
+    # traceback ...) is done by the listener thread
+    def prepare(self, record : logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _to_level(level) -> int:
+    return level if isinstance(level , int) else logging.getLevelName(str(level).upper())
+
+
+@lru_cache(maxsize = None)
+def _module_name(pathname : str) -> str:
+    """dotted module name of a source file of the repo (src.data.data_ingestion), else the file name"""
+    path = os.path.splitext(os.path.abspath(pathname))[0]
+    if path.startswith(root_dir + os.sep):
+        return os.path.relpath(path , root_dir).replace(os.sep , '.')
+    return os.path.basename(path)
+
+
+class ModuleLevelFilter(logging.Filter):
     """
-    Configure logging with a rotating file handler and a console handler 
+    Per module levels. The stages log through the root logger
+    (`from src.logger import logging` then logging.info), so the module is
+    taken from the file the call comes from. The most specific configured
+    prefix wins : {'src.data': 'DEBUG', 'src.data.data_ingestion': 'WARNING'}
     """
-    # create a custom logging 
+
+    def __init__(self, levels : dict , default : int):
+        super().__init__()
+        self.levels = {name: _to_level(level) for name , level in levels.items()}
+        self.default = default
+        self._cache = {}
+
+    def _level(self, pathname : str) -> int:
+        level = self._cache.get(pathname)
+        if level is None:
+            level = self.default
+            parts = _module_name(pathname).split('.')
+            for end in range(len(parts) , 0 , -1):
+                prefix = '.'.join(parts[:end])
+                if prefix in self.levels:
+                    level = self.levels[prefix]
+                    break
+            self._cache[pathname] = level
+        return level
+
+    def filter(self, record : logging.LogRecord) -> bool:
+        if record.name != 'root':
+            # named loggers (libraries) are leveled with logger.setLevel
+            return True
+        return record.levelno >= self._level(record.pathname)
+
+
+def _load_settings(params_path : str) -> dict:
+    if not params_path or not os.path.exists(params_path):
+        return {}
+    import yaml
+    with open(params_path) as file:
+        return (yaml.safe_load(file) or {}).get('logging') or {}
+
+
+def configure_logger(settings : dict = None , params_path : str = 'params.yaml'):
+    """
+    Configure the root logger : one QueueHandler on the calling side and a
+    QueueListener thread doing the formatting and writing (rotating file +
+    console), so a log call costs little more than a queue put.
+
+    settings (defaults to the `logging` section of params_path) :
+        level : default level of the src modules
+        modules : {module or logger name: level}
+        json : JSON lines instead of the text format
+        file / console : enable the handlers, file_level / console_level their levels
+    """
+    global _queue_handler , _listener
+    if settings is None:
+        settings = _load_settings(params_path)
+    shutdown_logger()
+
+    default = _to_level(settings.get('level' , 'DEBUG'))
+    modules = dict(settings.get('modules') or {})
+    formatter = JsonFormatter() if settings.get('json' , False) else logging.Formatter(FORMAT)
+
+    handlers = []
+    if settings.get('file' , True):
+        # file handler with rotation -> save the logging
+        file_handler = LazyRotatingFileHandler(os.path.join(settings.get('dir' , log_dir_path) , LOG_FILE) ,
+                                               maxBytes = settings.get('max_bytes' , MAX_LOG_SIZE) ,
+                                               backupCount = settings.get('backup_count' , BACKUP_COUNT) ,
+                                               encoding = 'utf-8')
+        file_handler.setLevel(settings.get('file_level' , 'INFO'))
+        handlers.append(file_handler)
+    if settings.get('console' , True):
+        # console handler -> print the logging
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(settings.get('console_level' , 'DEBUG'))
+        handlers.append(console_handler)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # non src names are regular loggers (botocore, mlflow ...)
+    module_filter = ModuleLevelFilter({name: level for name , level in modules.items() if name.startswith('src')} , default)
+    for name , level in modules.items():
+        if not name.startswith('src'):
+            logging.getLogger(name).setLevel(level)
+
+    _queue_handler = _DeferredQueueHandler(queue.SimpleQueue())
+    _queue_handler.addFilter(module_filter)
+    _listener = QueueListener(_queue_handler.queue , *handlers , respect_handler_level = True)
+    _listener.start()
+
     logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
+    # records below every configured level are dropped before a LogRecord is built
+    logger.setLevel(min([default] + list(module_filter.levels.values())))
+    logger.addHandler(_queue_handler)
+    return logger
+
+
+def shutdown_logger() -> None:
+    """write out the queued records and remove the handler (safe to call twice)"""
+    global _queue_handler , _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+    _queue_handler , _listener = None , None
 
-    # define formatter 
-    formatter = logging.Formatter("[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s")
 
-    # file handler with rotation -> save the logging
-    file_handler = RotatingFileHandler(log_file_path , maxBytes = MAX_LOG_SIZE , backupCount=BACKUP_COUNT , encoding = 'utf-8')
-    file_handler.setFormatter(formatter)
-    file_handler.setLevel(logging_INFO)
+def _restart_listener() -> None:
+    # a forked worker (process pool) inherits the handler but not the listener thread
+    global _listener
+    if _listener is not None:
+        _queue_handler.queue = queue.SimpleQueue()
+        _listener = QueueListener(_queue_handler.queue , *_listener.handlers , respect_handler_level = True)
+        _listener.start()
+        # pool workers leave through os._exit, atexit is skipped but multiprocessing finalizers run
+        from multiprocessing import util
+        util.Finalize(None , shutdown_logger , exitpriority = 10)
 
-    # console handler -> print the logging 
-    cosole_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    console_handler.setLevel(logging.DEBUG)
 
-    
-    # Add handlers to the logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+if hasattr(os , 'register_at_fork'):
+    os.register_at_fork(after_in_child = _restart_listener)
+atexit.register(shutdown_logger)
 
 # Configure the logger
-configure_logger()
\ No newline at end of file
+configure_logger()
@@ -0,0 +1,243 @@
+# vectorizer x algorithm experiment matrix with cached features
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import yaml
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import MultinomialNB
+from src.logger import logging
+from src.features.sparse_io import save_sparse, load_sparse
+from src.data.artifact_io import read_frame, artifact_path
+
+
+VECTORIZERS = {
+    'BoW': CountVectorizer(),
+    'TF-IDF': TfidfVectorizer()
+}
+
+ALGORITHMS = {
+    'LogisticRegression': LogisticRegression(),
+    'MultinomialNB': MultinomialNB(),
+    'RandomForest': RandomForestClassifier(),
+    'GradientBoosting': GradientBoostingClassifier()
+}
+
+try:
+    from xgboost import XGBClassifier
+    ALGORITHMS['XGBoost'] = XGBClassifier()
+except ImportError:
+    logging.debug('xgboost is not installed, XGBoost is left out of the experiment matrix')
+
+# relative fit cost, the most expensive fits are scheduled first so they do
+# not end up alone at the tail of the run (longest-processing-time first)
+ALGORITHM_COST = {
+    'GradientBoosting': 10,
+    'RandomForest': 5,
+    'XGBoost': 4,
+    'LogisticRegression': 1,
+    'MultinomialNB': 0.1
+}
+
+
+def load_params(params_path : str) -> dict:
+    """load parameters from the yaml file """
+    try:
+        with open(params_path , 'r') as file:
+            params = yaml.safe_load(file)
+        logging.debug('Parameters retrieved from %s' ,params_path)
+        return params
+    except FileNotFoundError:
+        logging.error('file not found: %s',params_path)
+        raise
+    except yaml.YAMLError as e:
+        logging.error("YAML ERROR : %s",e)
+        raise
+
+
+def data_hash(texts : pd.Series , labels : np.ndarray) -> str:
+    """content hash of the texts and labels (row order matters)"""
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(pd.Series(texts).astype(object) , index = False).values.tobytes())
+    digest.update(np.ascontiguousarray(labels).tobytes())
+    return digest.hexdigest()
+
+
+def vectorizer_key(vectorizer) -> str:
+    """hash of the vectorizer class and its full configuration"""
+    config = {'class': type(vectorizer).__name__ , 'params': vectorizer.get_params()}
+    return hashlib.sha256(json.dumps(config , sort_keys = True , default = str).encode()).hexdigest()
+
+
+class FeatureCache:
+    """
+    On-disk cache of vectorized matrices keyed by (vectorizer config, data hash).
+    Entries are save_sparse files, so workers can load them by path.
+    """
+
+    def __init__(self , cache_dir : str):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def path(self , vectorizer , texts_hash : str) -> str:
+        key = hashlib.sha256((vectorizer_key(vectorizer) + texts_hash).encode()).hexdigest()[:32]
+        return os.path.join(self.cache_dir , f'{key}.npz')
+
+    def get_or_build(self , name : str , vectorizer , texts , labels : np.ndarray , texts_hash : str = None) -> str:
+        """return the cache path of the fit_transform of texts, building it on a miss"""
+        path = self.path(vectorizer , texts_hash or data_hash(texts , labels))
+        if os.path.exists(path):
+            self.hits += 1
+            logging.info('Feature cache hit for %s (%s)', name, path)
+            return path
+        self.misses += 1
+        start = time.perf_counter()
+        X = clone(vectorizer).fit_transform(texts)
+        save_sparse(X , labels , path)
+        logging.info('Built %s features in %.2fs (%s)', name, time.perf_counter() - start, path)
+        return path
+
+
+@lru_cache(maxsize = 4)
+def _load_split(feature_path : str , test_size : float , random_state : int) -> tuple:
+    # each worker process reads a cached matrix once, whatever number of algorithms it fits on it
+    X , y = load_sparse(feature_path)
+    return train_test_split(X , y , test_size = test_size , random_state = random_state)
+
+
+def _fit_one(algo_name : str , algorithm , vec_name : str , feature_path : str , test_size : float , random_state : int) -> dict:
+    X_train , X_test , y_train , y_test = _load_split(feature_path , test_size , random_state)
+    start = time.perf_counter()
+    model = clone(algorithm).fit(X_train , y_train)
+    fit_time = time.perf_counter() - start
+    y_pred = model.predict(X_test)
+    return {
+        'algorithm': algo_name,
+        'vectorizer': vec_name,
+        'fit_time': fit_time,
+        'params': {key: value for key , value in model.get_params().items() if np.isscalar(value) or value is None},
+        'metrics': {
+            "accuracy": accuracy_score(y_test, y_pred),
+            "precision": precision_score(y_test, y_pred),
+            "recall": recall_score(y_test, y_pred),
+            "f1_score": f1_score(y_test, y_pred)
+        }
+    }
+
+
+def _log_result(result : dict) -> None:
+    logging.info('%s with %s done in %.2fs : %s', result['algorithm'], result['vectorizer'],
+                 result['fit_time'], result['metrics'])
+
+
+def run_matrix(texts , labels : np.ndarray , vectorizers : dict = None , algorithms : dict = None ,
+               cache_dir : str = 'data/cache/features' , workers : int = 1 ,
+               test_size : float = 0.2 , random_state : int = 42) -> list:
+    """
+    Run every vectorizer x algorithm combination.
+
+    Each vectorizer matrix is computed once (or read from the feature cache),
+    then the algorithm fits run concurrently on up to `workers` processes,
+    heaviest algorithms first.
+
+    Returns:
+        list of result dicts (algorithm, vectorizer, fit_time, params, metrics)
+    """
+    vectorizers = vectorizers or VECTORIZERS
+    algorithms = algorithms or ALGORITHMS
+    try:
+        cache = FeatureCache(cache_dir)
+        texts_hash = data_hash(texts , labels)
+        features = {vec_name: cache.get_or_build(vec_name , vectorizer , texts , labels , texts_hash)
+                    for vec_name , vectorizer in vectorizers.items()}
+        logging.info('Feature cache : %d hits, %d misses', cache.hits, cache.misses)
+
+        tasks = sorted(((algo_name , algorithm , vec_name , path , test_size , random_state)
+                        for algo_name , algorithm in algorithms.items()
+                        for vec_name , path in features.items()),
+                       key = lambda task: ALGORITHM_COST.get(task[0] , 1) , reverse = True)
+
+        results = []
+        if workers == 1:
+            for task in tasks:
+                result = _fit_one(*task)
+                _log_result(result)
+                results.append(result)
+        else:
+            with ProcessPoolExecutor(max_workers = workers if workers > 0 else None) as executor:
+                futures = [executor.submit(_fit_one , *task) for task in tasks]
+                for future in as_completed(futures):
+                    result = future.result()
+                    _log_result(result)
+                    results.append(result)
+        return sorted(results , key = lambda result: (result['algorithm'] , result['vectorizer']))
+    except Exception as e:
+        logging.error('Experiment matrix failed : %s', e)
+        raise
+
+
+def save_results(results : list , file_path : str) -> None:
+    """save the metrics of every combination to a json file"""
+    try:
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        with open(file_path , 'w') as file:
+            json.dump(results , file , indent = 4 , default = str)
+        logging.info('Experiment results saved to %s', file_path)
+    except Exception as e:
+        logging.error('Could not save the experiment results : %s', e)
+        raise
+
+
+def log_results(results : list , experiment_name : str) -> dict:
+    """log the matrix as one parent MLflow run with a nested run per combination (batched, in the background)"""
+    from src.connections.mlflow_connection import AsyncMlflowLogger
+    from src.model.model_evaluation import setup_tracking, fallback_uri
+    # same tracking server (or local fallback) as the model_evaluation stage
+    with AsyncMlflowLogger(setup_tracking() , fallback_uri = fallback_uri) as tracker:
+        parent = tracker.start_run(experiment_name , "All Experiments")
+        for result in results:
+            child = tracker.start_run(experiment_name , f"{result['algorithm']} with {result['vectorizer']}" , parent)
+            tracker.log_params(child , {'vectorizer': result['vectorizer'], 'algorithm': result['algorithm'], **result['params']})
+            tracker.log_metrics(child , {**result['metrics'], 'fit_time': result['fit_time']})
+            tracker.end_run(child)
+        tracker.end_run(parent)
+    logging.info('MLflow logging : %s', tracker.timing())
+    return tracker.timing()
+
+
+def main():
+    try:
+        params = load_params('params.yaml')
+        config = params.get('experiments', {})
+        fmt = params.get('artifacts', {}).get('format', 'csv')
+
+        df = read_frame(config.get('data_path') or artifact_path("data/interim", "train_processed", fmt)).fillna('')
+        results = run_matrix(df['review'].astype(str) , df['sentiment'].values ,
+                             cache_dir = config.get('cache_dir', 'data/cache/features') ,
+                             workers = config.get('workers', -1) ,
+                             test_size = config.get('test_size', 0.2))
+        for result in results:
+            logging.info('%20s | %-6s | fit %.2fs | %s', result['algorithm'], result['vectorizer'],
+                         result['fit_time'], result['metrics'])
+        save_results(results , config.get('results_path', 'reports/experiments.json'))
+
+        if config.get('log_to_mlflow', True):
+            log_results(results , config.get('experiment_name', 'Bow vs TfIdf'))
+    except Exception as e:
+        logging.error('Failed to run the experiment matrix : %s', e)
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# hyperparameter tuning with successive halving
+import json
+import os
+
+import yaml
+# imported for its side effect : it enables HalvingGridSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import HalvingGridSearchCV
+from src.logger import logging
+from src.data.artifact_io import read_frame, artifact_path
+
+
+VECTORIZERS = {
+    'bow': CountVectorizer,
+    'tfidf': TfidfVectorizer
+}
+
+
+def load_params(params_path : str) -> dict:
+    """load parameters from the yaml file """
+    try:
+        with open(params_path , 'r') as file:
+            params = yaml.safe_load(file)
+        logging.debug('Parameters retrieved from %s' ,params_path)
+        return params
+    except FileNotFoundError:
+        logging.error('file not found: %s',params_path)
+        raise
+    except yaml.YAMLError as e:
+        logging.error("YAML ERROR : %s",e)
+        raise
+
+
+def build_features(train_texts , test_texts , vectorizer_name : str = 'tfidf' , max_features : int = None) -> tuple:
+    """
+    Fit the vectorizer once. Every candidate and CV fold then reads the same
+    sparse matrix instead of re-vectorizing.
+    """
+    try:
+        vectorizer = VECTORIZERS[vectorizer_name](max_features = max_features)
+        X_train = vectorizer.fit_transform(train_texts)
+        X_test = vectorizer.transform(test_texts)
+        logging.info('Built %s features once : %d x %d', vectorizer_name, X_train.shape[0], X_train.shape[1])
+        return X_train , X_test , vectorizer
+    except KeyError:
+        logging.error('Unknown vectorizer %s, expected one of %s', vectorizer_name, list(VECTORIZERS))
+        raise
+
+
+def run_search(X_train , y_train , param_grid : dict , cv : int = 5 , factor : int = 3 ,
+               scoring : str = 'f1' , workers : int = -1 , random_state : int = 42) -> HalvingGridSearchCV:
+    """
+    Successive halving over param_grid : every candidate starts on a small
+    sample, only the best 1/factor survive to the next round with factor
+    times more rows, so weak configurations are dropped early.
+
+    Fits run in a joblib process pool. joblib memory-maps the large arrays of
+    X_train (the CSR data / indices) once and shares them read-only with the
+    workers instead of copying the matrix into every task.
+    """
+    try:
+        search = HalvingGridSearchCV(
+            LogisticRegression(solver = 'liblinear'),
+            param_grid,
+            cv = cv,
+            factor = factor,
+            scoring = scoring,
+            n_jobs = workers,
+            random_state = random_state,
+            refit = True
+        )
+        search.fit(X_train , y_train)
+        logging.info('Successive halving done : %d iterations, best %s = %.4f with %s',
+                     search.n_iterations_, scoring, search.best_score_, search.best_params_)
+        return search
+    except Exception as e:
+        logging.error('Hyperparameter search failed : %s', e)
+        raise
+
+
+def cv_runs(search : HalvingGridSearchCV) -> list:
+    """
+    One record per (round, candidate) straight from cv_results_, so logging
+    never refits a model.
+    """
+    results = search.cv_results_
+    return [
+        {
+            'params': params,
+            'iteration': int(results['iter'][i]),
+            'n_resources': int(results['n_resources'][i]),
+            'mean_cv_score': float(results['mean_test_score'][i]),
+            'std_cv_score': float(results['std_test_score'][i]),
+            'mean_fit_time': float(results['mean_fit_time'][i])
+        }
+        for i , params in enumerate(results['params'])
+    ]
+
+
+def holdout_metrics(clf , X_test , y_test) -> dict:
+    y_pred = clf.predict(X_test)
+    return {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred),
+        "recall": recall_score(y_test, y_pred),
+        "f1_score": f1_score(y_test, y_pred)
+    }
+
+
+def log_search(search : HalvingGridSearchCV , metrics : dict , experiment_name : str) -> dict:
+    """
+    log the CV results as nested runs and the refitted best model as the parent run.
+    Values are sent in the background with log_batch, returns the logging timing.
+    """
+    from src.connections.mlflow_connection import AsyncMlflowLogger
+    from src.model.model_evaluation import setup_tracking, fallback_uri
+    # same tracking server (or local fallback) as the model_evaluation stage
+    with AsyncMlflowLogger(setup_tracking() , fallback_uri = fallback_uri) as tracker:
+        parent = tracker.start_run(experiment_name , 'successive halving')
+        for run in cv_runs(search):
+            child = tracker.start_run(experiment_name , f"LR with params: {run['params']} (round {run['iteration']})" , parent)
+            tracker.log_params(child , run['params'])
+            tracker.log_metrics(child , {key: value for key , value in run.items() if key != 'params'})
+            tracker.end_run(child)
+        tracker.log_params(parent , search.best_params_)
+        tracker.log_metrics(parent , {"best_cv_score": search.best_score_ , **metrics})
+        tracker.log_sklearn_model(parent , search.best_estimator_ , "model")
+        tracker.end_run(parent)
+    logging.info('MLflow logging : %s', tracker.timing())
+    return tracker.timing()
+
+
+def save_search(search : HalvingGridSearchCV , metrics : dict , file_path : str) -> None:
+    """save the best params, the best CV score and the holdout metrics to a json file"""
+    try:
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        with open(file_path , 'w') as file:
+            json.dump({'best_params': search.best_params_ , 'best_cv_score': float(search.best_score_) ,
+                       'n_iterations': int(search.n_iterations_) , 'metrics': metrics} , file , indent = 4 , default = str)
+        logging.info('Tuning results saved to %s', file_path)
+    except Exception as e:
+        logging.error('Could not save the tuning results : %s', e)
+        raise
+
+
+def main():
+    try:
+        params = load_params('params.yaml')
+        tuning = params.get('tuning', {})
+        fmt = params.get('artifacts', {}).get('format', 'csv')
+
+        train_data = read_frame(artifact_path("data/interim", "train_processed", fmt)).fillna('')
+        test_data = read_frame(artifact_path("data/interim", "test_processed", fmt)).fillna('')
+
+        X_train , X_test , _ = build_features(train_data['review'].values , test_data['review'].values ,
+                                              tuning.get('vectorizer', 'tfidf') , tuning.get('max_features'))
+        y_train , y_test = train_data['sentiment'].values , test_data['sentiment'].values
+
+        search = run_search(X_train , y_train , tuning.get('param_grid', {'C': [0.1, 1, 10], 'penalty': ['l1', 'l2']}) ,
+                            tuning.get('cv', 5) , tuning.get('factor', 3) , tuning.get('scoring', 'f1') ,
+                            tuning.get('workers', -1))
+        metrics = holdout_metrics(search.best_estimator_ , X_test , y_test)
+        logging.info('Best model test metrics : %s', metrics)
+        save_search(search , metrics , tuning.get('results_path', 'reports/tuning.json'))
+
+        if tuning.get('log_to_mlflow', True):
+            log_search(search , metrics , tuning.get('experiment_name', 'LR successive halving'))
+
+    except Exception as e:
+        logging.error('Failed to complete the hyperparameter tuning : %s', e)
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import json
+import os
+import re
+
+import numpy as np
+import scipy.sparse as sp
+from src.logger import logging
+
+
+FORMAT_VERSION = 1
+
+# CountVectorizer settings the lean analyzer reproduces exactly
+_DEFAULT_ANALYZER = {'analyzer': 'word', 'preprocessor': None, 'tokenizer': None, 'strip_accents': None}
+
+
+def analyzer_config(vectorizer) -> dict:
+    """the CountVectorizer settings WordAnalyzer needs, ValueError if it cannot reproduce them"""
+    if not hasattr(vectorizer , 'vocabulary_'):
+        raise ValueError(f'{type(vectorizer).__name__} has no fitted vocabulary_')
+    params = vectorizer.get_params()
+    unsupported = {key: params.get(key) for key , value in _DEFAULT_ANALYZER.items() if params.get(key) != value}
+    if unsupported:
+        raise ValueError(f'only word CountVectorizers without custom callables are supported, got {unsupported}')
+    stop_words = vectorizer.get_stop_words()
+    return {
+        'lowercase': bool(params['lowercase']),
+        'token_pattern': params['token_pattern'],
+        'ngram_range': list(params['ngram_range']),
+        'stop_words': sorted(stop_words) if stop_words else None,
+        'binary': bool(params['binary']),
+        'dtype': np.dtype(params['dtype']).name
+    }
+
+
+def export_lean_model(model , vectorizer , out_dir : str) -> None:
+    """
+    Export a fitted binary linear classifier (LogisticRegression / SGD
+    log_loss) and its CountVectorizer as plain .npy arrays + meta.json :
+
+        vocab.npy        sorted tokens (fixed width unicode), memory-mappable
+        vocab_index.npy  feature column of each sorted token
+        coef_index.npy   columns with a non-zero coefficient (L1 keeps few)
+        coef_value.npy   their coefficients
+        meta.json        intercept, classes, analyzer settings
+
+    No pickle is involved, loading is a few np.load calls.
+    """
+    try:
+        coef = np.asarray(model.coef_)
+        if coef.shape[0] != 1:
+            raise ValueError(f'only binary classifiers can be exported, coef_ has shape {coef.shape}')
+        analyzer = analyzer_config(vectorizer)
+
+        tokens = np.array(sorted(vectorizer.vocabulary_))
+        columns = np.fromiter((vectorizer.vocabulary_[token] for token in tokens) , dtype = np.int32 , count = len(tokens))
+        nonzero = np.flatnonzero(coef[0])
+
+        os.makedirs(out_dir , exist_ok = True)
+        np.save(os.path.join(out_dir , 'vocab.npy') , tokens)
+        np.save(os.path.join(out_dir , 'vocab_index.npy') , columns)
+        np.save(os.path.join(out_dir , 'coef_index.npy') , nonzero.astype(np.int32))
+        np.save(os.path.join(out_dir , 'coef_value.npy') , coef[0 , nonzero].astype(np.float64))
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'n_features': int(coef.shape[1]),
+            'intercept': float(np.ravel(model.intercept_)[0]),
+            'classes': [value.item() if hasattr(value , 'item') else value for value in model.classes_],
+            'analyzer': analyzer
+        }
+        with open(os.path.join(out_dir , 'meta.json') , 'w') as file:
+            json.dump(meta , file , indent = 2)
+        logging.info('Lean model exported to %s (%d tokens, %d non-zero coefficients)', out_dir, len(tokens), len(nonzero))
+    except Exception as e:
+        logging.error('Could not export the lean model: %s', e)
+        raise
+
+
+class WordAnalyzer:
+    """same tokens as CountVectorizer.build_analyzer() for an exported analyzer config"""
+
+    def __init__(self , config : dict):
+        self.lowercase = config['lowercase']
+        self.token_pattern = re.compile(config['token_pattern'])
+        self.min_n , self.max_n = config['ngram_range']
+        self.stop_words = frozenset(config['stop_words'] or ())
+
+    def __call__(self , text : str) -> list:
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_pattern.findall(text)
+        if self.stop_words:
+            tokens = [token for token in tokens if token not in self.stop_words]
+        if self.max_n == 1:
+            return tokens
+        original = tokens
+        tokens = list(original) if self.min_n == 1 else []
+        for n in range(max(self.min_n , 2) , min(self.max_n , len(original)) + 1):
+            tokens.extend(' '.join(original[i:i + n]) for i in range(len(original) - n + 1))
+        return tokens
+
+
+class LeanModel:
+    """
+    Loader / scorer for export_lean_model artifacts.
+
+    transform matches CountVectorizer.transform and predict_proba matches the
+    exported classifier. Tokens are looked up with np.searchsorted in the
+    sorted (memory-mapped) vocabulary instead of a python dict.
+    """
+
+    def __init__(self , vocab : np.ndarray , vocab_index : np.ndarray , coef_index : np.ndarray ,
+                 coef_value : np.ndarray , meta : dict):
+        if meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"unsupported lean model format {meta.get('format_version')}")
+        self.vocab = vocab
+        self.vocab_index = vocab_index
+        self.n_features = meta['n_features']
+        self.intercept = meta['intercept']
+        self.classes_ = np.array(meta['classes'])
+        self.coef = np.zeros(self.n_features)
+        self.coef[coef_index] = coef_value
+
+        self.analyzer_config = meta['analyzer']
+        self.analyze = WordAnalyzer(self.analyzer_config)
+        self.binary = self.analyzer_config['binary']
+        self.dtype = np.dtype(self.analyzer_config['dtype'])
+
+    @classmethod
+    def load(cls , model_dir : str , mmap : bool = True) -> 'LeanModel':
+        try:
+            mode = 'r' if mmap else None
+            arrays = {name: np.load(os.path.join(model_dir , f'{name}.npy') , mmap_mode = mode)
+                      for name in ('vocab' , 'vocab_index' , 'coef_index' , 'coef_value')}
+            with open(os.path.join(model_dir , 'meta.json')) as file:
+                meta = json.load(file)
+            model = cls(meta = meta , **arrays)
+            logging.info('Lean model loaded from %s', model_dir)
+            return model
+        except FileNotFoundError:
+            logging.error('Lean model not found in %s', model_dir)
+            raise
+
+    def lookup(self , tokens : np.ndarray) -> np.ndarray:
+        """feature column of each token, -1 when out of vocabulary"""
+        if len(tokens) == 0 or len(self.vocab) == 0:
+            return np.full(len(tokens) , -1 , dtype = np.int64)
+        positions = np.searchsorted(self.vocab , tokens)
+        positions = np.minimum(positions , len(self.vocab) - 1)
+        found = self.vocab[positions] == tokens
+        return np.where(found , self.vocab_index[positions] , -1)
+
+    def transform(self , texts) -> sp.csr_matrix:
+        analyzed = [self.analyze(text) for text in texts]
+        lengths = np.fromiter((len(tokens) for tokens in analyzed) , dtype = np.int64 , count = len(analyzed))
+        rows = np.repeat(np.arange(len(analyzed)) , lengths)
+        columns = self.lookup(np.array([token for tokens in analyzed for token in tokens] , dtype = str))
+        known = columns >= 0
+        X = sp.csr_matrix((np.ones(known.sum() , dtype = self.dtype) , (rows[known] , columns[known])) ,
+                          shape = (len(analyzed) , self.n_features))
+        X.sum_duplicates()
+        if self.binary:
+            X.data[:] = 1
+        return X
+
+    def decision_function(self , X) -> np.ndarray:
+        return X @ self.coef + self.intercept
+
+    def predict_proba(self , X) -> np.ndarray:
+        probability = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1 - probability , probability])
+
+    def predict(self , X) -> np.ndarray:
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+
+def check_parity(model , vectorizer , lean : LeanModel , texts , atol : float = 1e-9) -> float:
+    """
+    Compare the lean model with the pickled objects on texts.
+    Raises ValueError when the features differ or the probabilities are off by more than atol.
+
+    Returns:
+        max absolute probability difference
+    """
+    texts = list(texts)
+    expected_X = vectorizer.transform(texts)
+    X = lean.transform(texts)
+    if (expected_X != X).nnz:
+        raise ValueError('lean vectorizer output differs from CountVectorizer.transform')
+    diff = float(np.max(np.abs(model.predict_proba(expected_X) - lean.predict_proba(X)) , initial = 0.0))
+    if diff > atol or not np.array_equal(model.predict(expected_X) , lean.predict(X)):
+        raise ValueError(f'lean model predictions differ from the pickled model (max diff {diff})')
+    logging.info('Lean model parity checked on %d texts (max probability diff %.3g)', len(texts), diff)
+    return diff
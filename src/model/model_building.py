@@ -1,25 +1,39 @@
 import numpy as np
 import pandas as pd
+import os
+import hashlib
+import json
 import pickle
-from sklearn.linear_model import LogisticRegression
+import shutil
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 import yaml
 from src.logger import logging
+from src.features.sparse_io import load_sparse, load_labels, iter_sparse_chunks, count_sparse_blocks, sparse_shape, sparse_nnz
+from src.data.artifact_io import read_frame, artifact_path
+from src.model.lean_model import export_lean_model, LeanModel, check_parity
+from src.profiler import profiled, write_report
 
-def load_data(file_path : str)-> pd.DataFrame:
-    """Load the data form the csv file """
+
+def load_params(params_path : str) -> dict:
+    """load parameters from the yaml file """
     try:
-        df = pd.read_csv(file_path)
-        df.fillna('',inplace = True)
-        return df 
-    except pd.errors.ParserError as e:
-        logging.error('Failed to parse the CSV file: %s', e)
-        raise
+        with open(params_path , 'r') as file:
+            params = yaml.safe_load(file)
+        logging.debug('Parameters retrieved from %s' ,params_path)
+        return params
+    except FileNotFoundError:
+        logging.error('file not found: %s',params_path)
+        raise 
+    except yaml.YAMLError as e:
+        logging.error("YAML ERROR : %s",e)
+        raise 
     except Exception as e:
-        logging.error("error in loading the data %s",e)
+        logging.error('Unexpected Error : %s',e)
         raise 
 
-def train_model(X_train : np.ndarray ,y_train : np.ndarray) -> LogisticRegression:
-    """ train the logistic regression model """
+@profiled(rows = lambda clf , X_train , *args , **kwargs: X_train.shape[0])
+def train_model(X_train ,y_train : np.ndarray) -> LogisticRegression:
+    """ train the logistic regression model (X_train can be dense or scipy sparse) """
     try:
         clf = LogisticRegression(C= 1 , solver = 'liblinear' , penalty = 'l1')
         clf.fit(X_train , y_train)
@@ -33,6 +47,101 @@ def train_model(X_train : np.ndarray ,y_train : np.ndarray) -> LogisticRegressio
     
 
 
+def checkpoint_fingerprint(train_path : str , chunk_rows : int , n_blocks : int , clf , random_state : int) -> str:
+    """
+    hash of everything the position in a checkpoint depends on : the training
+    file, the blocking, the model settings and the seed. The file is keyed on
+    its size, mtime and sparse header (shape, non-zeros) instead of its
+    content, so the fingerprint costs a stat and a header read, not a full
+    extra pass over the largest artifact.
+    """
+    stat = os.stat(train_path)
+    config = {'shape': sparse_shape(train_path) , 'nnz': sparse_nnz(train_path) ,
+              'size': stat.st_size , 'mtime_ns': stat.st_mtime_ns ,
+              'chunk_rows': chunk_rows , 'n_blocks': n_blocks , 'params': clf.get_params() , 'random_state': random_state}
+    return hashlib.sha256(json.dumps(config , sort_keys = True , default = str).encode()).hexdigest()
+
+
+def load_checkpoint(file_path : str , fingerprint : str):
+    """the checkpoint saved for this fingerprint, None when it is missing or was made for another run"""
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path , 'rb') as file:
+        checkpoint = pickle.load(file)
+    if checkpoint.get('fingerprint') != fingerprint:
+        logging.warning('Checkpoint %s was saved for other data or settings, starting over', file_path)
+        return None
+    return checkpoint
+
+
+def save_checkpoint(clf , epoch : int , block : int , file_path : str , fingerprint : str = None) -> None:
+    """save the model and the position (epoch, next block) reached in the stream"""
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    tmp_path = file_path + '.tmp'
+    with open(tmp_path , 'wb') as file:
+        pickle.dump({'model': clf , 'epoch': epoch , 'block': block , 'fingerprint': fingerprint} , file)
+    os.replace(tmp_path , file_path)
+    logging.debug('Checkpoint saved at epoch %d block %d', epoch, block)
+
+
+@profiled()
+def train_model_incremental(train_path : str , params : dict) -> SGDClassifier:
+    """
+    Out-of-core training : stream memory-mapped sparse row blocks from the
+    processed stage into SGDClassifier.partial_fit (logistic loss, L1 /
+    elasticnet penalty), so the training set never has to fit in RAM.
+
+    Block order (and row order inside a block) is shuffled with seeded
+    generators, which keeps a resumed run on exactly the same sequence of
+    updates. A checkpoint is
+    written every `checkpoint_every` blocks and at the end of each epoch. It
+    carries a fingerprint of the data and settings, a checkpoint made for
+    another run is ignored, and it is removed once training completes.
+    """
+    try:
+        chunk_rows = params.get('chunk_rows', 100000)
+        epochs = params.get('epochs', 5)
+        checkpoint_path = params.get('checkpoint_path', 'models/checkpoints/sgd_checkpoint.pkl')
+        checkpoint_every = params.get('checkpoint_every', 0)
+        random_state = params.get('random_state', 42)
+
+        classes = np.unique(load_labels(train_path))
+        n_blocks = count_sparse_blocks(train_path , chunk_rows)
+
+        clf = SGDClassifier(loss = 'log_loss' , penalty = params.get('penalty', 'elasticnet') ,
+                            alpha = params.get('alpha', 1e-5) , l1_ratio = params.get('l1_ratio', 0.5) ,
+                            random_state = random_state)
+        fingerprint = checkpoint_fingerprint(train_path , chunk_rows , n_blocks , clf , random_state)
+        start_epoch , start_block = 0 , 0
+        checkpoint = load_checkpoint(checkpoint_path , fingerprint) if params.get('resume', False) else None
+        if checkpoint is not None:
+            clf , start_epoch , start_block = checkpoint['model'] , checkpoint['epoch'] , checkpoint['block']
+            logging.info('Resuming from %s at epoch %d block %d', checkpoint_path, start_epoch, start_block)
+
+        for epoch in range(start_epoch , epochs):
+            order = np.random.default_rng([random_state , epoch]).permutation(n_blocks)
+            skip = start_block if epoch == start_epoch else 0
+            for done , (X , y) in enumerate(iter_sparse_chunks(train_path , chunk_rows , order[skip:]) , start = skip + 1):
+                # rows are shuffled inside the block too, seeded per block so resuming is exact
+                shuffle = np.random.default_rng([random_state , epoch , done]).permutation(len(y))
+                clf.partial_fit(X[shuffle] , y[shuffle] , classes = classes)
+                if checkpoint_every and done % checkpoint_every == 0 and done < n_blocks:
+                    save_checkpoint(clf , epoch , done , checkpoint_path , fingerprint)
+            if epoch + 1 < epochs:
+                save_checkpoint(clf , epoch + 1 , 0 , checkpoint_path , fingerprint)
+            logging.info('Epoch %d/%d done (%d blocks)', epoch + 1, epochs, n_blocks)
+
+        # the run is complete, a later resume must not pick up its last position
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        logging.info("Incremental model training done")
+        return clf
+
+    except Exception as e:
+        logging.error("Error in the incremental training : %s", e)
+        raise 
+
+
 def save_model(model, file_path: str) -> None:
     """Save the trained model to a file."""
     try:
@@ -43,15 +152,72 @@ def save_model(model, file_path: str) -> None:
         logging.error('Error occurred while saving the model: %s', e)
         raise
 
+# the lean export output declared in dvc.yaml, used when lean_model_dir is null
+LEAN_MODEL_DIR = 'models/lean'
+
+
+def mark_lean_skipped(out_dir : str , reason : str) -> None:
+    """
+    leave out_dir with only an export.json saying why nothing was exported :
+    the dvc output always exists, and without meta.json the loaders fall back
+    to the pickles instead of picking up a stale export from an earlier run
+    """
+    shutil.rmtree(out_dir , ignore_errors = True)
+    os.makedirs(out_dir)
+    with open(os.path.join(out_dir , 'export.json') , 'w') as file:
+        json.dump({'exported': False , 'reason': reason} , file , indent = 2)
+    logging.info('No lean model exported to %s : %s', out_dir, reason)
+
+
+def export_lean(clf , out_dir : str , vectorizer_path : str , sample_path : str = None , sample_rows : int = 1000 ,
+                texts : pd.Series = None) -> None:
+    """
+    Export the pickle-free lean model next to model.pkl and check on a sample
+    of the processed test texts that it predicts the same as the pickles
+    (a mismatch is logged, tests/test_lean_model.py covers the round trip).
+    The sample is read from sample_path unless the texts are passed in.
+    """
+    with open(vectorizer_path , 'rb') as file:
+        vectorizer = pickle.load(file)
+    if not hasattr(vectorizer , 'vocabulary_'):
+        logging.warning('%s has no vocabulary (hashing features), lean export skipped', vectorizer_path)
+        mark_lean_skipped(out_dir , 'hashing features have no vocabulary')
+        return
+    export_lean_model(clf , vectorizer , out_dir)
+    # replaces the marker a skipped export may have left in out_dir
+    with open(os.path.join(out_dir , 'export.json') , 'w') as file:
+        json.dump({'exported': True} , file , indent = 2)
+    if texts is None:
+        texts = read_frame(sample_path)['review']
+    texts = texts.fillna('').head(sample_rows)
+    try:
+        check_parity(clf , vectorizer , LeanModel.load(out_dir) , texts)
+    except ValueError as e:
+        logging.warning('Lean model parity check failed for %s : %s', out_dir, e)
+
+
 def main():
     try:
-        train_data = load_data('./data/processed/train_bow.csv')
-        X_train = train_data.iloc[:, :-1].values
-        y_train = train_data.iloc[:, -1].values
+        all_params = load_params('params.yaml')
+        params = all_params.get('model_building', {})
+        train_path = './data/processed/train_bow.npz'
 
-        clf = train_model(X_train, y_train)
+        if params.get('mode', 'batch') == 'incremental':
+            clf = train_model_incremental(train_path, params)
+        else:
+            X_train , y_train = load_sparse(train_path)
+            clf = train_model(X_train, y_train)
         
         save_model(clf, 'models/model.pkl')
+
+        lean_dir = params.get('lean_model_dir') or LEAN_MODEL_DIR
+        if params.get('lean_export', True):
+            fmt = all_params.get('artifacts', {}).get('format', 'csv')
+            export_lean(clf , lean_dir , 'models/vectorizer.pkl' ,
+                        artifact_path("data/interim", "test_processed", fmt))
+        else:
+            mark_lean_skipped(lean_dir , 'lean export is off')
+        write_report('model_building')
     except Exception as e:
         logging.info("failed to complete the model building process ")
         raise 
@@ -1,42 +1,42 @@
 import numpy as np 
-import pandas as pd 
 import pickle
 import json 
 from sklearn.metrics import accuracy_score , precision_score , recall_score , roc_auc_score 
 import logging 
-import mlflow
-import dagshub 
-import mlflow.sklearn 
 from src.logger import logging 
+from src.features.sparse_io import load_sparse
+from src.profiler import profiled, write_report
 import os 
+import time
 
 
-# set up the dagshub credentials using mlflow tracking 
-dagshub_token = os.getenv("CAPSTONE TEST")
-if not dagshub_token:
-    raise EnvironmentError("CAPSTONE_TEST environment variable is not set")
-
-os.environ["MLFLOW_TRACKING_USERNAME"] = dagshub_token
-os.environ["MLFLOW_TRACKING_PASSWORD"] = dagshub_token
-
 dagshub_url = "https://dagshub.com"
 repo_owner = "arpit09"
 repo_name = "YT-Capstone-Project"
+# local MLflow file store, used when there are no dagshub credentials
+fallback_uri = "file:./mlruns"
 
 
+def setup_tracking() -> str:
+    """
+    set up the dagshub credentials for mlflow and return the tracking uri (done by main, not at import).
+    Without CAPSTONE_TEST the run is logged to the local fallback_uri store.
+    """
+    dagshub_token = os.getenv("CAPSTONE_TEST")
+    if not dagshub_token:
+        logging.warning("CAPSTONE_TEST environment variable is not set, logging to %s", fallback_uri)
+        return fallback_uri
 
-
-# Set up MLflow tracking URI
-mlflow.set_tracking_uri(f'{dagshub_url}/{repo_owner}/{repo_name}.mlflow')
-
-# below  code is for local use 
+    os.environ["MLFLOW_TRACKING_USERNAME"] = dagshub_token
+    os.environ["MLFLOW_TRACKING_PASSWORD"] = dagshub_token
+    return f'{dagshub_url}/{repo_owner}/{repo_name}.mlflow'
 
 
 
 def load_model(file_path : str):
     """Load the model Logistic model """
     try:
-        with open(file_path , 'r') as file:
+        with open(file_path , 'rb') as file:
             model = pickle.load(file)
         logging.info("loaded the model")
         return model 
@@ -48,21 +48,9 @@ def load_model(file_path : str):
         raise 
 
 
-def load_data(file_path : str)-> pd.DataFrame:
-    """ Load the data from the csv file """
-    try:
-        df = pd.read_csv(file_path)
-        logging.info('Data loaded from %s', file_path)
-        return df
-    except pd.errors.ParserError as e:
-        logging.error('Failed to parse the CSV file: %s', e)
-        raise
-    except Exception as e:
-        logging.error('Unexpected error occurred while loading the data: %s', e)
-        raise
-
-def evaluate_model(clf, X_test:np.ndarray , y_test :np.ndarray) -> dict:
-    """ Evaluate the model and return the evaluation metrics """
+@profiled(rows = lambda metrics , clf , X_test , *args , **kwargs: X_test.shape[0])
+def evaluate_model(clf, X_test , y_test :np.ndarray) -> dict:
+    """ Evaluate the model and return the evaluation metrics (X_test can be dense or scipy sparse) """
     try: 
         y_pred = clf.predict(X_test)
         y_pred_proba = clf.predict_proba(X_test)[:,1]
@@ -88,6 +76,7 @@ def evaluate_model(clf, X_test:np.ndarray , y_test :np.ndarray) -> dict:
 def save_metrics(metrics : dict , file_path : str )-> None:
     """ save the evaluation metrics  with  the json file """
     try:
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
         with open(file_path, 'w') as file:
             json.dump(metrics, file, indent=4)
         logging.info('Metrics saved to %s', file_path)
@@ -101,48 +90,59 @@ def save_model_info(run_id : str , model_path : str , file_path : str)-> None:
         model_info = {'run_id' : run_id , 'model_path' : model_path}
         with open(file_path , 'w') as file:
             json.dump(model_info , file , indent = 4)
-        logging.info*('saved the model info %s',file_path)
+        logging.info('saved the model info %s',file_path)
 
     except Exception as e:
         logging.error("Error occured while saving the model ")
         raise 
 
+def log_evaluation(tracker , run_id : str , clf , metrics : dict , metrics_path : str = 'reports/metrics.json') -> None:
+    """log the metrics, params and model of a finished evaluation to the run, then end it"""
+    # metrics and params go out as one log_batch in the background
+    tracker.log_metrics(run_id , metrics)
+    if hasattr(clf, 'get_params'):
+        tracker.log_params(run_id , clf.get_params())
+
+    # Log model to MLflow
+    tracker.log_sklearn_model(run_id , clf , "model")
+
+    # Save model info
+    save_model_info(run_id, "model", 'reports/experiment_info.json')
+
+    # Log the metrics file to MLflow
+    tracker.log_artifact(run_id , metrics_path)
+    tracker.end_run(run_id)
+
+
 def main():
-    mlflow.set_experiment("my-dvc pipeline")
-    with mlflow.start_run() as run:
-        try:
-            clf = load_model('./models/models.pkl')
-            test_data = load_data('./data/processed/test_bow.csv')
-
-            X_test = test_data.iloc[:,:-1].values
-            y_test = test_data.iloc[: , -1].values 
-
-            metrics = evaluate_model(clf, X_test , y_test)
-            save_metrics(metrics, 'reports/metrics.json')
-
-            # log the metrics 
-            with metric_name , metric_value in metrics.items():
-                mlflow.log_metrics(metric_name , metric_value)
-
-            # Log model parameters to MLflow
-            if hasattr(clf, 'get_params'):
-                params = clf.get_params()
-                for param_name, param_value in params.items():
-                    mlflow.log_param(param_name, param_value)
-            
-            # Log model to MLflow
-            mlflow.sklearn.log_model(clf, "model")
-            
-            # Save model info
-            save_model_info(run.info.run_id, "model", 'reports/experiment_info.json')
-            
-            # Log the metrics file to MLflow
-            mlflow.log_artifact('reports/metrics.json')
-
-
-        except Exception as e:
-            logging.error('Failed to complete the model evaluation process: %s', e)
-            print(f"Error: {e}")
+    stage_start = time.perf_counter()
+    # mlflow is only imported by the stage that logs to it
+    from src.connections.mlflow_connection import AsyncMlflowLogger
+    tracker = AsyncMlflowLogger(setup_tracking() , fallback_uri = fallback_uri)
+    run_id = None
+    try:
+        run_id = tracker.start_run("my-dvc pipeline")
+        clf = load_model('./models/model.pkl')
+        X_test , y_test = load_sparse('./data/processed/test_bow.npz')
+
+        metrics = evaluate_model(clf, X_test , y_test)
+        save_metrics(metrics, 'reports/metrics.json')
+        log_evaluation(tracker , run_id , clf , metrics)
+
+    except Exception as e:
+        logging.error('Failed to complete the model evaluation process: %s', e)
+        print(f"Error: {e}")
+        if run_id is not None:
+            tracker.end_run(run_id , 'FAILED')
+    finally:
+        tracker.close()
+        timing = tracker.timing()
+        total = time.perf_counter() - stage_start
+        logging.info('Evaluation stage %.2fs : %.2fs model work, %.2fs blocked on MLflow logging '
+                     '(%.2fs sent in the background, %d batches, %d failed)',
+                     total, total - timing['blocking_s'], timing['blocking_s'], timing['background_s'],
+                     timing['batches'], timing['failed'])
+        write_report('model_evaluation')
 
 
 if __name__ == "__main__":
@@ -1,28 +1,28 @@
 import json 
-import mlflow 
 import logging 
 from src.logger import logging 
 import os 
-import dagshub 
 
 import warnings
 warnings.simplefilter("ignore", UserWarning)
 warnings.filterwarnings("ignore")
 
 
-# set the dagshub token
-dagshub_token = os.getenv("CAPSTONE_TEST")
-if not dagshub_token:
-    raise EnvironmentError("CAPSTONE_TEST environment variable not set")
-
-os.environ["MLFLOW_TRACKING_USERNAME"] = dagshub_token
-os.environ["MLFLOW_TRACKING_PASSWORD"] = dagshub_token
-
 dagshub_url = "https://dagshub.com"
 repo_owner = "vikashdas770"
 repo_name = "YT-Capstone-Project"
-# Set up MLflow tracking URI
-mlflow.set_tracking_uri(f'{dagshub_url}/{repo_owner}/{repo_name}.mlflow')
+
+
+def setup_tracking() -> None:
+    """set the dagshub token and the MLflow tracking URI (done by main, not at import)"""
+    import mlflow
+    dagshub_token = os.getenv("CAPSTONE_TEST")
+    if not dagshub_token:
+        raise EnvironmentError("CAPSTONE_TEST environment variable not set")
+
+    os.environ["MLFLOW_TRACKING_USERNAME"] = dagshub_token
+    os.environ["MLFLOW_TRACKING_PASSWORD"] = dagshub_token
+    mlflow.set_tracking_uri(f'{dagshub_url}/{repo_owner}/{repo_name}.mlflow')
 
 def load_model_info(file_path : str) -> dict:
     """Load the model of the json file"""
@@ -41,6 +41,7 @@ def load_model_info(file_path : str) -> dict:
 def register_model(model_name : str , model_info : dict):
     """register the model to the mlflow model registry """
     try:
+        import mlflow
         model_uri = f"runs:/{model_info['run_id']}/{model_info['model_path']}"
 
         # register the model 
@@ -61,12 +62,13 @@ def register_model(model_name : str , model_info : dict):
 
 def main():
     try: 
+        setup_tracking()
         model_info_path = 'reports/experiment_info.json'
         model_info = load_model_info(model_info_path)
 
         model_name = "my_model"
 
-        register_model(model_info,model_name)
+        register_model(model_name , model_info)
 
     except Exception as e:
         logging.error('Failed to complete the model registration process: %s', e)
@@ -0,0 +1,150 @@
+# offline batch scoring of unlabeled review files
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import yaml
+from src.logger import logging
+from src.data.artifact_io import iter_frames, open_writer
+from src.data.lemma_cache import LemmaCache
+from src.data.text_normalizer import TextNormalizer
+from src.serving.predictor import load_scorer
+from src.model.sparse_scorer import build_sparse_scorer
+
+
+# per process scorer state (model, vectorizer, normalizer), set by _init_scorer
+_scorer = {}
+
+
+def load_params(params_path : str) -> dict:
+    """load parameters from the yaml file """
+    try:
+        with open(params_path , 'r') as file:
+            params = yaml.safe_load(file)
+        logging.debug('Parameters retrieved from %s' ,params_path)
+        return params
+    except FileNotFoundError:
+        logging.error('file not found: %s',params_path)
+        raise
+    except yaml.YAMLError as e:
+        logging.error("YAML ERROR : %s",e)
+        raise
+
+
+def _init_scorer(model_path : str , vectorizer_path : str , lemma_cache_path : str = None , lemma_cache_size : int = 50000 ,
+                 lean_model_dir : str = None , sparse_scorer : bool = False) -> None:
+    # runs once per process, the chunks then only carry the texts
+    lemma_cache = LemmaCache(max_size = lemma_cache_size)
+    if lemma_cache_path:
+        lemma_cache.load(lemma_cache_path)
+    _scorer['model'] , _scorer['vectorizer'] = load_scorer(model_path , vectorizer_path , lean_model_dir)
+    _scorer['sparse'] = build_sparse_scorer(_scorer['model'] , _scorer['vectorizer']) if sparse_scorer else None
+    _scorer['normalizer'] = TextNormalizer(lemma_cache = lemma_cache)
+
+
+def score_frame(df : pd.DataFrame , col : str = 'review' , id_col : str = None) -> pd.DataFrame:
+    """
+    Score one chunk : normalize the whole column, one vectorizer.transform and
+    one predict_proba for all rows.
+
+    Returns:
+        DataFrame with id_col (if given), sentiment (0 / 1) and probability = P(positive)
+    """
+    model , vectorizer , normalizer = _scorer['model'] , _scorer['vectorizer'] , _scorer['normalizer']
+    cleaned = normalizer.normalize_series(df[col]).fillna('')
+    if _scorer['sparse'] is not None:
+        probabilities = _scorer['sparse'].predict_proba(cleaned.to_numpy())[:, 1]
+    else:
+        probabilities = model.predict_proba(vectorizer.transform(cleaned.to_numpy()))[:, 1]
+    result = pd.DataFrame(index = df.index)
+    if id_col:
+        result[id_col] = df[id_col].to_numpy()
+    # same decision rule as clf.predict (decision_function > 0)
+    result['sentiment'] = model.classes_[(probabilities > 0.5).astype(int)]
+    result['probability'] = probabilities
+    return result
+
+
+def predict_file(in_path : str , out_path : str , model_path : str = 'models/model.pkl' ,
+                 vectorizer_path : str = 'models/vectorizer.pkl' , col : str = 'review' , id_col : str = None ,
+                 chunksize : int = 100000 , workers : int = 1 , lemma_cache_path : str = None ,
+                 lemma_cache_size : int = 50000 , lean_model_dir : str = None , sparse_scorer : bool = False) -> int:
+    """
+    Stream an unlabeled CSV / Parquet / Arrow file through the model and
+    append the predictions to out_path chunk by chunk.
+
+    With workers > 1 the chunks are scored on a process pool. At most
+    2 x workers chunks are in flight and results are written in input order,
+    so memory stays bounded by a few chunks whatever the file size.
+
+    Returns:
+        number of rows scored
+    """
+    try:
+        start = time.perf_counter()
+        init_args = (model_path , vectorizer_path , lemma_cache_path , lemma_cache_size , lean_model_dir , sparse_scorer)
+        chunks = iter_frames(in_path , chunksize)
+        # an input without rows still gets a predictions file with the usual columns
+        columns = ([id_col] if id_col else []) + ['sentiment' , 'probability']
+        with open_writer(out_path , columns = columns) as writer:
+            if workers == 1:
+                _init_scorer(*init_args)
+                for chunk in chunks:
+                    writer.write(score_frame(chunk , col , id_col))
+            else:
+                workers = workers if workers > 0 else os.cpu_count()
+                with ProcessPoolExecutor(max_workers = workers , initializer = _init_scorer ,
+                                         initargs = init_args) as executor:
+                    in_flight = deque()
+                    for chunk in chunks:
+                        in_flight.append(executor.submit(score_frame , chunk , col , id_col))
+                        if len(in_flight) >= 2 * workers:
+                            writer.write(in_flight.popleft().result())
+                    while in_flight:
+                        writer.write(in_flight.popleft().result())
+        elapsed = time.perf_counter() - start
+        logging.info('Scored %d rows from %s into %s in %.1fs (%.0f rows/s)',
+                     writer.rows, in_path, out_path, elapsed, writer.rows / elapsed if elapsed else 0.0)
+        return writer.rows
+    except Exception as e:
+        logging.error('Failed to score %s: %s', in_path, e)
+        raise
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description = "score an unlabeled review file (csv / parquet / arrow)")
+    parser.add_argument("input", help = "file to score, format from the extension")
+    parser.add_argument("output", help = "predictions file, format from the extension")
+    parser.add_argument("--col", default = None, help = "text column (overrides predict.col)")
+    parser.add_argument("--id-col", default = None, help = "column copied to the output to join the predictions back")
+    parser.add_argument("--chunksize", type = int, default = None, help = "rows per chunk (overrides predict.chunksize)")
+    parser.add_argument("--workers", type = int, default = None,
+                        help = "worker processes (overrides predict.workers, -1 = all cores)")
+    return parser.parse_args()
+
+
+def main():
+    try:
+        args = parse_args()
+        params = load_params('params.yaml').get('predict', {})
+        predict_file(args.input , args.output ,
+                     model_path = params.get('model_path', 'models/model.pkl') ,
+                     vectorizer_path = params.get('vectorizer_path', 'models/vectorizer.pkl') ,
+                     col = args.col or params.get('col', 'review') ,
+                     id_col = args.id_col or params.get('id_col') ,
+                     chunksize = args.chunksize or params.get('chunksize', 100000) ,
+                     workers = args.workers if args.workers is not None else params.get('workers', 1) ,
+                     lemma_cache_path = params.get('lemma_cache_path') ,
+                     lemma_cache_size = params.get('lemma_cache_size', 50000) ,
+                     lean_model_dir = params.get('lean_model_dir') ,
+                     sparse_scorer = params.get('sparse_scorer', False))
+    except Exception as e:
+        logging.error('Batch prediction failed : %s', e)
+        raise
+
+
+if __name__ == "__main__":
+    main()
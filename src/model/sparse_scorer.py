@@ -0,0 +1,76 @@
+from itertools import repeat
+
+import numpy as np
+from src.logger import logging
+from src.model.lean_model import LeanModel, WordAnalyzer, analyzer_config
+
+
+class SparseScorer:
+    """
+    Text -> P(positive) scorer for the L1 logistic model.
+
+    Only the tokens with a non-zero coefficient are kept, in one dict. A text
+    is tokenized and its weights are summed in one pass (C-level map over the
+    tokens), with no document-term matrix and no dense dot product. Tokens
+    outside the dict weigh 0, exactly as they do in coef_ @ x.
+    """
+
+    def __init__(self , weights : dict , intercept : float , classes , config : dict):
+        self.weights = weights
+        self.intercept = float(intercept)
+        self.classes_ = np.asarray(classes)
+        self.analyze = WordAnalyzer(config)
+        self.binary = config['binary']
+        # plain unigram analyzer : tokenize inline, skip the analyzer call
+        self._unigram_only = list(config['ngram_range']) == [1 , 1] and not config['stop_words']
+
+    @classmethod
+    def from_lean(cls , lean : LeanModel) -> 'SparseScorer':
+        coef = lean.coef[np.asarray(lean.vocab_index)]
+        keep = np.flatnonzero(coef)
+        weights = dict(zip(np.asarray(lean.vocab)[keep].tolist() , coef[keep].tolist()))
+        logging.info('Sparse scorer : %d of %d tokens have a non-zero weight', len(weights), len(lean.vocab))
+        return cls(weights , lean.intercept , lean.classes_ , lean.analyzer_config)
+
+    @classmethod
+    def from_sklearn(cls , model , vectorizer) -> 'SparseScorer':
+        coef = np.asarray(model.coef_)
+        if coef.shape[0] != 1:
+            raise ValueError(f'only binary classifiers are supported, coef_ has shape {coef.shape}')
+        config = analyzer_config(vectorizer)
+        weights = {token: float(coef[0 , column]) for token , column in vectorizer.vocabulary_.items() if coef[0 , column] != 0}
+        return cls(weights , np.ravel(model.intercept_)[0] , model.classes_ , config)
+
+    @classmethod
+    def from_model(cls , model , vectorizer) -> 'SparseScorer':
+        """from whatever load_scorer returned (lean export or pickles)"""
+        if isinstance(model , LeanModel):
+            return cls.from_lean(model)
+        return cls.from_sklearn(model , vectorizer)
+
+    def decision_function(self , texts) -> np.ndarray:
+        get = self.weights.get
+        if self._unigram_only and not self.binary:
+            lowercase , findall = self.analyze.lowercase , self.analyze.token_pattern.findall
+            scores = [sum(map(get , findall(text.lower() if lowercase else text) , repeat(0.0))) for text in texts]
+        elif self.binary:
+            scores = [sum(map(get , set(self.analyze(text)) , repeat(0.0))) for text in texts]
+        else:
+            scores = [sum(map(get , self.analyze(text) , repeat(0.0))) for text in texts]
+        return np.asarray(scores , dtype = np.float64) + self.intercept
+
+    def predict_proba(self , texts) -> np.ndarray:
+        probability = 1.0 / (1.0 + np.exp(-self.decision_function(texts)))
+        return np.column_stack([1 - probability , probability])
+
+    def predict(self , texts) -> np.ndarray:
+        return self.classes_[(self.decision_function(texts) > 0).astype(int)]
+
+
+def build_sparse_scorer(model , vectorizer):
+    """SparseScorer.from_model, or None (with a warning) when the vectorizer is not supported"""
+    try:
+        return SparseScorer.from_model(model , vectorizer)
+    except ValueError as e:
+        logging.warning('Sparse scorer disabled, falling back to transform + predict_proba : %s', e)
+        return None
@@ -0,0 +1,179 @@
+"""
+Run the dvc stages (data_ingestion -> data_preprocessing -> feature_engineering
+-> model_building -> model_evaluation) in one process.
+
+The DataFrames and sparse matrices are handed from one stage to the next in
+memory instead of going through data/raw, data/interim and data/processed,
+and the libraries are imported once. Same params.yaml, same functions and
+same outputs as the separate stages : with pipeline.persist the dvc tracked
+outputs are written too, `dvc commit` then records them so a following
+`dvc repro` has nothing to re-run. models/ and reports/metrics.json are
+always written.
+
+usage : python -m src.pipeline.run_pipeline [--no-persist] [--mlflow] [--workers N]
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+import yaml
+from src.logger import logging
+from src.data.artifact_io import open_writer, artifact_path
+from src.data.data_ingestion import source_chunks, split_chunks
+from src.data.data_preprocessing import open_normalizer, preprocess_dataframe
+from src.features.feature_engineering import build_features
+from src.features.sparse_io import save_sparse
+from src.model.model_building import train_model, train_model_incremental, save_model, export_lean, \
+    mark_lean_skipped, LEAN_MODEL_DIR
+from src.model.model_evaluation import evaluate_model, save_metrics
+from src.profiler import profile_section, write_report
+
+
+def load_params(params_path : str) -> dict:
+    """load parameters from the yaml file """
+    try:
+        with open(params_path , 'r') as file:
+            params = yaml.safe_load(file)
+        logging.debug('Parameters retrieved from %s' ,params_path)
+        return params
+    except FileNotFoundError:
+        logging.error('file not found: %s',params_path)
+        raise
+    except yaml.YAMLError as e:
+        logging.error("YAML ERROR : %s",e)
+        raise
+    except Exception as e:
+        logging.error('Unexpected Error : %s',e)
+        raise
+
+
+def save_frame(df : pd.DataFrame , file_path : str) -> None:
+    """write a whole DataFrame as an artifact (format from the extension)"""
+    with open_writer(file_path) as writer:
+        writer.write(df)
+    logging.info('Saved %d rows to %s', writer.rows, file_path)
+
+
+def ingest(params : dict , fmt : str , persist : bool) -> tuple:
+    """data_ingestion : the filtered train / test split of the source, kept in memory"""
+    train_parts , test_parts = [] , []
+    for train_part , test_part in split_chunks(source_chunks(params) , params['test_size'] , random_state = 42):
+        train_parts.append(train_part)
+        test_parts.append(test_part)
+    # a fresh index, like the frames read back from data/raw
+    train_data = pd.concat(train_parts , ignore_index = True)
+    test_data = pd.concat(test_parts , ignore_index = True)
+    if persist:
+        save_frame(train_data , artifact_path(os.path.join("data", "raw") , "train" , fmt))
+        save_frame(test_data , artifact_path(os.path.join("data", "raw") , "test" , fmt))
+    return train_data , test_data
+
+
+def preprocess(params : dict , train_data : pd.DataFrame , test_data : pd.DataFrame ,
+               fmt : str , persist : bool , workers : int = None) -> tuple:
+    """data_preprocessing : both splits through one normalizer (and worker pool)"""
+    with open_normalizer(params , workers) as normalizer:
+        train_data = preprocess_dataframe(train_data , "review" , normalizer)
+        test_data = preprocess_dataframe(test_data , "review" , normalizer)
+    if persist:
+        save_frame(train_data , artifact_path(os.path.join("data", "interim") , "train_processed" , fmt))
+        save_frame(test_data , artifact_path(os.path.join("data", "interim") , "test_processed" , fmt))
+    # texts normalized to nothing are read back as NaN by the next stage, then filled with ''
+    return train_data.fillna('') , test_data.fillna('')
+
+
+def run_pipeline(params : dict , persist : bool = True , log_to_mlflow : bool = False , workers : int = None) -> dict:
+    """run the five stages in this process, returns the evaluation metrics"""
+    fmt = params.get('artifacts', {}).get('format', 'csv')
+    build_params = params.get('model_building', {})
+    train_path = os.path.join("./data", "processed", "train_bow.npz")
+    test_path = os.path.join("./data", "processed", "test_bow.npz")
+
+    with profile_section('data_ingestion') as record:
+        train_data , test_data = ingest(params['data_ingestion'] , fmt , persist)
+        record['rows'] = len(train_data) + len(test_data)
+
+    with profile_section('data_preprocessing') as record:
+        train_data , test_data = preprocess(params.get('data_preprocessing', {}) , train_data , test_data ,
+                                            fmt , persist , workers)
+        record['rows'] = len(train_data) + len(test_data)
+
+    with profile_section('feature_engineering') as record:
+        (X_train , y_train) , (X_test , y_test) = build_features(params['feature_engineering'] , train_data , test_data)
+        record['rows'] = X_train.shape[0] + X_test.shape[0]
+        incremental = build_params.get('mode', 'batch') == 'incremental'
+        if persist or incremental:
+            # the incremental trainer streams its blocks from the npz file
+            save_sparse(X_train , y_train , train_path)
+            save_sparse(X_test , y_test , test_path)
+
+    with profile_section('model_building' , rows = X_train.shape[0]):
+        if incremental:
+            clf = train_model_incremental(train_path , build_params)
+        else:
+            clf = train_model(X_train , y_train)
+        save_model(clf , 'models/model.pkl')
+        lean_dir = build_params.get('lean_model_dir') or LEAN_MODEL_DIR
+        if build_params.get('lean_export', True):
+            export_lean(clf , lean_dir , 'models/vectorizer.pkl' , texts = test_data['review'])
+        else:
+            mark_lean_skipped(lean_dir , 'lean export is off')
+
+    with profile_section('model_evaluation' , rows = X_test.shape[0]):
+        metrics = evaluate_model(clf , X_test , y_test)
+        save_metrics(metrics , 'reports/metrics.json')
+        if log_to_mlflow:
+            log_run(clf , metrics)
+    return metrics
+
+
+def log_run(clf , metrics : dict) -> None:
+    """log the evaluation to MLflow like the model_evaluation stage does"""
+    # mlflow is only imported when the run is logged
+    from src.connections.mlflow_connection import AsyncMlflowLogger
+    from src.model.model_evaluation import setup_tracking, log_evaluation
+    tracker = AsyncMlflowLogger(setup_tracking())
+    run_id = None
+    try:
+        run_id = tracker.start_run("my-dvc pipeline")
+        log_evaluation(tracker , run_id , clf , metrics)
+    except Exception as e:
+        logging.error('Failed to log the pipeline run to MLflow: %s', e)
+        if run_id is not None:
+            tracker.end_run(run_id , 'FAILED')
+        raise
+    finally:
+        tracker.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description = 'run the dvc stages in one process, data kept in memory between them')
+    parser.add_argument('--no-persist' , action = 'store_true' ,
+                        help = 'do not write data/raw, data/interim and data/processed (overrides pipeline.persist)')
+    parser.add_argument('--mlflow' , action = 'store_true' ,
+                        help = 'log the evaluation to MLflow (overrides pipeline.log_to_mlflow)')
+    parser.add_argument('--workers' , type = int , default = None ,
+                        help = 'text normalization workers (overrides data_preprocessing.workers)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    try:
+        params = load_params('params.yaml')
+        config = params.get('pipeline', {})
+        persist = config.get('persist', True) and not args.no_persist
+        log_to_mlflow = config.get('log_to_mlflow', False) or args.mlflow
+
+        metrics = run_pipeline(params , persist = persist , log_to_mlflow = log_to_mlflow , workers = args.workers)
+        logging.info('Pipeline finished in %.2fs (persist=%s) : %s', time.perf_counter() - start, persist, metrics)
+        write_report('run_pipeline')
+    except Exception as e:
+        logging.error('failed to run the pipeline : %s', e)
+        raise
+
+
+if __name__ == "__main__":
+    main()
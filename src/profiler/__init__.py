@@ -0,0 +1,221 @@
+"""
+Lightweight per-stage instrumentation.
+
+    @profiled()                                   # decorator
+    def apply_bow(...): ...
+
+    with profile_section('fetch') as record:      # context manager
+        data = fetch()
+        record['bytes_read'] = len(data)
+
+Each call records wall time, CPU time, rows (and rows/s), bytes read /
+written by the process and memory : the RSS change over the section, how
+much the section raised the process high-water mark (peak_rss_growth_mb,
+0 when it stayed below an earlier peak) and that lifetime high-water mark
+itself (process_peak_rss_mb, the same for every section after the largest
+one). The stage main() then calls
+write_report('<stage>') to merge its sections into reports/profile.json
+next to reports/metrics.json.
+
+Setting PIPELINE_CPROFILE to a comma separated list of section names (or
+'all') also runs those sections under cProfile and dumps one pstats file
+per section in reports/profile/ (snakeviz, pstats, gprof2dot ...). For a
+sampling profile of a whole stage use py-spy from the outside :
+py-spy record -o profile.svg -- python src/model/model_building.py
+"""
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+from src.logger import logging
+
+
+REPORT_PATH = os.path.join('reports', 'profile.json')
+CPROFILE_DIR = os.path.join('reports', 'profile')
+
+_records = []
+_profiles = {}
+_lock = threading.Lock()
+# one cProfile profiler at a time per process (python 3.12 refuses a second one)
+_cprofile_busy = False
+
+
+def _cprofile_sections() -> set:
+    value = os.getenv('PIPELINE_CPROFILE', '')
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def _io_counters() -> tuple:
+    """(bytes read, bytes written) by this process so far, files and sockets (linux only)"""
+    try:
+        with open('/proc/self/io') as file:
+            counters = dict(line.split(':') for line in file.read().splitlines())
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _rss_mb() -> float:
+    try:
+        with open('/proc/self/statm') as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macOS
+    return peak / 1024 ** 2 if os.uname().sysname == 'Darwin' else peak / 1024
+
+
+def _count_rows(result):
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    shape = getattr(result, 'shape', None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+@contextmanager
+def profile_section(name: str, rows: int = None):
+    """
+    Record one timed section. The yielded dict can be filled in by the caller
+    (rows, bytes_read, bytes_written or any extra field).
+    """
+    global _cprofile_busy
+    record = {'name': name, 'rows': rows}
+    cpu_start = time.process_time()
+    read_start, written_start = _io_counters()
+    rss_start = _rss_mb()
+    peak_start = _peak_rss_mb()
+
+    profiler = None
+    sections = _cprofile_sections()
+    if name in sections or 'all' in sections:
+        with _lock:
+            # nested / concurrent sections are covered by the outer profiler
+            if not _cprofile_busy:
+                _cprofile_busy = True
+                profiler = _profiles.setdefault(name, cProfile.Profile())
+        if profiler is not None:
+            profiler.enable()
+
+    wall_start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        wall = time.perf_counter() - wall_start
+        if profiler is not None:
+            profiler.disable()
+            with _lock:
+                _cprofile_busy = False
+        read_end, written_end = _io_counters()
+        rss_end = _rss_mb()
+        record['wall_s'] = wall
+        record['cpu_s'] = time.process_time() - cpu_start
+        if read_start is not None:
+            record.setdefault('bytes_read', read_end - read_start)
+            record.setdefault('bytes_written', written_end - written_start)
+        record['rss_delta_mb'] = rss_end - rss_start if rss_start is not None else None
+        # ru_maxrss is the lifetime high-water mark of the process, not of the section
+        peak_end = _peak_rss_mb()
+        record['peak_rss_growth_mb'] = peak_end - peak_start if peak_start is not None else None
+        record['process_peak_rss_mb'] = peak_end
+        with _lock:
+            _records.append(record)
+        logging.debug('Profiled %s : %.3fs wall, %.3fs cpu, %s rows', name, wall, record['cpu_s'], record['rows'])
+
+
+def profiled(name: str = None, rows=None):
+    """
+    Decorator form of profile_section.
+
+    Args :
+        name : section name, defaults to the function name
+        rows : callable(result, *args, **kwargs) -> number of rows processed,
+               defaults to the result itself (int) or its first dimension
+    """
+    def decorator(func):
+        section = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_section(section) as record:
+                result = func(*args, **kwargs)
+                record['rows'] = rows(result, *args, **kwargs) if rows else _count_rows(result)
+                return result
+        return wrapper
+    return decorator
+
+
+def summary() -> dict:
+    """sections recorded so far, aggregated by name"""
+    with _lock:
+        records = list(_records)
+    sections = {}
+    for record in records:
+        section = sections.setdefault(record['name'], {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': None,
+                                                       'bytes_read': None, 'bytes_written': None,
+                                                       'rss_delta_mb': None, 'peak_rss_growth_mb': None,
+                                                       'process_peak_rss_mb': None})
+        section['calls'] += 1
+        section['wall_s'] += record['wall_s']
+        section['cpu_s'] += record['cpu_s']
+        for key in ('rows', 'bytes_read', 'bytes_written', 'rss_delta_mb', 'peak_rss_growth_mb'):
+            if record.get(key) is not None:
+                section[key] = (section[key] or 0) + record[key]
+        if record.get('process_peak_rss_mb') is not None:
+            section['process_peak_rss_mb'] = max(section['process_peak_rss_mb'] or 0, record['process_peak_rss_mb'])
+    for section in sections.values():
+        section['rows_per_s'] = section['rows'] / section['wall_s'] if section['rows'] and section['wall_s'] else None
+        for key in ('wall_s', 'cpu_s', 'rss_delta_mb', 'peak_rss_growth_mb', 'process_peak_rss_mb', 'rows_per_s'):
+            if section[key] is not None:
+                section[key] = round(section[key], 4)
+    return sections
+
+
+def write_report(stage: str, path: str = REPORT_PATH) -> dict:
+    """
+    Merge this stage's sections into the run report (one entry per stage,
+    replaced on every run) and dump the cProfile stats, if any.
+    """
+    try:
+        report = {}
+        if os.path.exists(path):
+            with open(path) as file:
+                report = json.load(file)
+        stages = report.setdefault('stages', {})
+        stages[stage] = {'run_at': datetime.now().isoformat(timespec='seconds'), 'sections': summary()}
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(report, file, indent=4)
+        os.replace(path + '.tmp', path)
+
+        with _lock:
+            profiles = dict(_profiles)
+        if profiles:
+            os.makedirs(CPROFILE_DIR, exist_ok=True)
+            for name, profiler in profiles.items():
+                profiler.dump_stats(os.path.join(CPROFILE_DIR, f'{stage}.{name}.prof'))
+        logging.info('Profile of %s written to %s', stage, path)
+        return stages[stage]
+    except Exception as e:
+        # profiling must never fail a stage
+        logging.error('Could not write the profile report: %s', e)
+        return None
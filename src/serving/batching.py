@@ -0,0 +1,137 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+from src.logger import logging
+
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Request-coalescing scheduler.
+
+    Callers submit single texts and get a Future back. A background thread
+    collects queued texts until max_batch_size items are waiting or the
+    oldest one has waited max_wait_ms, runs predict_fn once on the whole
+    batch (one vectorizer.transform + predict_proba) and fans the results
+    back out to the waiting futures. Futures cancelled while queued are
+    skipped, a failed batch fails each of its futures and the thread keeps
+    serving the next ones.
+    """
+
+    def __init__(self, predict_fn , max_batch_size : int = 64 , max_wait_ms : float = 2.0):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be >= 1, got {max_batch_size}")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target = self._run , name = 'micro-batcher' , daemon = True)
+        self._thread.start()
+        logging.info('Micro-batcher started (max_batch_size=%d, max_wait_ms=%s)', max_batch_size, max_wait_ms)
+
+    def submit(self , text : str) -> Future:
+        """queue one text, the future resolves to predict_fn([text])[0]"""
+        if self._closed:
+            raise RuntimeError('MicroBatcher is closed')
+        future = Future()
+        self._queue.put((text , future))
+        return future
+
+    def predict(self , text : str , timeout : float = None):
+        """blocking helper : submit and wait for the result"""
+        return self.submit(text).result(timeout)
+
+    def _collect(self , first) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout = remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # finish this batch, then stop
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    @staticmethod
+    def _resolve(future : Future , result = None , error : Exception = None) -> None:
+        # the caller may have given up on the future meanwhile, that must not stop the thread
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
+
+    def _process(self , batch : list) -> None:
+        # cancelled futures are dropped, the others can no longer be cancelled
+        batch = [(text , future) for text , future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            results = list(self.predict_fn([text for text , _ in batch]))
+            if len(results) != len(batch):
+                raise RuntimeError(f'predict_fn returned {len(results)} results for {len(batch)} inputs')
+        except Exception as e:
+            logging.error('Batch of %d failed: %s', len(batch), e)
+            for _ , future in batch:
+                self._resolve(future , error = e)
+            return
+        self.batches += 1
+        self.items += len(batch)
+        for (_ , future) , result in zip(batch , results):
+            self._resolve(future , result)
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                self._fail_pending()
+                return
+            batch = self._collect(first)
+            try:
+                self._process(batch)
+            except Exception as e:
+                # never leave the loop : later requests would wait forever
+                logging.error('Micro-batcher error: %s', e)
+                for _ , future in batch:
+                    self._resolve(future , error = e)
+
+    def _fail_pending(self) -> None:
+        # requests that raced with close() would otherwise wait forever
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP:
+                self._resolve(item[1] , error = RuntimeError('MicroBatcher is closed'))
+
+    def stats(self) -> dict:
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'queued': self._queue.qsize()
+        }
+
+    def close(self) -> None:
+        """drain the queued requests and stop the background thread"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
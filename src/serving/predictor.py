@@ -0,0 +1,140 @@
+import os
+import pickle
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from src.logger import logging
+from src.data.lemma_cache import LemmaCache
+from src.data.text_normalizer import TextNormalizer
+from src.model.lean_model import LeanModel
+from src.model.sparse_scorer import build_sparse_scorer
+
+
+LABELS = {0: 'negative', 1: 'positive'}
+
+
+def load_object(file_path : str):
+    """Load a pickled model / vectorizer """
+    try:
+        with open(file_path , 'rb') as file:
+            obj = pickle.load(file)
+        logging.info('Loaded %s', file_path)
+        return obj
+    except FileNotFoundError:
+        logging.error('File not found: %s', file_path)
+        raise
+    except Exception as e:
+        logging.error('Could not load %s: %s', file_path, e)
+        raise
+
+
+def load_scorer(model_path : str , vectorizer_path : str , lean_model_dir : str = None) -> tuple:
+    """
+    (model, vectorizer) for scoring. The lean export plays both roles and
+    loads without unpickling the vocabulary, the pickles are the fallback.
+    """
+    if lean_model_dir and os.path.exists(os.path.join(lean_model_dir , 'meta.json')):
+        lean = LeanModel.load(lean_model_dir)
+        return lean , lean
+    return load_object(model_path) , load_object(vectorizer_path)
+
+
+class LatencyTracker:
+    """Sliding window of latencies with p50 / p99 summaries (thread safe)"""
+
+    def __init__(self, window : int = 10000):
+        self._samples = deque(maxlen = window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds : float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self.count = 0
+
+    def summary(self) -> dict:
+        with self._lock:
+            samples = np.fromiter(self._samples , dtype = float)
+            count = self.count
+        if len(samples) == 0:
+            return {'count': count, 'p50_ms': None, 'p99_ms': None}
+        p50 , p99 = np.percentile(samples , [50 , 99]) * 1000
+        return {'count': count, 'p50_ms': round(float(p50), 4), 'p99_ms': round(float(p99), 4)}
+
+
+class Predictor:
+    """
+    Warm, preloaded sentiment predictor.
+
+    The model, the vectorizer, the stopwords and the WordNet corpus are all
+    loaded in the constructor, so a request only pays for normalization,
+    transform and predict_proba. Normalization is the same as
+    preprocess_dataframe (TextNormalizer).
+    """
+
+    def __init__(self, model_path : str = 'models/model.pkl' , vectorizer_path : str = 'models/vectorizer.pkl' ,
+                 lemma_cache_path : str = None , lemma_cache_size : int = 50000 , latency_window : int = 10000 ,
+                 lean_model_dir : str = None , sparse_scorer : bool = False):
+        self.model , self.vectorizer = load_scorer(model_path , vectorizer_path , lean_model_dir)
+        # non-zero weights only, texts are scored without building a feature matrix
+        self.scorer = build_sparse_scorer(self.model , self.vectorizer) if sparse_scorer else None
+
+        lemma_cache = LemmaCache(max_size = lemma_cache_size)
+        if lemma_cache_path:
+            lemma_cache.load(lemma_cache_path)
+        self.normalizer = TextNormalizer(lemma_cache = lemma_cache)
+
+        # model_time is per review (transform + predict_proba / batch size)
+        self.latency = {
+            'model_time_per_review': LatencyTracker(latency_window),
+            'normalize_time_per_review': LatencyTracker(latency_window),
+        }
+
+        # first call loads WordNet and warms sklearn, keep it out of request latency
+        self.predict(['warm up the predictor'])
+        for tracker in self.latency.values():
+            tracker.reset()
+        logging.info('Predictor ready')
+
+    def predict(self , texts : list) -> list:
+        """
+        Predict the sentiment of raw review texts.
+
+        Returns:
+            list of {'sentiment': 0 | 1, 'label': str, 'probability': float}
+            where probability is P(positive)
+        """
+        try:
+            start = time.perf_counter()
+            normalize = self.normalizer.normalize_text
+            cleaned = [normalize(text) for text in texts]
+            normalized = time.perf_counter()
+
+            if self.scorer is not None:
+                probabilities = self.scorer.predict_proba(cleaned)[:, 1]
+            else:
+                features = self.vectorizer.transform(cleaned)
+                probabilities = self.model.predict_proba(features)[:, 1]
+            done = time.perf_counter()
+
+            n = max(len(texts) , 1)
+            self.latency['normalize_time_per_review'].record((normalized - start) / n)
+            self.latency['model_time_per_review'].record((done - normalized) / n)
+
+            # same decision rule as clf.predict (decision_function > 0)
+            sentiments = self.model.classes_[(probabilities > 0.5).astype(int)]
+            return [{'sentiment': int(sentiment), 'label': LABELS[int(sentiment)], 'probability': float(probability)}
+                    for sentiment , probability in zip(sentiments , probabilities)]
+        except Exception as e:
+            logging.error('Prediction failed: %s', e)
+            raise
+
+    def metrics(self) -> dict:
+        return {name: tracker.summary() for name , tracker in self.latency.items()}
@@ -0,0 +1,24 @@
+import multiprocessing
+
+import pytest
+
+
+# worker processes only see the monkeypatched NLTK stand-ins when they are forked
+FORKED_WORKERS = multiprocessing.get_start_method() == 'fork'
+
+STOP_WORDS = frozenset({'a' , 'an' , 'and' , 'the' , 'is' , 'it' , 'this' , 'of' , 'to' , 'i' , 'was'})
+
+
+class SuffixLemmatizer:
+    """stand-in for WordNetLemmatizer : strips a trailing s"""
+
+    def lemmatize(self , word):
+        return word[:-1] if word.endswith('s') else word
+
+
+@pytest.fixture
+def fake_nltk(monkeypatch):
+    """replace the NLTK corpora (not downloaded on CI machines) by small stand-ins"""
+    monkeypatch.setattr('src.data.text_normalizer.stopwords_set' , lambda language = 'english': STOP_WORDS)
+    monkeypatch.setattr('src.data.lemma_cache.wordnet_lemmatizer' , SuffixLemmatizer)
+    monkeypatch.setattr('src.data.data_preprocessing.ensure_nltk_data' , lambda *args , **kwargs: None)
@@ -0,0 +1,45 @@
+import pickle
+
+import pytest
+import yaml
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from flask_app.app import create_app
+
+
+@pytest.fixture
+def client(tmp_path , fake_nltk):
+    reviews = ['great lovely movie' , 'awful boring movie' , 'superb moving film' , 'dull terrible film']
+    vectorizer = CountVectorizer()
+    model = LogisticRegression().fit(vectorizer.fit_transform(reviews) , [1 , 0 , 1 , 0])
+    model_path , vectorizer_path = tmp_path / 'model.pkl' , tmp_path / 'vectorizer.pkl'
+    model_path.write_bytes(pickle.dumps(model))
+    vectorizer_path.write_bytes(pickle.dumps(vectorizer))
+
+    params_path = tmp_path / 'params.yaml'
+    params_path.write_text(yaml.safe_dump({'serving': {
+        'model_path': str(model_path) , 'vectorizer_path': str(vectorizer_path) ,
+        'lemma_cache_path': None , 'lean_model_dir': None , 'micro_batching': False}}))
+    return create_app(str(params_path)).test_client()
+
+
+@pytest.mark.parametrize('body' , [['great movie'] , 'great movie' , 42 , None , {'text': 'great movie'}])
+def test_predict_rejects_a_body_that_is_not_a_review_object(client , body):
+    response = client.post('/predict' , json = body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+@pytest.mark.parametrize('body' , [['great movie'] , 'great movie' , 42 , None , {'reviews': 'great movie'}])
+def test_predict_batch_rejects_a_body_that_is_not_a_reviews_object(client , body):
+    response = client.post('/predict/batch' , json = body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_predict_and_predict_batch_agree(client):
+    single = client.post('/predict' , json = {'review': 'great lovely movie'})
+    batch = client.post('/predict/batch' , json = {'reviews': ['great lovely movie']})
+    assert single.status_code == batch.status_code == 200
+    assert batch.get_json()['predictions'] == [single.get_json()]
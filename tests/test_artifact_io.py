@@ -0,0 +1,77 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from src.data.artifact_io import FORMATS, artifact_path, open_writer, read_frame, iter_frames
+
+
+def frame(start , rows):
+    return pd.DataFrame({'review': [f'review {i}' for i in range(start , start + rows)],
+                         'score': [i / 2 for i in range(start , start + rows)]})
+
+
+@pytest.mark.parametrize('fmt' , FORMATS)
+def test_chunks_round_trip(tmp_path , fmt):
+    path = artifact_path(str(tmp_path / 'out') , 'train' , fmt)
+    chunks = [frame(0 , 4) , frame(4 , 3) , frame(7 , 5)]
+
+    with open_writer(path) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+
+    expected = pd.concat(chunks , ignore_index = True)
+    assert writer.rows == 12
+    pd.testing.assert_frame_equal(read_frame(path) , expected)
+    read_back = list(iter_frames(path , 5))
+    assert all(len(chunk) <= 5 for chunk in read_back)
+    pd.testing.assert_frame_equal(pd.concat(read_back , ignore_index = True) , expected)
+
+
+@pytest.mark.parametrize('fmt' , ['parquet' , 'arrow'])
+def test_empty_first_chunk_does_not_fix_the_schema(tmp_path , fmt):
+    path = artifact_path(str(tmp_path) , 'test' , fmt)
+    # an empty object column would be typed null, the text chunk after it would not fit
+    empty = pd.DataFrame({'review': pd.Series([] , dtype = object) , 'score': pd.Series([] , dtype = float)})
+
+    with open_writer(path) as writer:
+        writer.write(empty)
+        writer.write(frame(0 , 3))
+        writer.write(empty)
+        writer.write(frame(3 , 2))
+
+    pd.testing.assert_frame_equal(read_frame(path) , frame(0 , 5))
+
+
+@pytest.mark.parametrize('fmt' , ['parquet' , 'arrow'])
+def test_only_empty_chunks_keep_their_schema(tmp_path , fmt):
+    path = artifact_path(str(tmp_path) , 'test' , fmt)
+
+    with open_writer(path) as writer:
+        writer.write(frame(0 , 0))
+
+    result = read_frame(path)
+    assert result.empty
+    assert list(result.columns) == ['review' , 'score']
+
+
+@pytest.mark.parametrize('fmt' , FORMATS)
+def test_no_chunks_still_writes_the_columns(tmp_path , fmt):
+    path = artifact_path(str(tmp_path) , 'predictions' , fmt)
+
+    with open_writer(path , columns = ['id' , 'sentiment' , 'probability']) as writer:
+        pass
+
+    assert writer.rows == 0
+    result = read_frame(path)
+    assert result.empty
+    assert list(result.columns) == ['id' , 'sentiment' , 'probability']
+    assert all(chunk.empty for chunk in iter_frames(path , 10))
+
+
+def test_no_chunks_without_columns_is_a_valid_parquet_file(tmp_path):
+    path = str(tmp_path / 'empty.parquet')
+
+    with open_writer(path):
+        pass
+
+    assert pq.read_metadata(path).num_rows == 0
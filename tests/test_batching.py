@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from src.serving.batching import MicroBatcher
+
+
+class GatedPredict:
+    """predict_fn that records its batches and can be held until released"""
+
+    def __init__(self , fn = None):
+        self.fn = fn or (lambda texts: [text.upper() for text in texts])
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+
+    def __call__(self , texts):
+        self.entered.set()
+        self.gate.wait(5)
+        self.batches.append(list(texts))
+        return self.fn(texts)
+
+
+def test_requests_are_coalesced_in_order():
+    predict = GatedPredict()
+    predict.gate.clear()
+    batcher = MicroBatcher(predict , max_batch_size = 4 , max_wait_ms = 50)
+    try:
+        # the first text is taken alone while the thread is held, the rest queue up behind it
+        first = batcher.submit('a')
+        assert predict.entered.wait(5)
+        futures = [batcher.submit(text) for text in 'bcdefg']
+        predict.gate.set()
+
+        assert first.result(5) == 'A'
+        assert [future.result(5) for future in futures] == list('BCDEFG')
+        assert predict.batches == [['a'] , ['b' , 'c' , 'd' , 'e'] , ['f' , 'g']]
+        assert batcher.stats()['items'] == 7
+    finally:
+        batcher.close()
+
+
+def test_cancelled_future_is_skipped():
+    predict = GatedPredict()
+    predict.gate.clear()
+    batcher = MicroBatcher(predict , max_batch_size = 8 , max_wait_ms = 50)
+    try:
+        blocker = batcher.submit('first')
+        assert predict.entered.wait(5)
+        cancelled = batcher.submit('gone')
+        kept = batcher.submit('kept')
+        assert cancelled.cancel()
+        predict.gate.set()
+
+        assert blocker.result(5) == 'FIRST'
+        assert kept.result(5) == 'KEPT'
+        assert ['kept'] in predict.batches
+        # the thread survived and keeps serving
+        assert batcher.predict('again' , timeout = 5) == 'AGAIN'
+    finally:
+        batcher.close()
+
+
+def test_failing_predict_fails_the_batch_only():
+    def predict(texts):
+        if 'bad' in texts:
+            raise ValueError('model error')
+        return [len(text) for text in texts]
+
+    batcher = MicroBatcher(predict , max_batch_size = 1)
+    try:
+        with pytest.raises(ValueError):
+            batcher.predict('bad' , timeout = 5)
+        assert batcher.predict('good' , timeout = 5) == 4
+    finally:
+        batcher.close()
+
+
+def test_short_result_fails_every_waiter():
+    batcher = MicroBatcher(lambda texts: texts[:-1] , max_batch_size = 1)
+    try:
+        with pytest.raises(RuntimeError , match = '0 results for 1 inputs'):
+            batcher.predict('x' , timeout = 5)
+    finally:
+        batcher.close()
+
+
+def test_close_drains_and_rejects_new_requests():
+    predict = GatedPredict()
+    predict.gate.clear()
+    batcher = MicroBatcher(predict , max_batch_size = 2 , max_wait_ms = 1)
+    first = batcher.submit('a')
+    assert predict.entered.wait(5)
+    queued = [batcher.submit(text) for text in 'bc']
+
+    closer = threading.Thread(target = batcher.close)
+    closer.start()
+    predict.gate.set()
+    closer.join(5)
+
+    assert not closer.is_alive()
+    assert first.result(5) == 'A'
+    # queued before close : answered (the last batch is finished) or failed, never left hanging
+    for future in queued:
+        assert future.done()
+    with pytest.raises(RuntimeError):
+        batcher.submit('late')
@@ -0,0 +1,59 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+import yaml
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import MultinomialNB
+
+from src.model import experiment_runner
+from src.model.experiment_runner import run_matrix
+
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))) , 'notebooks ' , 'data.csv')
+
+VECTORIZERS = {'BoW': CountVectorizer(max_features = 200)}
+ALGORITHMS = {'LogisticRegression': LogisticRegression() , 'MultinomialNB': MultinomialNB()}
+
+
+@pytest.fixture
+def sample():
+    df = pd.read_csv(SAMPLE_PATH)
+    df = df[df['sentiment'].isin(['positive' , 'negative'])]
+    return df['review'].fillna('').astype(str) , df['sentiment'].map({'positive': 1 , 'negative': 0}).values
+
+
+def test_two_cell_matrix(sample , tmp_path):
+    texts , labels = sample
+
+    results = run_matrix(texts , labels , VECTORIZERS , ALGORITHMS , cache_dir = str(tmp_path / 'cache'))
+
+    assert [(result['algorithm'] , result['vectorizer']) for result in results] == \
+        [('LogisticRegression' , 'BoW') , ('MultinomialNB' , 'BoW')]
+    for result in results:
+        assert set(result['metrics']) == {'accuracy' , 'precision' , 'recall' , 'f1_score'}
+        assert 0 <= result['metrics']['accuracy'] <= 1
+    # one feature matrix, built once for both algorithms
+    assert len(os.listdir(tmp_path / 'cache')) == 1
+
+
+def test_main_writes_the_results_file(sample , tmp_path , monkeypatch):
+    texts , labels = sample
+    data_path = tmp_path / 'train_processed.csv'
+    pd.DataFrame({'review': texts , 'sentiment': labels}).to_csv(data_path , index = False)
+    (tmp_path / 'params.yaml').write_text(yaml.safe_dump({'experiments': {
+        'data_path': str(data_path) , 'cache_dir': 'cache' , 'workers': 1 ,
+        'results_path': 'reports/experiments.json' , 'log_to_mlflow': False}}))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(experiment_runner , 'VECTORIZERS' , VECTORIZERS)
+    monkeypatch.setattr(experiment_runner , 'ALGORITHMS' , ALGORITHMS)
+
+    experiment_runner.main()
+
+    with open(tmp_path / 'reports' / 'experiments.json') as file:
+        saved = json.load(file)
+    assert [(row['algorithm'] , row['vectorizer']) for row in saved] == \
+        [('LogisticRegression' , 'BoW') , ('MultinomialNB' , 'BoW')]
+    assert all('f1_score' in row['metrics'] for row in saved)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features import feature_engineering
+from src.features.feature_engineering import apply_hashing
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(0)
+    words = np.array(['great' , 'awful' , 'movie' , 'plot' , 'acting' , 'boring' , 'superb'])
+
+    def frame(rows):
+        return pd.DataFrame({'review': [' '.join(rng.choice(words , 5)) for _ in range(rows)] ,
+                             'sentiment': rng.integers(0 , 2 , rows)})
+
+    return frame(50) , frame(20)
+
+
+def count_pools(monkeypatch):
+    pools = []
+    executor = feature_engineering.ProcessPoolExecutor
+
+    def counting(*args , **kwargs):
+        pools.append(kwargs)
+        return executor(*args , **kwargs)
+
+    monkeypatch.setattr(feature_engineering , 'ProcessPoolExecutor' , counting)
+    return pools
+
+
+def test_parallel_hashing_matches_serial(frames , tmp_path , monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    train , test = frames
+    pools = count_pools(monkeypatch)
+
+    (X_serial , _) , (X_test_serial , _) = apply_hashing(train , test , 2 ** 10)
+    (X_parallel , _) , (X_test_parallel , _) = apply_hashing(train , test , 2 ** 10 , workers = 2 , chunk_size = 7)
+
+    # one pool for both splits
+    assert len(pools) == 1
+    assert (X_parallel != X_serial).nnz == 0
+    assert (X_test_parallel != X_test_serial).nnz == 0
+
+
+def test_splits_within_one_chunk_do_not_start_a_pool(frames , tmp_path , monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    train , test = frames
+    pools = count_pools(monkeypatch)
+
+    apply_hashing(train , test , 2 ** 10 , workers = 4 , chunk_size = 100)
+
+    assert pools == []
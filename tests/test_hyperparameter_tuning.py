@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from src.model import hyperparameter_tuning
+from src.model.hyperparameter_tuning import build_features, run_search, cv_runs
+
+
+GRID = {'C': [0.1 , 1 , 10] , 'penalty': ['l1' , 'l2']}
+WORDS = {1: ['great' , 'lovely' , 'superb' , 'moving' , 'fun'] , 0: ['awful' , 'boring' , 'dull' , 'terrible' , 'slow']}
+
+
+def reviews(rows , seed):
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0 , 2 , rows)
+    # a few words of the other label, so the task is not trivially separable
+    texts = [' '.join(list(rng.choice(WORDS[label] , 4)) + list(rng.choice(WORDS[1 - label] , 2)) + ['movie'])
+             for label in labels]
+    return pd.DataFrame({'review': texts , 'sentiment': labels})
+
+
+@pytest.fixture
+def frames():
+    return reviews(120 , 0) , reviews(40 , 1)
+
+
+def test_search_picks_a_candidate_of_the_grid(frames):
+    train , test = frames
+    X_train , _ , _ = build_features(train['review'] , test['review'] , 'bow')
+
+    search = run_search(X_train , train['sentiment'].values , GRID , cv = 3 , factor = 3 , workers = 1)
+
+    assert search.best_params_['C'] in GRID['C']
+    assert search.best_params_['penalty'] in GRID['penalty']
+    runs = cv_runs(search)
+    # every candidate in the first round, fewer in the last one
+    assert sum(run['iteration'] == 0 for run in runs) == 6
+    assert sum(run['iteration'] == search.n_iterations_ - 1 for run in runs) < 6
+
+
+def test_main_writes_the_tuning_results(frames , tmp_path , monkeypatch):
+    train , test = frames
+    (tmp_path / 'data' / 'interim').mkdir(parents = True)
+    train.to_csv(tmp_path / 'data' / 'interim' / 'train_processed.csv' , index = False)
+    test.to_csv(tmp_path / 'data' / 'interim' / 'test_processed.csv' , index = False)
+    (tmp_path / 'params.yaml').write_text(yaml.safe_dump({'tuning': {
+        'vectorizer': 'bow' , 'param_grid': GRID , 'cv': 3 , 'factor': 3 , 'workers': 1 ,
+        'results_path': 'reports/tuning.json' , 'log_to_mlflow': False}}))
+    monkeypatch.chdir(tmp_path)
+
+    hyperparameter_tuning.main()
+
+    with open(tmp_path / 'reports' / 'tuning.json') as file:
+        saved = json.load(file)
+    assert saved['best_params']['C'] in GRID['C']
+    assert saved['best_params']['penalty'] in GRID['penalty']
+    assert set(saved['metrics']) == {'accuracy' , 'precision' , 'recall' , 'f1_score'}
@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from src.model.lean_model import LeanModel, export_lean_model, check_parity
+from src.model.model_building import export_lean
+
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))) , 'notebooks ' , 'data.csv')
+
+VECTORIZER_SETTINGS = {
+    'default': {},
+    'max_features': {'max_features': 50},
+    'ngrams': {'ngram_range': (1 , 2) , 'max_features': 500},
+    'bigrams_only': {'ngram_range': (2 , 2)},
+    'binary': {'binary': True},
+    'stop_words': {'stop_words': 'english'},
+    'combined': {'ngram_range': (1 , 3) , 'binary': True , 'stop_words': 'english' , 'lowercase': False},
+}
+
+
+@pytest.fixture(scope = 'module')
+def sample():
+    df = pd.read_csv(SAMPLE_PATH)
+    labels = df['sentiment'].map({'positive': 1 , 'negative': 0}).values
+    return df['review'].fillna('').tolist() , labels
+
+
+def fit(texts , labels , **settings):
+    vectorizer = CountVectorizer(**settings)
+    X = vectorizer.fit_transform(texts)
+    model = LogisticRegression(C = 1 , solver = 'liblinear' , penalty = 'l1').fit(X , labels)
+    return model , vectorizer
+
+
+@pytest.mark.parametrize('settings' , VECTORIZER_SETTINGS.values() , ids = VECTORIZER_SETTINGS.keys())
+def test_round_trip_matches_pickled_model(sample , tmp_path , settings):
+    texts , labels = sample
+    train , test = texts[:400] , texts[400:] + ['' , 'zzz unseen tokens only' , 'The THE the , movie movie.']
+    model , vectorizer = fit(train , labels[:400] , **settings)
+
+    # the reference objects go through a pickle round trip, like models/model.pkl and vectorizer.pkl
+    model , vectorizer = pickle.loads(pickle.dumps(model)) , pickle.loads(pickle.dumps(vectorizer))
+    export_lean_model(model , vectorizer , str(tmp_path))
+    lean = LeanModel.load(str(tmp_path))
+
+    expected_X = vectorizer.transform(test)
+    X = lean.transform(test)
+    assert X.shape == expected_X.shape
+    assert X.dtype == expected_X.dtype
+    assert (X != expected_X).nnz == 0
+
+    np.testing.assert_allclose(lean.predict_proba(X) , model.predict_proba(expected_X) , rtol = 0 , atol = 1e-12)
+    np.testing.assert_array_equal(lean.predict(X) , model.predict(expected_X))
+    np.testing.assert_array_equal(lean.classes_ , model.classes_)
+
+
+def test_load_without_mmap(sample , tmp_path):
+    texts , labels = sample
+    model , vectorizer = fit(texts , labels)
+    export_lean_model(model , vectorizer , str(tmp_path))
+
+    lean = LeanModel.load(str(tmp_path) , mmap = False)
+
+    assert check_parity(model , vectorizer , lean , texts[:50]) <= 1e-9
+
+
+def test_unsupported_vectorizer_is_rejected(sample , tmp_path):
+    texts , labels = sample
+    model , vectorizer = fit(texts , labels , analyzer = 'char')
+
+    with pytest.raises(ValueError):
+        export_lean_model(model , vectorizer , str(tmp_path))
+
+
+def test_check_parity_detects_a_mismatch(sample , tmp_path):
+    texts , labels = sample
+    model , vectorizer = fit(texts , labels)
+    export_lean_model(model , vectorizer , str(tmp_path))
+    lean = LeanModel.load(str(tmp_path) , mmap = False)
+    lean.intercept += 1.0
+
+    with pytest.raises(ValueError):
+        check_parity(model , vectorizer , lean , texts[:50])
+
+
+def test_export_lean_logs_a_parity_failure(sample , tmp_path , monkeypatch , caplog):
+    texts , labels = sample
+    model , vectorizer = fit(texts , labels)
+    vectorizer_path = tmp_path / 'vectorizer.pkl'
+    vectorizer_path.write_bytes(pickle.dumps(vectorizer))
+
+    def mismatch(*args , **kwargs):
+        raise ValueError('lean model predictions differ')
+
+    monkeypatch.setattr('src.model.model_building.check_parity' , mismatch)
+    with caplog.at_level(logging.WARNING):
+        export_lean(model , str(tmp_path / 'lean') , str(vectorizer_path) , texts = pd.Series(texts[:20]))
+
+    assert os.path.exists(tmp_path / 'lean' / 'meta.json')
+    assert 'parity check failed' in caplog.text
+
+
+def test_skipped_export_replaces_a_stale_one(sample , tmp_path):
+    texts , labels = sample
+    model , vectorizer = fit(texts , labels)
+    export_lean_model(model , vectorizer , str(tmp_path / 'lean'))
+    hashing_path = tmp_path / 'vectorizer.pkl'
+    hashing_path.write_bytes(pickle.dumps(HashingVectorizer(n_features = 2 ** 10)))
+
+    export_lean(model , str(tmp_path / 'lean') , str(hashing_path) , texts = pd.Series(texts[:20]))
+
+    # the directory dvc tracks still exists, with nothing the loaders would pick up
+    assert os.listdir(tmp_path / 'lean') == ['export.json']
+    with open(tmp_path / 'lean' / 'export.json') as file:
+        assert json.load(file)['exported'] is False
+
+
+def test_export_replaces_a_skipped_marker(sample , tmp_path):
+    texts , labels = sample
+    model , vectorizer = fit(texts , labels)
+    hashing_path , vectorizer_path = tmp_path / 'hashing.pkl' , tmp_path / 'vectorizer.pkl'
+    hashing_path.write_bytes(pickle.dumps(HashingVectorizer(n_features = 2 ** 10)))
+    vectorizer_path.write_bytes(pickle.dumps(vectorizer))
+
+    # a hashing run, then a bow run into the same directory
+    export_lean(model , str(tmp_path / 'lean') , str(hashing_path) , texts = pd.Series(texts[:20]))
+    export_lean(model , str(tmp_path / 'lean') , str(vectorizer_path) , texts = pd.Series(texts[:20]))
+
+    with open(tmp_path / 'lean' / 'export.json') as file:
+        assert json.load(file)['exported'] is True
+    assert os.path.exists(tmp_path / 'lean' / 'meta.json')
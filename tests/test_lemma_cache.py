@@ -0,0 +1,76 @@
+import random
+import sys
+import threading
+
+import pytest
+
+from src.data.lemma_cache import LemmaCache
+
+
+class SuffixLemmatizer:
+    """stand-in for WordNetLemmatizer : strips a trailing s"""
+
+    def lemmatize(self , word):
+        return word[:-1] if word.endswith('s') else word
+
+
+def test_lru_eviction():
+    cache = LemmaCache(SuffixLemmatizer() , max_size = 2)
+    cache.lemmatize('cats')
+    cache.lemmatize('dogs')
+    cache.lemmatize('cats')
+    cache.lemmatize('birds')
+
+    assert cache.entries() == {'cats': 'cat' , 'birds': 'bird'}
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['evictions'] == 1
+
+
+def test_snapshot_round_trip(tmp_path):
+    cache = LemmaCache(SuffixLemmatizer() , max_size = 10)
+    for word in ('cats' , 'dogs' , 'movies'):
+        cache.lemmatize(word)
+    cache.save(str(tmp_path / 'lemmas.json'))
+
+    warm = LemmaCache(SuffixLemmatizer() , max_size = 2)
+    warm.load(str(tmp_path / 'lemmas.json'))
+
+    assert warm.entries() == {'dogs': 'dog' , 'movies': 'movie'}
+
+
+@pytest.fixture
+def fast_switching():
+    # switch threads as often as possible so the cache operations interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_shared_cache_under_concurrent_eviction(fast_switching):
+    # a few more words than slots : most lookups hit while other threads keep evicting
+    cache = LemmaCache(SuffixLemmatizer() , max_size = 4)
+    words = [f'word{i}s' for i in range(5)]
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        try:
+            for _ in range(20000):
+                word = rng.choice(words)
+                assert cache.lemmatize(word) == word[:-1]
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target = worker , args = (seed ,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    stats = cache.stats()
+    assert stats['size'] <= 4
+    assert stats['misses'] >= 5
+    # hits are counted without the lock, concurrent increments can be lost
+    assert stats['hits'] + stats['misses'] <= 8 * 20000
@@ -0,0 +1,37 @@
+import logging
+
+import pytest
+
+from src.logger import configure_logger, shutdown_logger
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    configure_logger({'level': 'DEBUG' , 'file': True , 'file_level': 'DEBUG' , 'console': False , 'dir': str(tmp_path)})
+    yield tmp_path
+    shutdown_logger()
+    configure_logger()
+
+
+def read_log(log_dir):
+    shutdown_logger()
+    return ''.join(path.read_text() for path in log_dir.iterdir())
+
+
+def test_args_are_rendered_at_the_call_site(log_file):
+    values = ['before']
+    logging.info('values %s', values)
+    values.append('after')
+
+    assert "values ['before']" in read_log(log_file)
+
+
+def test_exceptions_keep_their_traceback(log_file):
+    try:
+        raise ValueError('broken')
+    except ValueError:
+        logging.exception('failed with %d errors', 1)
+
+    text = read_log(log_file)
+    assert 'failed with 1 errors' in text
+    assert 'ValueError: broken' in text
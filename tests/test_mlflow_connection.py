@@ -0,0 +1,142 @@
+import json
+import os
+import time
+
+import pytest
+import requests
+from mlflow.exceptions import MlflowException
+
+from src.connections.mlflow_connection import AsyncMlflowLogger, replay_spool, MAX_PARAMS, MAX_TAGS, MAX_ENTRIES, \
+    MAX_PARAM_LENGTH
+
+
+@pytest.fixture
+def store_uri(tmp_path):
+    return f'file:{tmp_path / "mlruns"}'
+
+
+@pytest.fixture
+def tracker(store_uri , tmp_path):
+    with AsyncMlflowLogger(store_uri , spool_dir = str(tmp_path / 'spool') , max_attempts = 2 , backoff_base = 0) as tracker:
+        yield tracker
+
+
+def record_batches(monkeypatch , tracker , fail = False):
+    """replace client.log_batch, keeping the size of every request"""
+    batches = []
+
+    def log_batch(run_id , metrics = () , params = () , tags = ()):
+        batches.append((len(metrics) , len(params) , len(tags)))
+        if fail:
+            raise MlflowException('tracking server unavailable')
+
+    monkeypatch.setattr(tracker.client , 'log_batch' , log_batch)
+    return batches
+
+
+def test_batches_respect_the_server_limits(tracker , monkeypatch):
+    run_id = tracker.start_run('limits')
+    batches = record_batches(monkeypatch , tracker)
+
+    tracker.log_params(run_id , {f'p{i}': i for i in range(250)})
+    tracker.log_metrics(run_id , {f'm{i}': i for i in range(2500)})
+    tracker.set_tags(run_id , {f't{i}': i for i in range(150)})
+    tracker.flush()
+
+    assert all(params <= MAX_PARAMS and tags <= MAX_TAGS and metrics + params + tags <= MAX_ENTRIES
+               for metrics , params , tags in batches)
+    assert [sum(column) for column in zip(*batches)] == [2500 , 250 , 150]
+    assert tracker.timing()['batches'] == len(batches)
+
+
+def test_values_are_sent_in_one_request(tracker):
+    run_id = tracker.start_run('values')
+    tracker.log_params(run_id , {'C': 1 , 'long': 'x' * (MAX_PARAM_LENGTH + 10)})
+    tracker.log_metrics(run_id , {'auc': 0.9 , 'accuracy': 0.8})
+    tracker.end_run(run_id)
+    tracker.flush()
+
+    run = tracker.client.get_run(run_id)
+    assert run.data.params == {'C': '1' , 'long': 'x' * MAX_PARAM_LENGTH}
+    assert run.data.metrics == {'auc': 0.9 , 'accuracy': 0.8}
+    assert run.info.status == 'FINISHED'
+    assert tracker.timing()['batches'] == 1
+
+
+def test_failed_requests_are_spooled_and_replayed(tracker , monkeypatch , store_uri , tmp_path):
+    run_id = tracker.start_run('spool')
+    batches = record_batches(monkeypatch , tracker , fail = True)
+
+    def set_terminated(*args):
+        raise MlflowException('tracking server unavailable')
+
+    monkeypatch.setattr(tracker.client , 'set_terminated' , set_terminated)
+
+    tracker.log_params(run_id , {'C': 1})
+    tracker.log_metrics(run_id , {'auc': 0.9} , step = 3)
+    tracker.end_run(run_id)
+    tracker.flush()
+
+    # every request was retried once, then spooled
+    assert len(batches) == 2
+    assert tracker.timing()['failed'] == 2
+    spool_path = tmp_path / 'spool' / f'{run_id}.jsonl'
+    with open(spool_path) as file:
+        records = [json.loads(line) for line in file]
+    assert records[0]['params'] == {'C': '1'}
+    assert records[0]['metrics'][0]['step'] == 3
+    assert records[1] == {'call': 'set_terminated' , 'args': [run_id , 'FINISHED']}
+
+    assert replay_spool(str(spool_path) , store_uri) == 2
+    run = AsyncMlflowLogger(store_uri).client.get_run(run_id)
+    assert run.data.params == {'C': '1'}
+    assert run.data.metrics == {'auc': 0.9}
+    assert run.info.status == 'FINISHED'
+
+
+def test_unreachable_server_fails_over_quickly(store_uri , tmp_path):
+    start = time.perf_counter()
+    with AsyncMlflowLogger('http://127.0.0.1:9' , fallback_uri = store_uri , spool_dir = str(tmp_path / 'spool') ,
+                           connect_timeout = 1) as tracker:
+        run_id = tracker.start_run('offline')
+        tracker.log_metrics(run_id , {'auc': 0.9})
+        tracker.flush()
+
+    assert time.perf_counter() - start < 10
+    assert tracker.offline
+    assert tracker.client.get_run(run_id).data.metrics == {'auc': 0.9}
+    # the MLflow client settings of the process are left alone
+    assert 'MLFLOW_HTTP_REQUEST_MAX_RETRIES' not in os.environ
+    assert 'MLFLOW_HTTP_REQUEST_TIMEOUT' not in os.environ
+
+
+def test_server_errors_do_not_fail_over(store_uri , tmp_path , monkeypatch):
+    tracker = AsyncMlflowLogger('http://tracking.invalid' , fallback_uri = store_uri , spool_dir = str(tmp_path / 'spool'))
+    monkeypatch.setattr(tracker , '_probe' , lambda: None)
+
+    def rejected(name):
+        raise MlflowException(f'invalid experiment name {name!r}')
+
+    monkeypatch.setattr(tracker.client , 'get_experiment_by_name' , rejected)
+    with pytest.raises(MlflowException):
+        tracker.start_run('bad/name')
+    assert not tracker.offline
+    tracker.close()
+
+
+def test_connection_lost_after_the_probe_fails_over(store_uri , tmp_path , monkeypatch):
+    tracker = AsyncMlflowLogger('http://tracking.invalid' , fallback_uri = store_uri , spool_dir = str(tmp_path / 'spool'))
+    monkeypatch.setattr(tracker , '_probe' , lambda: None)
+
+    def unreachable(name):
+        try:
+            raise requests.exceptions.ConnectionError('connection refused')
+        except requests.exceptions.ConnectionError as e:
+            raise MlflowException(f'API request failed with exception {e}')
+
+    monkeypatch.setattr(tracker.client , 'get_experiment_by_name' , unreachable)
+    run_id = tracker.start_run('lost')
+
+    assert tracker.offline
+    assert tracker.client.get_run(run_id).info.run_id == run_id
+    tracker.close()
@@ -0,0 +1,135 @@
+import logging
+import os
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.linear_model import SGDClassifier
+
+from src.features.sparse_io import save_sparse, load_sparse, iter_sparse_chunks, _open_npz_member
+from src.model.model_building import train_model_incremental
+
+
+@pytest.fixture
+def train_path(tmp_path):
+    rng = np.random.default_rng(0)
+    X = sp.random(95 , 30 , density = 0.2 , format = 'csr' , random_state = 0)
+    y = rng.integers(0 , 2 , 95)
+    path = str(tmp_path / 'train_bow.npz')
+    save_sparse(X , y , path)
+    return path
+
+
+def incremental_params(tmp_path , **overrides):
+    params = {'chunk_rows': 20 , 'epochs': 3 , 'random_state': 7 , 'checkpoint_every': 2 ,
+              'checkpoint_path': str(tmp_path / 'checkpoints' / 'sgd.pkl')}
+    params.update(overrides)
+    return params
+
+
+def interrupt_after(monkeypatch , calls):
+    """make SGDClassifier.partial_fit fail after a number of calls, like a killed run"""
+    partial_fit = SGDClassifier.partial_fit
+    done = []
+
+    def failing(self , *args , **kwargs):
+        if len(done) == calls:
+            raise KeyboardInterrupt
+        done.append(1)
+        return partial_fit(self , *args , **kwargs)
+
+    monkeypatch.setattr(SGDClassifier , 'partial_fit' , failing)
+
+
+def test_resume_matches_an_uninterrupted_run(train_path , tmp_path , monkeypatch):
+    expected = train_model_incremental(train_path , incremental_params(tmp_path))
+
+    # 5 blocks per epoch : stop in the middle of the second epoch, after the checkpoint at block 2
+    with monkeypatch.context() as patch:
+        interrupt_after(patch , 8)
+        with pytest.raises(KeyboardInterrupt):
+            train_model_incremental(train_path , incremental_params(tmp_path))
+    assert os.path.exists(tmp_path / 'checkpoints' / 'sgd.pkl')
+
+    clf = train_model_incremental(train_path , incremental_params(tmp_path , resume = True))
+
+    np.testing.assert_array_equal(clf.coef_ , expected.coef_)
+    np.testing.assert_array_equal(clf.intercept_ , expected.intercept_)
+
+
+def test_checkpoint_is_removed_when_training_completes(train_path , tmp_path):
+    train_model_incremental(train_path , incremental_params(tmp_path))
+
+    assert not os.path.exists(tmp_path / 'checkpoints' / 'sgd.pkl')
+
+
+@pytest.mark.parametrize('overrides' , [{'alpha': 1e-3} , {'chunk_rows': 25} , {'random_state': 8}] ,
+                         ids = ['params' , 'blocking' , 'seed'])
+def test_checkpoint_for_other_settings_is_ignored(train_path , tmp_path , monkeypatch , caplog , overrides):
+    with monkeypatch.context() as patch:
+        interrupt_after(patch , 8)
+        with pytest.raises(KeyboardInterrupt):
+            train_model_incremental(train_path , incremental_params(tmp_path))
+    expected = train_model_incremental(train_path , incremental_params(tmp_path , checkpoint_path = str(tmp_path / 'other.pkl') ,
+                                                                       **overrides))
+
+    with caplog.at_level(logging.WARNING):
+        clf = train_model_incremental(train_path , incremental_params(tmp_path , resume = True , **overrides))
+
+    assert 'starting over' in caplog.text
+    np.testing.assert_array_equal(clf.coef_ , expected.coef_)
+
+
+def test_checkpoint_for_other_data_is_ignored(train_path , tmp_path , monkeypatch , caplog):
+    with monkeypatch.context() as patch:
+        interrupt_after(patch , 8)
+        with pytest.raises(KeyboardInterrupt):
+            train_model_incremental(train_path , incremental_params(tmp_path))
+    # same shape, different labels
+    X , y = load_sparse(train_path)
+    save_sparse(X , 1 - y , train_path)
+
+    with caplog.at_level(logging.WARNING):
+        train_model_incremental(train_path , incremental_params(tmp_path , resume = True))
+
+    assert 'starting over' in caplog.text
+
+
+def test_iter_sparse_chunks(train_path):
+    X , y = load_sparse(train_path)
+
+    blocks = list(iter_sparse_chunks(train_path , 20))
+    assert [block.shape for block , _ in blocks] == [(20 , 30)] * 4 + [(15 , 30)]
+    assert (sp.vstack([block for block , _ in blocks]) != X).nnz == 0
+    np.testing.assert_array_equal(np.concatenate([labels for _ , labels in blocks]) , y)
+
+    (last , last_y) , (first , first_y) = iter_sparse_chunks(train_path , 20 , order = [4 , 0])
+    assert (last != X[80:]).nnz == 0
+    assert (first != X[:20]).nnz == 0
+    np.testing.assert_array_equal(last_y , y[80:])
+
+
+def test_open_npz_member_maps_scipy_npz(tmp_path):
+    X = sp.random(40 , 12 , density = 0.3 , format = 'csr' , random_state = 1)
+    path = str(tmp_path / 'matrix.npz')
+    sp.save_npz(path , X , compressed = False)
+
+    members = {name: _open_npz_member(path , name) for name in ('data' , 'indices' , 'indptr' , 'shape')}
+
+    assert isinstance(members['data'] , np.memmap)
+    mapped = sp.csr_matrix((members['data'] , members['indices'] , members['indptr']) , shape = tuple(members['shape']))
+    expected = sp.load_npz(path)
+    assert mapped.dtype == expected.dtype
+    assert (mapped != expected).nnz == 0
+
+
+def test_open_npz_member_compressed_and_empty(tmp_path):
+    X = sp.random(10 , 5 , density = 0.3 , format = 'csr' , random_state = 2)
+    compressed = str(tmp_path / 'compressed.npz')
+    sp.save_npz(compressed , X , compressed = True)
+    empty = str(tmp_path / 'empty.npz')
+    sp.save_npz(empty , sp.csr_matrix((3 , 4)) , compressed = False)
+
+    assert _open_npz_member(compressed , 'data') is None
+    assert _open_npz_member(empty , 'data').shape == (0 ,)
+    np.testing.assert_array_equal(_open_npz_member(empty , 'indptr') , [0 , 0 , 0 , 0])
@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+
+import nltk
+import pytest
+
+from src.data import nltk_resources
+from src.data.nltk_resources import ensure_nltk_data, missing_resources
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def fake_store(tmp_path , monkeypatch):
+    """nltk.data.find / nltk.download against an in-memory set of installed resources"""
+    installed = set()
+    calls = {'find': [] , 'download': []}
+
+    def find(path):
+        calls['find'].append(path)
+        if path not in installed:
+            raise LookupError(path)
+        return path
+
+    def download(name , download_dir = None , quiet = False , raise_on_error = False):
+        calls['download'].append((name , download_dir))
+        installed.add(nltk_resources.NLTK_RESOURCES[name])
+        return True
+
+    monkeypatch.setattr(nltk.data , 'find' , find)
+    monkeypatch.setattr(nltk.data , 'path' , list(nltk.data.path))
+    monkeypatch.setattr(nltk , 'download' , download)
+    monkeypatch.setattr(nltk_resources , '_checked' , set())
+    monkeypatch.setenv('NLTK_DATA_DIR' , str(tmp_path / 'nltk_data'))
+    monkeypatch.delenv('NLTK_OFFLINE' , raising = False)
+    return installed , calls
+
+
+def test_missing_resources_are_downloaded_once(fake_store , tmp_path):
+    installed , calls = fake_store
+
+    ensure_nltk_data()
+    ensure_nltk_data()
+    ensure_nltk_data(['stopwords'])
+
+    data_dir = str(tmp_path / 'nltk_data')
+    assert calls['download'] == [('stopwords' , data_dir) , ('wordnet' , data_dir)]
+    # checked on the first call only, later calls do not look anything up
+    assert len(calls['find']) == 2
+    assert nltk.data.path[0] == data_dir
+
+
+def test_installed_resources_are_not_downloaded(fake_store):
+    installed , calls = fake_store
+    installed.update(nltk_resources.NLTK_RESOURCES.values())
+
+    ensure_nltk_data()
+
+    assert calls['download'] == []
+    assert missing_resources() == []
+
+
+def test_offline_mode_raises_instead_of_downloading(fake_store , monkeypatch):
+    installed , calls = fake_store
+    installed.add(nltk_resources.NLTK_RESOURCES['stopwords'])
+    monkeypatch.setenv('NLTK_OFFLINE' , '1')
+
+    with pytest.raises(LookupError , match = r"\['wordnet'\].*offline mode"):
+        ensure_nltk_data()
+
+    assert calls['download'] == []
+    # nothing is marked as checked, a later call looks again
+    assert nltk_resources._checked == set()
+
+
+def test_importing_data_preprocessing_does_not_import_nltk():
+    code = 'import sys, src.data.data_preprocessing; sys.exit("nltk" in sys.modules)'
+    result = subprocess.run([sys.executable , '-c' , code] , cwd = ROOT_DIR , capture_output = True , text = True)
+    assert result.returncode == 0 , result.stderr
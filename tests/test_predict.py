@@ -0,0 +1,48 @@
+import os
+import pickle
+
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from src.model.predict import predict_file
+from tests.conftest import FORKED_WORKERS
+
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))) , 'notebooks ' , 'data.csv')
+
+
+@pytest.fixture
+def scorer_files(tmp_path):
+    df = pd.read_csv(SAMPLE_PATH)
+    vectorizer = CountVectorizer(max_features = 500)
+    X = vectorizer.fit_transform(df['review'].fillna(''))
+    model = LogisticRegression(C = 1 , solver = 'liblinear' , penalty = 'l1').fit(X , df['sentiment'])
+    model_path , vectorizer_path = tmp_path / 'model.pkl' , tmp_path / 'vectorizer.pkl'
+    model_path.write_bytes(pickle.dumps(model))
+    vectorizer_path.write_bytes(pickle.dumps(vectorizer))
+
+    reviews = pd.DataFrame({'id': range(len(df)) , 'review': df['review']})
+    in_path = str(tmp_path / 'reviews.csv')
+    reviews.to_csv(in_path , index = False)
+    return in_path , str(model_path) , str(vectorizer_path)
+
+
+@pytest.mark.skipif(not FORKED_WORKERS , reason = 'the worker processes need the NLTK stand-ins')
+@pytest.mark.parametrize('workers' , [2 , 3])
+def test_workers_keep_the_input_order(fake_nltk , scorer_files , tmp_path , workers):
+    in_path , model_path , vectorizer_path = scorer_files
+    n_rows = len(pd.read_csv(in_path))
+
+    # many more chunks than 2 x workers, so the in-flight window has to slide
+    serial_rows = predict_file(in_path , str(tmp_path / 'serial.csv') , model_path , vectorizer_path ,
+                               id_col = 'id' , chunksize = 37)
+    parallel_rows = predict_file(in_path , str(tmp_path / 'parallel.csv') , model_path , vectorizer_path ,
+                                 id_col = 'id' , chunksize = 37 , workers = workers)
+
+    serial = pd.read_csv(tmp_path / 'serial.csv')
+    parallel = pd.read_csv(tmp_path / 'parallel.csv')
+    assert serial_rows == parallel_rows == n_rows
+    assert parallel['id'].tolist() == list(range(n_rows))
+    pd.testing.assert_frame_equal(parallel , serial)
@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+import pytest
+
+import src.profiler as profiler
+from src.profiler import profile_section, profiled, summary, write_report
+
+
+@pytest.fixture(autouse = True)
+def records(monkeypatch):
+    """a fresh record list for each test"""
+    monkeypatch.setattr(profiler , '_records' , [])
+    monkeypatch.setattr(profiler , '_profiles' , {})
+    return profiler._records
+
+
+def test_profile_section_record_fields(records):
+    with profile_section('load' , rows = 10) as record:
+        record['bytes_read'] = 123
+
+    assert len(records) == 1
+    record = records[0]
+    assert record['name'] == 'load'
+    assert record['rows'] == 10
+    # a value set by the caller is not overwritten by the process counters
+    assert record['bytes_read'] == 123
+    assert record['wall_s'] >= 0 and record['cpu_s'] >= 0
+    for key in ('rss_delta_mb' , 'peak_rss_growth_mb' , 'process_peak_rss_mb'):
+        assert key in record
+
+
+def test_peak_growth_is_per_section(records):
+    if profiler._peak_rss_mb() is None or profiler._rss_mb() is None:
+        pytest.skip('no ru_maxrss or /proc on this platform')
+    # enough to go past the high-water mark left by earlier tests
+    size_mb = profiler._peak_rss_mb() - profiler._rss_mb() + 32
+    with profile_section('allocate'):
+        block = np.ones(int(size_mb * 1024 ** 2 // 8))
+    del block
+    with profile_section('small'):
+        pass
+
+    allocate , small = records
+    assert allocate['peak_rss_growth_mb'] > 0
+    assert small['peak_rss_growth_mb'] == 0
+    # the lifetime high-water mark does not go down
+    assert small['process_peak_rss_mb'] >= allocate['process_peak_rss_mb']
+
+
+def test_nested_sections_are_recorded_separately(records):
+    with profile_section('outer'):
+        with profile_section('inner' , rows = 3):
+            pass
+
+    # the inner section finishes first
+    assert [record['name'] for record in records] == ['inner' , 'outer']
+    assert records[1]['wall_s'] >= records[0]['wall_s']
+
+
+def test_profiled_counts_rows(records):
+    @profiled()
+    def matrix():
+        return np.zeros((7 , 2))
+
+    @profiled('custom' , rows = lambda result , n: n)
+    def repeat(n):
+        return 'x' * n
+
+    matrix()
+    repeat(5)
+    repeat(4)
+
+    sections = summary()
+    assert sections['matrix']['rows'] == 7
+    assert sections['custom']['calls'] == 2
+    assert sections['custom']['rows'] == 9
+
+
+def test_write_report_merges_the_stages(tmp_path):
+    path = str(tmp_path / 'reports' / 'profile.json')
+    with profile_section('fit' , rows = 2):
+        pass
+    write_report('model_building' , path)
+    write_report('model_evaluation' , path)
+
+    with open(path) as file:
+        report = json.load(file)
+    assert set(report['stages']) == {'model_building' , 'model_evaluation'}
+    section = report['stages']['model_building']['sections']['fit']
+    assert section['calls'] == 1
+    assert section['rows'] == 2
+    assert 'run_at' in report['stages']['model_building']
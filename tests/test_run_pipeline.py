@@ -0,0 +1,65 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from src.pipeline.run_pipeline import run_pipeline
+
+
+PARAMS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))) , 'params.yaml')
+
+WORDS = {1: ['great' , 'lovely' , 'superb' , 'moving'] , 0: ['awful' , 'boring' , 'dull' , 'terrible']}
+
+
+@pytest.fixture
+def params(tmp_path):
+    """the repo params.yaml with a small local csv as the source"""
+    rng = np.random.default_rng(0)
+    labels = rng.integers(0 , 2 , 80)
+    reviews = [' '.join(rng.choice(WORDS[label] , 6)) + ' movie' for label in labels]
+    data_path = tmp_path / 'reviews.csv'
+    pd.DataFrame({'review': reviews ,
+                  'sentiment': np.where(labels == 1 , 'positive' , 'negative')}).to_csv(data_path , index = False)
+
+    with open(PARAMS_PATH) as file:
+        params = yaml.safe_load(file)
+    params['data_ingestion'].update({'source': 'local' , 'data_url': str(data_path)})
+    return params
+
+
+@pytest.mark.parametrize('persist' , [True , False])
+def test_run_pipeline_in_an_empty_directory(params , tmp_path , monkeypatch , fake_nltk , persist):
+    workdir = tmp_path / 'checkout'
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+
+    metrics = run_pipeline(params , persist = persist)
+
+    with open(workdir / 'reports' / 'metrics.json') as file:
+        assert json.load(file) == metrics
+    assert os.path.exists(workdir / 'models' / 'model.pkl')
+    assert os.path.exists(workdir / 'data' / 'raw' / 'train.csv') == persist
+
+
+def test_lean_export_off_marks_the_configured_directory(params , tmp_path , monkeypatch , fake_nltk):
+    monkeypatch.chdir(tmp_path)
+    params['model_building'].update({'lean_export': False , 'lean_model_dir': 'models/lean_custom'})
+
+    run_pipeline(params , persist = False)
+
+    assert os.listdir(tmp_path / 'models' / 'lean_custom') == ['export.json']
+    assert not os.path.exists(tmp_path / 'models' / 'lean')
+
+
+def test_null_lean_model_dir_exports_to_the_default_directory(params , tmp_path , monkeypatch , fake_nltk):
+    monkeypatch.chdir(tmp_path)
+    params['model_building'].update({'lean_export': True , 'lean_model_dir': None})
+
+    run_pipeline(params , persist = False)
+
+    assert os.path.exists(tmp_path / 'models' / 'lean' / 'meta.json')
+    with open(tmp_path / 'models' / 'lean' / 'export.json') as file:
+        assert json.load(file)['exported'] is True
@@ -0,0 +1,135 @@
+import os
+
+import boto3
+import pandas as pd
+import pytest
+from moto import mock_aws
+
+from src.connections.s3_cache import S3ReadThroughCache
+from src.connections.s3_connection import s3_operations
+
+
+BUCKET = 'test-bucket'
+
+
+@pytest.fixture
+def s3():
+    """s3_operations against an in-memory moto S3, no backoff sleeps"""
+    with mock_aws():
+        boto3.client('s3' , region_name = 'us-east-1').create_bucket(Bucket = BUCKET)
+        yield s3_operations(BUCKET , 'testing' , 'testing' , backoff_base = 0)
+
+
+def put(s3 , key , body):
+    s3.s3_client.put_object(Bucket = BUCKET , Key = key , Body = body)
+
+
+def shard(start , rows = 5):
+    return pd.DataFrame({'review': [f'review {i}' for i in range(start , start + rows)],
+                         'sentiment': ['positive' if i % 2 else 'negative' for i in range(start , start + rows)]})
+
+
+def cached_files(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name != S3ReadThroughCache.INDEX_FILE)
+
+
+def test_second_fetch_is_revalidated(s3 , tmp_path):
+    put(s3 , 'data.csv' , b'review,sentiment\nok,positive\n')
+    cache = S3ReadThroughCache(s3 , cache_dir = str(tmp_path))
+
+    path = cache.fetch('data.csv')
+    assert cache.fetch('data.csv') == path
+
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['bytes_saved'] == os.path.getsize(path)
+
+
+def test_hit_survives_a_new_cache_instance(s3 , tmp_path , monkeypatch):
+    put(s3 , 'data.csv' , b'review,sentiment\nok,positive\n')
+    S3ReadThroughCache(s3 , cache_dir = str(tmp_path)).fetch('data.csv')
+    calls = []
+    get_object = s3.s3_client.get_object
+
+    def recording(**kwargs):
+        calls.append(kwargs)
+        return get_object(**kwargs)
+
+    monkeypatch.setattr(s3.s3_client , 'get_object' , recording)
+    cache = S3ReadThroughCache(s3 , cache_dir = str(tmp_path))
+    cache.fetch('data.csv')
+
+    # the stored ETag is sent and the 304 answer counts as a hit
+    assert 'IfNoneMatch' in calls[0]
+    assert cache.stats() == {'hits': 1 , 'misses': 0 , 'bytes_saved': 29 , 'bytes_downloaded': 0}
+
+
+def test_changed_object_replaces_the_entry(s3 , tmp_path):
+    put(s3 , 'data.csv' , b'review,sentiment\nold,negative\n')
+    cache = S3ReadThroughCache(s3 , cache_dir = str(tmp_path))
+    cache.fetch('data.csv')
+
+    put(s3 , 'data.csv' , b'review,sentiment\nnew,positive\n')
+    path = cache.fetch('data.csv')
+
+    assert cache.stats()['misses'] == 2
+    with open(path , 'rb') as file:
+        assert file.read() == b'review,sentiment\nnew,positive\n'
+    assert len(cached_files(str(tmp_path))) == 1
+
+
+def test_failed_download_leaves_no_partial_file(s3 , tmp_path , monkeypatch):
+    put(s3 , 'data.csv' , b'review,sentiment\nok,positive\n')
+    cache = S3ReadThroughCache(s3 , cache_dir = str(tmp_path))
+    get_object = s3.s3_client.get_object
+
+    class BrokenBody:
+        def iter_chunks(self , size):
+            yield b'review,sent'
+            raise OSError('connection lost')
+
+    def broken(**kwargs):
+        obj = get_object(**kwargs)
+        obj['Body'] = BrokenBody()
+        return obj
+
+    monkeypatch.setattr(s3.s3_client , 'get_object' , broken)
+    with pytest.raises(OSError):
+        cache.fetch('data.csv')
+
+    assert cached_files(str(tmp_path)) == []
+    monkeypatch.setattr(s3.s3_client , 'get_object' , get_object)
+    assert cache.fetch('data.csv').endswith('.csv')
+
+
+def test_prefix_chunks_match_the_shards(s3 , tmp_path):
+    for i in range(3):
+        put(s3 , f'shards/part-{i}.csv' , shard(i * 5).to_csv(index = False).encode())
+    cache = S3ReadThroughCache(s3 , cache_dir = str(tmp_path))
+
+    first = pd.concat(cache.iter_prefix_chunks('shards/' , chunksize = 2 , workers = 2) , ignore_index = True)
+    second = pd.concat(cache.iter_prefix_chunks('shards/' , chunksize = 2 , workers = 2) , ignore_index = True)
+
+    expected = pd.concat([shard(0) , shard(5) , shard(10)] , ignore_index = True)
+    pd.testing.assert_frame_equal(first , expected)
+    pd.testing.assert_frame_equal(second , expected)
+    assert cache.stats()['misses'] == 3
+    assert cache.stats()['hits'] == 3
+
+
+def test_prefix_run_evicts_as_it_goes(s3 , tmp_path):
+    bodies = [shard(i * 5).to_csv(index = False).encode() for i in range(6)]
+    for i , body in enumerate(bodies):
+        put(s3 , f'shards/part-{i}.csv' , body)
+    # room for a single shard : only the one being parsed and the one prefetched may stay
+    cache = S3ReadThroughCache(s3 , cache_dir = str(tmp_path) , max_bytes = max(map(len , bodies)))
+
+    sizes = []
+    for _ in cache.iter_prefix_chunks('shards/' , chunksize = 5 , workers = 1):
+        sizes.append(len(cached_files(str(tmp_path))))
+
+    assert len(sizes) == 6
+    assert max(sizes) <= 2
+    assert len(cached_files(str(tmp_path))) == 1
+    assert sum(entry['size'] for entry in cache._index.values()) <= cache.max_bytes
+    assert cache._pinned == set()
@@ -0,0 +1,202 @@
+import gzip
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+import pandas as pd
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from src.connections.s3_connection import s3_operations
+
+
+BUCKET = 'test-bucket'
+
+
+@pytest.fixture
+def s3():
+    """s3_operations against an in-memory moto S3, no backoff sleeps"""
+    with mock_aws():
+        boto3.client('s3' , region_name = 'us-east-1').create_bucket(Bucket = BUCKET)
+        yield s3_operations(BUCKET , 'testing' , 'testing' , backoff_base = 0)
+
+
+def put(s3 , key , body):
+    s3.s3_client.put_object(Bucket = BUCKET , Key = key , Body = body)
+
+
+def shard(start , rows = 5):
+    return pd.DataFrame({'review': [f'review {i}' for i in range(start , start + rows)],
+                         'sentiment': ['positive' if i % 2 else 'negative' for i in range(start , start + rows)]})
+
+
+def client_error(code):
+    return ClientError({'Error': {'Code': code , 'Message': code}} , 'GetObject')
+
+
+def count_calls(monkeypatch , s3 , method = 'get_object' , fail_with = ()):
+    """wrap a client method : raise the given error codes first, then call through, counting every call"""
+    original = getattr(s3.s3_client , method)
+    errors = list(fail_with)
+    calls = []
+
+    def wrapper(**kwargs):
+        calls.append(kwargs)
+        if errors:
+            raise client_error(errors.pop(0))
+        return original(**kwargs)
+
+    monkeypatch.setattr(s3.s3_client , method , wrapper)
+    return calls
+
+
+def test_list_objects_reads_every_page(s3 , monkeypatch):
+    for i in range(7):
+        put(s3 , f'shards/part-{i:02d}.csv' , b'x')
+    put(s3 , 'shards/_SUCCESS' , b'')
+    put(s3 , 'other/part-00.csv' , b'x')
+
+    paginator = s3.s3_client.get_paginator('list_objects_v2')
+    pages = []
+
+    class SmallPages:
+        def paginate(self , **kwargs):
+            for page in paginator.paginate(PaginationConfig = {'PageSize': 2} , **kwargs):
+                pages.append(page)
+                yield page
+
+    monkeypatch.setattr(s3.s3_client , 'get_paginator' , lambda name: SmallPages())
+    objects = s3.list_objects('shards/' , '.csv')
+
+    assert len(pages) > 1
+    assert objects == [(f'shards/part-{i:02d}.csv' , 1) for i in range(7)]
+
+
+def test_ranged_reads_are_reassembled_byte_for_byte(s3 , monkeypatch):
+    data = os.urandom(10_000)
+    put(s3 , 'big.bin' , data)
+    calls = count_calls(monkeypatch , s3)
+
+    with ThreadPoolExecutor(max_workers = 4) as executor:
+        result = s3.fetch_object_bytes('big.bin' , part_size = 1024 , range_threshold = 0 , executor = executor)
+
+    assert result == data
+    ranges = sorted(int(call['Range'].split('=')[1].split('-')[0]) for call in calls)
+    assert ranges == list(range(0 , 10_000 , 1024))
+
+
+def test_gzip_and_plain_shards(s3):
+    put(s3 , 'shards/part-00.csv' , shard(0).to_csv(index = False).encode())
+    put(s3 , 'shards/part-01.csv.gz' , gzip.compress(shard(5).to_csv(index = False).encode()))
+
+    chunks = list(s3.iter_prefix_chunks('shards/' , chunksize = 3 , suffix = '' , workers = 2))
+
+    result = pd.concat(chunks , ignore_index = True)
+    pd.testing.assert_frame_equal(result , pd.concat([shard(0) , shard(5)] , ignore_index = True))
+
+
+def test_chunks_come_out_in_key_order(s3 , monkeypatch):
+    for i in range(4):
+        put(s3 , f'shards/part-{i}.csv' , shard(i * 5).to_csv(index = False).encode())
+    get_range = s3._get_range
+
+    def slow_first(file_key , start , end):
+        # the first shard finishes downloading last
+        if file_key.endswith('part-0.csv'):
+            time.sleep(0.3)
+        return get_range(file_key , start , end)
+
+    monkeypatch.setattr(s3 , '_get_range' , slow_first)
+    chunks = list(s3.iter_prefix_chunks('shards/' , chunksize = 5 , workers = 4))
+
+    assert [chunk['review'].iloc[0] for chunk in chunks] == [f'review {i * 5}' for i in range(4)]
+
+
+def test_slow_down_is_retried(s3 , monkeypatch):
+    put(s3 , 'data.bin' , b'payload')
+    calls = count_calls(monkeypatch , s3 , fail_with = ['SlowDown' , 'SlowDown'])
+
+    assert s3.fetch_object_bytes('data.bin') == b'payload'
+    assert len(calls) == 3
+
+
+def test_no_such_key_is_not_retried(s3 , monkeypatch):
+    calls = count_calls(monkeypatch , s3)
+
+    with pytest.raises(ClientError) as error:
+        s3.fetch_object_bytes('missing.bin')
+    assert error.value.response['Error']['Code'] == 'NoSuchKey'
+    assert len(calls) == 1
+
+
+def test_retries_stop_after_max_attempts(s3 , monkeypatch):
+    put(s3 , 'data.bin' , b'payload')
+    calls = count_calls(monkeypatch , s3 , fail_with = ['SlowDown'] * s3.max_attempts)
+
+    with pytest.raises(ClientError):
+        s3.fetch_object_bytes('data.bin')
+    assert len(calls) == s3.max_attempts
+
+
+def test_iter_file_chunks_retries_opening_the_object(s3 , monkeypatch):
+    put(s3 , 'data.csv' , shard(0 , rows = 7).to_csv(index = False).encode())
+    calls = count_calls(monkeypatch , s3 , fail_with = ['SlowDown'])
+
+    chunks = list(s3.iter_file_chunks('data.csv' , chunksize = 3))
+
+    assert [len(chunk) for chunk in chunks] == [3 , 3 , 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks , ignore_index = True) , shard(0 , rows = 7))
+    assert len(calls) == 2
+
+
+def test_large_shards_are_streamed_in_ranges(s3 , monkeypatch):
+    body = shard(0 , rows = 400).to_csv(index = False).encode()
+    put(s3 , 'shards/part-00.csv' , body)
+    put(s3 , 'shards/part-01.csv.gz' , gzip.compress(shard(400).to_csv(index = False).encode()))
+    calls = count_calls(monkeypatch , s3)
+    fetched = []
+    fetch_object_bytes = s3.fetch_object_bytes
+    monkeypatch.setattr(s3 , 'fetch_object_bytes' , lambda file_key , *args , **kwargs:
+                        fetched.append(file_key) or fetch_object_bytes(file_key , *args , **kwargs))
+
+    chunks = list(s3.iter_prefix_chunks('shards/' , chunksize = 100 , suffix = '' , workers = 3 ,
+                                        part_size = 1000 , range_threshold = 1000))
+
+    expected = pd.concat([shard(0 , rows = 400) , shard(400)] , ignore_index = True)
+    pd.testing.assert_frame_equal(pd.concat(chunks , ignore_index = True) , expected)
+    # the large shard never went through the whole-object download
+    assert fetched == ['shards/part-01.csv.gz']
+    ranges = [call['Range'] for call in calls if call['Key'] == 'shards/part-00.csv']
+    assert len(ranges) == -(-len(body) // 1000)
+
+
+def test_prefetch_is_bounded_by_bytes(s3 , monkeypatch):
+    sizes = {}
+    for i in range(6):
+        body = shard(i * 5).to_csv(index = False).encode()
+        sizes[f'shards/part-{i}.csv'] = len(body)
+        put(s3 , f'shards/part-{i}.csv' , body)
+    fetched = []
+    fetch_object_bytes = s3.fetch_object_bytes
+    monkeypatch.setattr(s3 , 'fetch_object_bytes' , lambda file_key , *args , **kwargs:
+                        fetched.append(file_key) or fetch_object_bytes(file_key , *args , **kwargs))
+
+    # room for two shards : the one being parsed and one ahead of it
+    budget = 2 * max(sizes.values())
+    chunks = s3.iter_prefix_chunks('shards/' , chunksize = 5 , workers = 4 , max_prefetch_bytes = budget)
+    first = next(chunks)
+
+    assert first['review'].iloc[0] == 'review 0'
+    assert len(fetched) == 2
+    assert len(list(chunks)) == 5
+    assert len(fetched) == 6
+
+
+def test_fetch_file_from_s3_retries_slow_down(s3 , monkeypatch):
+    put(s3 , 'data.csv' , shard(0).to_csv(index = False).encode())
+    calls = count_calls(monkeypatch , s3 , fail_with = ['SlowDown' , 'ServiceUnavailable'])
+
+    pd.testing.assert_frame_equal(s3.fetch_file_from_s3('data.csv') , shard(0))
+    assert len(calls) == 3
@@ -0,0 +1,98 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from src.model.lean_model import LeanModel, export_lean_model
+from src.model.sparse_scorer import SparseScorer, build_sparse_scorer
+
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))) , 'notebooks ' , 'data.csv')
+
+VECTORIZER_SETTINGS = {
+    'default': {},
+    'max_features': {'max_features': 50},
+    'ngrams': {'ngram_range': (1 , 2) , 'max_features': 500},
+    'bigrams_only': {'ngram_range': (2 , 2)},
+    'binary': {'binary': True},
+    'stop_words': {'stop_words': 'english'},
+    'combined': {'ngram_range': (1 , 3) , 'binary': True , 'stop_words': 'english' , 'lowercase': False},
+}
+
+
+@pytest.fixture(scope = 'module')
+def sample():
+    df = pd.read_csv(SAMPLE_PATH)
+    labels = df['sentiment'].map({'positive': 1 , 'negative': 0}).values
+    return df['review'].fillna('').tolist() , labels
+
+
+def fit(texts , labels , **settings):
+    vectorizer = CountVectorizer(**settings)
+    X = vectorizer.fit_transform(texts)
+    model = LogisticRegression(C = 1 , solver = 'liblinear' , penalty = 'l1').fit(X , labels)
+    return model , vectorizer
+
+
+def held_out(texts):
+    return texts[400:] + ['' , 'zzz unseen tokens only' , 'The THE the , movie movie.']
+
+
+@pytest.mark.parametrize('settings' , VECTORIZER_SETTINGS.values() , ids = VECTORIZER_SETTINGS.keys())
+def test_from_sklearn_matches_predict_proba(sample , settings):
+    texts , labels = sample
+    model , vectorizer = fit(texts[:400] , labels[:400] , **settings)
+    test = held_out(texts)
+
+    scorer = SparseScorer.from_sklearn(model , vectorizer)
+
+    expected = model.predict_proba(vectorizer.transform(test))
+    np.testing.assert_allclose(scorer.predict_proba(test) , expected , rtol = 0 , atol = 1e-9)
+    np.testing.assert_array_equal(scorer.predict(test) , model.predict(vectorizer.transform(test)))
+
+
+@pytest.mark.parametrize('settings' , VECTORIZER_SETTINGS.values() , ids = VECTORIZER_SETTINGS.keys())
+def test_from_lean_matches_predict_proba(sample , tmp_path , settings):
+    texts , labels = sample
+    model , vectorizer = fit(texts[:400] , labels[:400] , **settings)
+    test = held_out(texts)
+    export_lean_model(model , vectorizer , str(tmp_path))
+
+    scorer = SparseScorer.from_lean(LeanModel.load(str(tmp_path)))
+
+    expected = model.predict_proba(vectorizer.transform(test))
+    np.testing.assert_allclose(scorer.predict_proba(test) , expected , rtol = 0 , atol = 1e-9)
+    np.testing.assert_array_equal(scorer.classes_ , model.classes_)
+
+
+def test_only_non_zero_weights_are_kept(sample):
+    texts , labels = sample
+    model , vectorizer = fit(texts , labels)
+
+    scorer = SparseScorer.from_sklearn(model , vectorizer)
+
+    assert len(scorer.weights) == np.count_nonzero(model.coef_)
+    assert 0.0 not in scorer.weights.values()
+
+
+def test_unsupported_vectorizer_falls_back(sample , caplog):
+    texts , labels = sample
+    model , vectorizer = fit(texts , labels , analyzer = 'char')
+
+    with caplog.at_level(logging.WARNING):
+        assert build_sparse_scorer(model , vectorizer) is None
+    assert 'Sparse scorer disabled' in caplog.text
+
+
+def test_multiclass_model_falls_back(sample , caplog):
+    texts , labels = sample
+    vectorizer = CountVectorizer().fit(texts)
+    model = LogisticRegression(max_iter = 200).fit(vectorizer.transform(texts) , np.arange(len(texts)) % 3)
+
+    with caplog.at_level(logging.WARNING):
+        assert build_sparse_scorer(model , vectorizer) is None
+    assert 'only binary classifiers' in caplog.text
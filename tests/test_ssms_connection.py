@@ -0,0 +1,173 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.connections.ssms_connection import ssms_operations
+
+
+class RecordingConnection:
+    """sqlite3 connection that records the transaction calls made on it"""
+
+    def __init__(self , path):
+        self.conn = sqlite3.connect(path , check_same_thread = False)
+        self.calls = []
+
+    def cursor(self):
+        return self.conn.cursor()
+
+    def commit(self):
+        self.calls.append('commit')
+        self.conn.commit()
+
+    def rollback(self):
+        self.calls.append('rollback')
+        self.conn.rollback()
+
+    def close(self):
+        self.calls.append('close')
+        self.conn.close()
+
+    @property
+    def in_transaction(self):
+        return self.conn.in_transaction
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'reviews.db')
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE reviews (id INTEGER PRIMARY KEY, review TEXT, score REAL)')
+        conn.executemany('INSERT INTO reviews VALUES (?, ?, ?)' , [(i , f'review {i}' , i / 2) for i in range(10)])
+    return path
+
+
+@pytest.fixture
+def connections():
+    return []
+
+
+@pytest.fixture
+def ssms(db_path , connections):
+    def connect(_):
+        conn = RecordingConnection(db_path)
+        connections.append(conn)
+        return conn
+
+    with ssms_operations('sqlite' , pool_size = 2 , connect = connect) as ops:
+        yield ops
+
+
+def test_iter_query_chunks(ssms):
+    chunks = list(ssms.iter_query_chunks('SELECT id, review FROM reviews WHERE id >= ? ORDER BY id' , 4 , params = (1 ,)))
+
+    assert [len(chunk) for chunk in chunks] == [4 , 4 , 1]
+    assert all(list(chunk.columns) == ['id' , 'review'] for chunk in chunks)
+    assert pd.concat(chunks)['id'].tolist() == list(range(1 , 10))
+
+
+def test_empty_result(ssms):
+    assert list(ssms.iter_query_chunks('SELECT id FROM reviews WHERE id < 0' , 4)) == []
+    assert ssms.fetch_query('SELECT id FROM reviews WHERE id < 0').empty
+
+
+def test_connection_goes_back_without_open_transaction(ssms , connections):
+    # a write left uncommitted by a reader must not leak into the next borrower
+    with ssms.connection() as conn:
+        conn.cursor().execute("UPDATE reviews SET review = 'changed' WHERE id = 0")
+        assert conn.in_transaction
+
+    conn = connections[0]
+    assert conn.calls[-1] == 'rollback'
+    assert not conn.in_transaction
+    assert ssms.fetch_query('SELECT review FROM reviews WHERE id = 0')['review'][0] == 'review 0'
+
+    list(ssms.iter_query_chunks('SELECT * FROM reviews' , 3))
+    assert len(connections) == 1
+    assert conn.calls[-1] == 'rollback'
+
+
+def test_abandoned_reader_discards_the_connection(ssms , connections):
+    chunks = ssms.iter_query_chunks('SELECT * FROM reviews' , 3)
+    next(chunks)
+    chunks.close()
+
+    assert connections[0].calls[-1] == 'close'
+    assert ssms._opened == 0
+
+
+def test_bulk_insert_with_nulls(ssms):
+    df = pd.DataFrame({'id': [100 , 101 , 102],
+                       'review': ['new' , None , np.nan],
+                       'score': [1.5 , np.nan , np.int64(3)]})
+
+    assert ssms.bulk_insert('reviews' , df , batch_size = 2) == 3
+
+    result = ssms.fetch_query('SELECT id, review, score FROM reviews WHERE id >= 100 ORDER BY id')
+    assert result['id'].tolist() == [100 , 101 , 102]
+    assert result['review'][0] == 'new'
+    assert result['score'][2] == 3.0
+    # stored as SQL NULL, not as a 'nan' string / NaN float
+    nulls = ssms.fetch_query('SELECT SUM(review IS NULL) AS reviews, SUM(score IS NULL) AS scores '
+                             'FROM reviews WHERE id >= 100')
+    assert nulls['reviews'][0] == 2
+    assert nulls['scores'][0] == 1
+
+
+def test_bulk_insert_rolls_back_on_error(ssms , connections):
+    # the second batch hits the primary key, the first one must not stay
+    df = pd.DataFrame({'id': [200 , 201 , 202 , 0] , 'review': ['a' , 'b' , 'c' , 'dup'] , 'score': [1.0] * 4})
+
+    with pytest.raises(sqlite3.IntegrityError):
+        ssms.bulk_insert('reviews' , df , batch_size = 2)
+
+    assert 'rollback' in connections[0].calls
+    assert ssms.fetch_query('SELECT COUNT(*) AS n FROM reviews')['n'][0] == 10
+
+
+def test_pool_reuses_connections(ssms , connections):
+    for _ in range(5):
+        ssms.fetch_query('SELECT * FROM reviews')
+
+    assert len(connections) == 1
+
+
+def test_pool_size_limit(ssms , connections):
+    acquired = threading.Event()
+
+    def borrow():
+        with ssms.connection():
+            acquired.set()
+
+    with ssms.connection() , ssms.connection():
+        assert len(connections) == 2
+        waiting = threading.Thread(target = borrow)
+        waiting.start()
+        # both connections are busy, the third borrower waits instead of opening one
+        assert not acquired.wait(0.2)
+    waiting.join(5)
+
+    assert acquired.is_set()
+    assert len(connections) == 2
+    assert ssms._opened == 2
+
+
+def test_failed_connect_frees_its_slot(db_path):
+    attempts = []
+
+    def flaky_connect(_):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise sqlite3.OperationalError('server unavailable')
+        return RecordingConnection(db_path)
+
+    ops = ssms_operations('sqlite' , pool_size = 1 , connect = flaky_connect)
+    with pytest.raises(sqlite3.OperationalError):
+        ops.fetch_query('SELECT * FROM reviews')
+    assert ops._opened == 0
+
+    assert len(ops.fetch_query('SELECT * FROM reviews')) == 10
+    ops.close()
+    assert ops._opened == 0
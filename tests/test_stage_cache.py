@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+
+from src.data.stage_cache import RowCache, CachedNormalizer, transform_cached
+from src.data.text_normalizer import TextNormalizer
+
+
+TEXTS = ['Great movie, LOVED it' , 'the plots were boring' , 'Great movie, LOVED it' , '' , np.nan ,
+         42 , 3.5 , 'www.example.com endings and twists']
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with RowCache(str(tmp_path / 'rows.sqlite')) as cache:
+        yield cache
+
+
+def test_row_cache_hit_and_miss(cache):
+    keys = [RowCache.key('first') , RowCache.key('second')]
+    cache.put_many('ns' , {keys[0]: b'one'})
+
+    assert cache.get_many('ns' , keys) == {keys[0]: b'one'}
+    # other namespaces do not see the row
+    assert cache.get_many('other' , keys[:1]) == {}
+    assert cache.stats() == {'hits': 1 , 'misses': 2 , 'hit_rate': 1 / 3}
+
+
+def test_rows_survive_reopening(tmp_path):
+    path = str(tmp_path / 'rows.sqlite')
+    with RowCache(path) as cache:
+        cache.put_many('ns' , {RowCache.key('text'): b'value'})
+    with RowCache(path) as cache:
+        assert cache.get_many('ns' , [RowCache.key('text')]) == {RowCache.key('text'): b'value'}
+
+
+def test_cached_normalizer_matches_the_plain_one(fake_nltk , cache):
+    texts = pd.Series(TEXTS , index = range(10 , 10 + len(TEXTS)))
+    expected = TextNormalizer().normalize_series(texts)
+    normalizer = CachedNormalizer(TextNormalizer() , cache)
+
+    cold = normalizer.normalize_series(texts)
+    warm = normalizer.normalize_series(texts)
+
+    pd.testing.assert_series_equal(cold , expected)
+    pd.testing.assert_series_equal(warm , expected)
+    # 4 distinct str texts : missed on the first call, hit on the second
+    assert cache.stats()['misses'] == 4
+    assert cache.stats()['hits'] == 4
+
+
+@pytest.mark.parametrize('vectorizer' , [CountVectorizer() , HashingVectorizer(n_features = 2 ** 8 , alternate_sign = False , norm = None)] ,
+                         ids = ['count' , 'hashing'])
+def test_transform_cached_matches_the_vectorizer(cache , vectorizer):
+    texts = ['great movie loved' , 'plot boring' , 'great movie loved' , '' , 'twist ending great']
+    if isinstance(vectorizer , CountVectorizer):
+        vectorizer.fit(texts)
+    expected = vectorizer.transform(texts)
+
+    cold = transform_cached(vectorizer.transform , vectorizer , texts , cache)
+    warm = transform_cached(vectorizer.transform , vectorizer , texts , cache)
+
+    for result in (cold , warm):
+        assert result.shape == expected.shape
+        assert (result != expected).nnz == 0
+    assert cache.hits == 4
@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from src.data.data_preprocessing import preprocess_text
+from src.data.lemma_cache import LemmaCache
+from src.data.text_normalizer import TextNormalizer, ParallelNormalizer
+from tests.conftest import FORKED_WORKERS, STOP_WORDS, SuffixLemmatizer
+
+
+CORPUS = [
+    'This movie was GREAT!!! Loved the actors',
+    'Visit https://example.com/review?id=42 or www.imdb.com for 10/10 reviews',
+    'Rated 4.5 stars in 2023 ; the plots, twists and endings',
+    'الفيلم؛ رائع جدا',
+    'tabs\tand\nnew lines   and  spaces',
+    '١٢٣ arabic digits and ½ fractions',
+    '',
+    "it's the best... no, the WORST: (really) [sic] films",
+] * 3
+
+needs_fork = pytest.mark.skipif(not FORKED_WORKERS , reason = 'the worker processes need the NLTK stand-ins')
+
+
+def reference(texts):
+    return [preprocess_text(text , STOP_WORDS , SuffixLemmatizer()) for text in texts]
+
+
+def normalize(texts , workers , lemma_cache = None , chunk_size = None):
+    texts = pd.Series(texts)
+    if workers == 1:
+        return TextNormalizer(lemma_cache = lemma_cache).normalize_series(texts)
+    with ParallelNormalizer(workers , chunk_size , lemma_cache) as normalizer:
+        return normalizer.normalize_series(texts)
+
+
+@pytest.mark.parametrize('workers' , [1 , pytest.param(2 , marks = needs_fork)])
+def test_matches_preprocess_text(fake_nltk , workers):
+    result = normalize(CORPUS , workers , chunk_size = 3)
+
+    assert result.tolist() == reference(CORPUS)
+    assert result.index.tolist() == list(range(len(CORPUS)))
+
+
+@needs_fork
+def test_parallel_keeps_the_row_order(fake_nltk):
+    # digits are stripped, the row number is spelled with letters so every row differs
+    tags = [''.join('bcdfghjklm'[int(digit)] for digit in str(i)) for i in range(200)]
+    texts = pd.Series([f'review {tag} items' for tag in tags] , index = range(1000 , 1200))
+
+    with ParallelNormalizer(3 , chunk_size = 7) as normalizer:
+        result = normalizer.normalize_series(texts)
+
+    assert result.index.tolist() == list(range(1000 , 1200))
+    assert result.tolist() == [f'review {tag} item' for tag in tags]
+    pd.testing.assert_series_equal(result , TextNormalizer().normalize_series(texts))
+
+
+@needs_fork
+def test_worker_lemmas_are_merged_into_the_parent_cache(fake_nltk):
+    lemma_cache = LemmaCache(SuffixLemmatizer() , max_size = 100)
+    lemma_cache.update({'cats': 'cat'})
+
+    with ParallelNormalizer(2 , chunk_size = 2 , lemma_cache = lemma_cache) as normalizer:
+        normalizer.normalize_series(pd.Series(['cats dogs' , 'birds cats' , 'dogs fish' , 'movies']))
+
+    assert lemma_cache.entries() == {'cats': 'cat' , 'dogs': 'dog' , 'birds': 'bird' , 'fish': 'fish' , 'movies': 'movie'}
+    stats = lemma_cache.stats()
+    # 'cats' was sent warm to the workers, every other first occurrence is a worker miss
+    assert stats['hits'] + stats['misses'] == 7
+    assert stats['misses'] >= 4
+
+
+def test_nan_rows_stay_nan(fake_nltk):
+    result = TextNormalizer().normalize_series(pd.Series(['the cats' , None , float('nan')]))
+
+    assert result[0] == 'cat'
+    assert result[1:].isna().all()